@@ -0,0 +1,570 @@
+"""
+ANiStrm 离线性能测试：启动本地模拟的索引及RSS服务，端到端运行插件，输出JSON结果
+
+需要在MoviePilot后端环境中运行（可导入app包），每个场景在独立子进程中运行，互不影响：
+
+    cd /path/to/MoviePilot
+    PYTHONPATH=. python /path/to/MoviePilot-Plugins/benchmarks/anistrm/bench.py --folders 100 --output new.json
+    PYTHONPATH=. python /path/to/MoviePilot-Plugins/benchmarks/anistrm/bench.py --compare old.json new.json
+
+除端到端场景外，还有针对单项改动的场景（结果中的 metrics），可用 --scenarios 单独运行：
+
+    crawl_scaling  不同并发数下获取当季列表的耗时及加速比（--scaling-levels 1,2,4,8,16）
+    rss_parse      同一RSS用minidom（改造前）、流式解析、提前停止、只计算摘要，以及插件获取最新列表（从本地模拟服务
+                   接收、计算摘要并解析，全部为新条目或全部已处理）的耗时和峰值内存（--rss-items）
+    import_time    新进程中导入插件及首次整理标题的耗时：不转换、完整OpenCC、精简转换表，以及改造前导入时即加载OpenCC
+                   （--import-repeat 个进程取中位数）
+    normalize      按 normalize_golden.jsonl 逐条整理标题的每条耗时（微秒）：改造前的实现、不转换、完整OpenCC、
+                   精简转换表，分别统计不命中、命中缓存（--normalize-repeat 个进程取中位数）
+    layout_scan    相同的strm文件（--folders、--files）按平铺、分目录结构存放时，遍历存储目录、列出单部番剧目录的耗时，
+                   以及把平铺结构迁移为分目录结构的耗时
+
+插件数据（清单、缓存等）及strm文件都写入临时目录，不影响MoviePilot中已安装的插件
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, fields, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_ani import FOLDER_MIME, FakeAni, FakeAniConfig  # noqa: E402
+
+PLUGINS_DIR = Path(__file__).resolve().parents[2] / 'plugins'
+SCENARIOS = ['season_list', 'latest_list', 'task_full', 'task_full_rerun', 'task_incremental']
+
+
+def _plugin_class(workdir: Path):
+    """插件子类：插件数据保存到临时目录，不写MoviePilot数据库"""
+    sys.path.insert(0, str(PLUGINS_DIR))
+    from anistrm import ANiStrm
+
+    data_dir = workdir / 'data'
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    class BenchANiStrm(ANiStrm):
+        def get_data_path(self) -> Path:
+            return data_dir
+
+        def _data_file(self, key: str) -> Path:
+            return data_dir / f'{key}.json'
+
+        def get_data(self, key: str = None, plugin_id: str = None) -> Any:
+            path = self._data_file(key)
+            return json.loads(path.read_text(encoding='utf-8')) if path.exists() else None
+
+        def save_data(self, key: str, value: Any, plugin_id: str = None):
+            self._data_file(key).write_text(json.dumps(value, ensure_ascii=False), encoding='utf-8')
+
+        def del_data(self, key: str, plugin_id: str = None) -> Any:
+            self._data_file(key).unlink(missing_ok=True)
+
+        def update_config(self, config: dict, plugin_id: str = None) -> bool:
+            return True
+
+    return BenchANiStrm
+
+
+def _count_files(root: Path) -> int:
+    return sum(1 for path in root.rglob('*.strm'))
+
+
+@contextmanager
+def _running_plugin(config: FakeAniConfig, plugin_config: Dict[str, Any]) -> Iterator[Tuple[Any, FakeAni, Path]]:
+    """启动模拟服务及插件，返回（插件, 模拟服务, strm目录），退出时停止"""
+    fake = FakeAni(config).start()
+    with tempfile.TemporaryDirectory(prefix='anistrm-bench-') as tmp:
+        workdir = Path(tmp)
+        storage = workdir / 'strm'
+        storage.mkdir()
+        plugin = _plugin_class(workdir)()
+        plugin._index_scheme = 'http'
+        plugin._feed_url = fake.feed_url
+        plugin.init_plugin({
+            'enabled': False,
+            'storageplace': str(storage),
+            'custom_domain': fake.host,
+            **plugin_config
+        })
+        try:
+            yield plugin, fake, storage
+        finally:
+            plugin.stop_service()
+            fake.stop()
+
+
+def crawl_scaling(config: FakeAniConfig, plugin_config: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """不同并发数下获取当季列表，每个并发数使用新的模拟服务及插件，不受缓存影响"""
+    levels = options.get('scaling_levels') or [1, 2, 4, 8, 16]
+    rows = []
+    for level in levels:
+        with _running_plugin(config, {**plugin_config, 'crawl_concurrency': level}) as (plugin, fake, _):
+            start = time.perf_counter()
+            items = len(plugin.get_current_season_list())
+            elapsed = time.perf_counter() - start
+            rows.append({'concurrency': level, 'elapsed_s': round(elapsed, 4), 'items': items,
+                         'requests': fake.stats.requests})
+    base = rows[0]['elapsed_s'] if rows else None
+    for row in rows:
+        row['speedup'] = round(base / row['elapsed_s'], 2) if base and row['elapsed_s'] else None
+    return {
+        'levels': rows,
+        'metrics': {f'c{row["concurrency"]}_s': row['elapsed_s'] for row in rows}
+    }
+
+
+def _measure(func: Callable[[], Any], repeat: int = 3) -> Tuple[float, float, Any]:
+    """多次运行取最短耗时，再单独运行一次统计tracemalloc峰值内存，返回（秒, MB, 结果）"""
+    elapsed = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        elapsed = seconds if elapsed is None else min(elapsed, seconds)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, result
+
+
+def rss_parse(config: FakeAniConfig, plugin_config: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    同一RSS分别用改造前的minidom、流式解析器（全部条目、提前停止）解析，只计算内容摘要，
+    以及插件从模拟服务获取最新列表（全部为新条目、全部已在剧集清单中）
+    """
+    import xml.dom.minidom
+    from app.utils.dom import DomUtils
+    from anistrm.feed import iter_rss_items
+    from anistrm.naming import parse_name
+
+    early_stop = options.get('early_stop') or 30
+    rows, metrics = {}, {}
+    with _running_plugin(replace(config, latency_ms=0, jitter_ms=0), plugin_config) as (plugin, fake, _):
+        # 模拟服务的订阅内容预先生成，不计入峰值内存
+        body = fake.feed()
+
+        def _chunks():
+            return (body[start:start + 16 * 1024] for start in range(0, len(body), 16 * 1024))
+
+        def _minidom():
+            items = xml.dom.minidom.parseString(body.decode('utf-8')).documentElement.getElementsByTagName('item')
+            return [{'title': DomUtils.tag_value(item, 'title', default=''),
+                     'link': DomUtils.tag_value(item, 'link', default='')} for item in items]
+
+        def _hash_only():
+            digest = hashlib.sha256()
+            for chunk in _chunks():
+                digest.update(chunk)
+            return [digest.hexdigest()]
+
+        def _latest_list():
+            # 插件实际的获取流程（边接收边计算摘要、解析），每次清空订阅缓存，不命中摘要
+            plugin._feed_cache = None
+            return plugin.get_latest_list()
+
+        parsers = {
+            'minidom': _minidom,
+            'streaming': lambda: list(iter_rss_items(_chunks())),
+            'early_stop': lambda: list(itertools.islice(iter_rss_items(_chunks()), early_stop)),
+            'hash_only': _hash_only,
+            'get_latest_list': _latest_list,
+        }
+        for name, func in parsers.items():
+            elapsed, peak_mb, items = _measure(func)
+            rows[name] = {'elapsed_s': round(elapsed, 4), 'peak_mb': round(peak_mb, 2), 'items': len(items)}
+            metrics[f'{name}_s'] = rows[name]['elapsed_s']
+            metrics[f'{name}_peak_mb'] = rows[name]['peak_mb']
+        # 全部条目写入剧集清单后，连续遇到已处理条目即停止解析，剩余内容只计算摘要
+        plugin._manifest.upsert_many({
+            'key': parse_name(item['title']).key,
+            'series': parse_name(item['title']).series,
+            'file_name': item['title'],
+            'convert_name': item['title'],
+            'source_url': item['link']
+        } for item in iter_rss_items(_chunks()))
+        elapsed, peak_mb, items = _measure(_latest_list)
+        rows['get_latest_list_known'] = {'elapsed_s': round(elapsed, 4), 'peak_mb': round(peak_mb, 2),
+                                         'items': len(items)}
+        metrics['get_latest_list_known_s'] = rows['get_latest_list_known']['elapsed_s']
+        metrics['get_latest_list_known_peak_mb'] = rows['get_latest_list_known']['peak_mb']
+    return {'feed_bytes': len(body), 'parsers': rows, 'metrics': metrics}
+
+
+# 在新进程中运行：导入插件并整理一个标题，输出各步骤耗时
+_IMPORT_PROBE = '''
+import json, sys, time
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+mode, table, title = sys.argv[2], sys.argv[3], sys.argv[4]
+# 先导入MoviePilot及第三方依赖，只统计插件自身的导入耗时
+import pytz, requests, fastapi.responses, apscheduler.schedulers.background, apscheduler.triggers.cron
+import app.core.config, app.core.event, app.log, app.plugins, app.schemas.types, app.utils.http
+start = time.perf_counter()
+converter = None
+if mode == 'eager':
+    # 改造前插件导入时即创建OpenCC('t2s')
+    from opencc import OpenCC
+    converter = OpenCC('t2s').convert
+opencc_loaded = time.perf_counter()
+import anistrm
+from anistrm import normalize
+imported = time.perf_counter()
+# 统计是否加载了完整的OpenCC繁转简词典
+loads = []
+opencc_t2s = normalize._opencc_t2s
+normalize._opencc_t2s = lambda: loads.append(1) or opencc_t2s()
+if converter:
+    normalize.set_converter(converter)
+if mode == 'compact':
+    normalize.load_compact_table(Path(table))
+normalize.normalize_title(title, mode != 'off')
+done = time.perf_counter()
+print(json.dumps({'opencc_ms': (opencc_loaded - start) * 1000, 'import_ms': (imported - start) * 1000,
+                  'first_title_ms': (done - imported) * 1000, 'total_ms': (done - start) * 1000,
+                  't2s_loaded': bool(loads) or converter is not None}))
+'''
+IMPORT_TITLE = '[ANi] 葬送的芙莉蓮 - 01 [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4'
+
+
+def import_time(config: FakeAniConfig, plugin_config: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """每种方式各运行若干个新进程，取中位数"""
+    from anistrm.normalize import save_compact_table
+
+    repeat = options.get('import_repeat') or 5
+    rows, metrics = {}, {}
+    with tempfile.TemporaryDirectory(prefix='anistrm-bench-') as tmp:
+        table = Path(tmp) / 't2s_table.json'
+        save_compact_table(table, [IMPORT_TITLE] + [item['name'] for item in FakeAni(config).listing('/2024-10/x/')])
+        for mode in ('off', 'full', 'compact', 'eager'):
+            samples = []
+            for _ in range(repeat):
+                proc = subprocess.run([sys.executable, '-c', _IMPORT_PROBE, str(PLUGINS_DIR), mode, str(table),
+                                       IMPORT_TITLE], capture_output=True, text=True, check=True)
+                samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            rows[mode] = {key: round(statistics.median(sample[key] for sample in samples), 2)
+                          for key in ('opencc_ms', 'import_ms', 'first_title_ms', 'total_ms')}
+            rows[mode]['t2s_loaded'] = samples[-1]['t2s_loaded']
+            for key in ('import_ms', 'first_title_ms', 'total_ms'):
+                metrics[f'{mode}_{key}'] = rows[mode][key]
+    return {'modes': rows, 'metrics': metrics}
+
+
+def _fake_titles(fake: FakeAni, path: str = '/2024-10/') -> Iterator[str]:
+    """模拟服务当季目录树中的全部文件名"""
+    for item in fake.listing(path):
+        if item['mimeType'] == FOLDER_MIME:
+            yield from _fake_titles(fake, f'{path}{item["name"]}/')
+        else:
+            yield item['name']
+
+
+def layout_scan(config: FakeAniConfig, plugin_config: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """相同的strm文件分别按平铺、分目录结构写入临时目录，比较遍历、列目录及迁移的耗时"""
+    from anistrm.layout import FLAT, SERIES, migrate_flat, relative_dir, strm_path
+    from anistrm.normalize import normalize_title
+    from anistrm.reconcile import scan_storage
+
+    names = [normalize_title(title, bool(plugin_config.get('convert_traditional')))
+             for title in _fake_titles(FakeAni(config))]
+    rows, metrics = {}, {}
+    with tempfile.TemporaryDirectory(prefix='anistrm-bench-') as tmp:
+        roots = {}
+        for layout in (FLAT, SERIES):
+            roots[layout] = os.path.join(tmp, layout)
+            for name in names:
+                path = strm_path(roots[layout], name, layout)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                Path(path).write_text(f'http://127.0.0.1/{name}', encoding='utf-8')
+        for layout, root in roots.items():
+            # 平铺结构中单部番剧的文件只能从存储根目录中列出
+            series_dir = os.path.join(root, relative_dir(names[0], layout))
+            scan_s, scan_mb, (strm_files, _) = _measure(lambda: scan_storage(root))
+            list_s, _, entries = _measure(lambda: os.listdir(series_dir))
+            rows[layout] = {
+                'strm': len(strm_files),
+                'dirs': sum(1 for _ in os.walk(root)),
+                'scan_s': round(scan_s, 4),
+                'scan_peak_mb': round(scan_mb, 2),
+                'list_series_ms': round(list_s * 1000, 3),
+                'list_series_entries': len(entries)
+            }
+            metrics[f'{layout}_scan_s'] = rows[layout]['scan_s']
+            metrics[f'{layout}_list_series_ms'] = rows[layout]['list_series_ms']
+        # 每次迁移平铺结构的一份副本，只统计迁移本身的耗时
+        migrate_s, moved = None, {}
+        for index in range(3):
+            copy = shutil.copytree(roots[FLAT], os.path.join(tmp, f'migrate-{index}'))
+            start = time.perf_counter()
+            moved = migrate_flat(copy, SERIES)
+            elapsed = time.perf_counter() - start
+            migrate_s = elapsed if migrate_s is None else min(migrate_s, elapsed)
+            shutil.rmtree(copy)
+        metrics['migrate_s'] = round(migrate_s, 4)
+    return {
+        'files': len(names),
+        'layouts': rows,
+        'migrate': {'elapsed_s': metrics['migrate_s'], 'moved': len(moved)},
+        'metrics': metrics
+    }
+
+
+# 在新进程中运行：按语料逐条整理标题，输出每条标题的耗时
+_NORMALIZE_PROBE = '''
+import json, sys, time
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+sys.path.insert(0, sys.argv[2])
+mode, table, golden, passes = sys.argv[3], sys.argv[4], sys.argv[5], int(sys.argv[6])
+from check_normalize import baseline_clean, load
+from anistrm import normalize
+titles = [row[0] for row in load(Path(golden))]
+converter = None
+if mode == 'compact':
+    converter = normalize.load_compact_table(Path(table))
+if mode.startswith('baseline'):
+    # 改造前：每次调用都重新整理，不缓存
+    from opencc import OpenCC
+    t2s = OpenCC('t2s')
+    func = (lambda title: t2s.convert(baseline_clean(title))) if mode == 'baseline_t2s' else baseline_clean
+    clear = lambda: None
+else:
+    func = lambda title: normalize.normalize_title(title, mode != 'off')
+    clear = normalize.normalize_title.cache_clear
+# 首次调用加载转换器，不计入耗时
+func(titles[0])
+best = None
+for _ in range(passes):
+    clear()
+    start = time.perf_counter()
+    for title in titles:
+        func(title)
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+# 缓存命中：同一批标题再整理一次
+start = time.perf_counter()
+for title in titles:
+    func(title)
+cached = time.perf_counter() - start
+print(json.dumps({'us_per_title': best / len(titles) * 1e6, 'cached_us_per_title': cached / len(titles) * 1e6,
+                  'titles': len(titles), 'misses': converter.misses if converter else 0}))
+'''
+NORMALIZE_MODES = ('baseline', 'baseline_t2s', 'off', 'full', 'compact')
+
+
+def normalize(config: FakeAniConfig, plugin_config: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    按 normalize_golden.jsonl 逐条整理标题：改造前的实现（不转换、OpenCC繁转简）、不转换、完整OpenCC、精简转换表，
+    每种方式各运行若干个新进程，取中位数
+    """
+    from anistrm.normalize import save_compact_table
+    from check_normalize import GOLDEN, load
+
+    repeat = options.get('normalize_repeat') or 5
+    rows, metrics = {}, {}
+    with tempfile.TemporaryDirectory(prefix='anistrm-bench-') as tmp:
+        # 精简转换表由语料中的全部标题生成，与插件根据剧集清单生成的方式相同
+        table = Path(tmp) / 't2s_table.json'
+        save_compact_table(table, [row[0] for row in load(GOLDEN)])
+        for mode in NORMALIZE_MODES:
+            samples = []
+            for _ in range(repeat):
+                proc = subprocess.run([sys.executable, '-c', _NORMALIZE_PROBE, str(PLUGINS_DIR),
+                                       os.path.dirname(os.path.abspath(__file__)), mode, str(table), str(GOLDEN), '5'],
+                                      capture_output=True, text=True, check=True)
+                samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            rows[mode] = {key: round(statistics.median(sample[key] for sample in samples), 3)
+                          for key in ('us_per_title', 'cached_us_per_title')}
+            rows[mode].update(titles=samples[-1]['titles'], misses=samples[-1]['misses'])
+            metrics[f'{mode}_us'] = rows[mode]['us_per_title']
+            metrics[f'{mode}_cached_us'] = rows[mode]['cached_us_per_title']
+    return {'modes': rows, 'metrics': metrics}
+
+
+# 针对单项改动的场景：名称 -> 函数(模拟服务配置, 插件配置, 场景选项)，返回结果中的 metrics 参与对比
+MICRO_SCENARIOS: Dict[str, Callable[[FakeAniConfig, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = {
+    'crawl_scaling': crawl_scaling,
+    'rss_parse': rss_parse,
+    'import_time': import_time,
+    'normalize': normalize,
+    'layout_scan': layout_scan,
+}
+
+
+def run_scenario(name: str, config: FakeAniConfig, plugin_config: Dict[str, Any],
+                 options: Dict[str, Any] = None) -> Dict[str, Any]:
+    """在当前进程中运行单个场景"""
+    from anistrm.metrics import RunMetrics
+
+    if name in MICRO_SCENARIOS:
+        start = time.perf_counter()
+        result = MICRO_SCENARIOS[name](config, plugin_config, options or {})
+        return {
+            'scenario': name,
+            'elapsed_s': round(time.perf_counter() - start, 4),
+            **result,
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        }
+
+    with _running_plugin(config, plugin_config) as (plugin, fake, storage):
+        task = getattr(plugin, '_ANiStrm__task')
+        if name == 'task_full_rerun':
+            # 先完整运行一次，测量缓存、清单生效后的重复运行
+            task(True)
+        requests_before = fake.stats.requests
+        plugin._metrics = RunMetrics(name)
+        start = time.perf_counter()
+        if name == 'season_list':
+            items = len(plugin.get_current_season_list())
+        elif name == 'latest_list':
+            items = len(plugin.get_latest_list())
+        else:
+            task(name != 'task_incremental')
+            items = None
+        elapsed = time.perf_counter() - start
+        if name.startswith('task_'):
+            metrics = plugin._metrics_history.records()[-1]
+            counters = metrics['counters']
+            items = sum(counters.get(f'strm_{status}', 0)
+                        for status in ('created', 'updated', 'unchanged', 'failed'))
+        else:
+            metrics = plugin._metrics.to_dict()
+            counters = metrics['counters']
+        return {
+            'scenario': name,
+            'elapsed_s': round(elapsed, 4),
+            'items': items,
+            'throughput_per_s': round(items / elapsed, 1) if elapsed else None,
+            'folder_latency_ms': metrics['latency_ms'].get('folder_list', {}),
+            'phases_s': metrics['phases'],
+            'requests': fake.stats.requests - requests_before,
+            'server_errors': fake.stats.errors,
+            'writes': {status: counters.get(f'strm_{status}', 0)
+                       for status in ('created', 'updated', 'unchanged', 'failed')},
+            'files_on_disk': _count_files(storage),
+            # Linux下为KB
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        }
+
+
+def run_all(config: FakeAniConfig, plugin_config: Dict[str, Any], scenarios: List[str],
+            options: Dict[str, Any] = None) -> Dict[str, Any]:
+    results = []
+    for name in scenarios:
+        proc = subprocess.run([sys.executable, __file__, '--run-scenario', name,
+                               '--fake-config', json.dumps(asdict(config)),
+                               '--plugin-config', json.dumps(plugin_config),
+                               '--options', json.dumps(options or {})],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            results.append({'scenario': name, 'error': proc.stderr.strip().splitlines()[-1:]})
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fake_config': asdict(config),
+        'plugin_config': plugin_config,
+        'options': options or {},
+        'results': results
+    }
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """对比两次结果的耗时、吞吐量、延迟及内存"""
+    lines = []
+    old_results = {item['scenario']: item for item in old['results'] if 'error' not in item}
+    for item in new['results']:
+        base = old_results.get(item['scenario'])
+        if not base or 'error' in item:
+            continue
+        metrics = [
+            ('elapsed_s', item.get('elapsed_s'), base.get('elapsed_s')),
+            ('throughput_per_s', item.get('throughput_per_s'), base.get('throughput_per_s')),
+            ('folder_p50_ms', item.get('folder_latency_ms', {}).get('p50'),
+             base.get('folder_latency_ms', {}).get('p50')),
+            ('folder_p95_ms', item.get('folder_latency_ms', {}).get('p95'),
+             base.get('folder_latency_ms', {}).get('p95')),
+            ('requests', item.get('requests'), base.get('requests')),
+            ('peak_rss_kb', item.get('peak_rss_kb'), base.get('peak_rss_kb')),
+        ]
+        metrics += [(metric, value, base.get('metrics', {}).get(metric))
+                    for metric, value in item.get('metrics', {}).items()]
+        for metric, value, base_value in metrics:
+            if value is None or not base_value:
+                continue
+            lines.append(f'{item["scenario"]:<18} {metric:<18} {base_value:>12} -> {value:>12} '
+                         f'({(value - base_value) / base_value * 100:+.1f}%)')
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ANiStrm 离线性能测试')
+    defaults = FakeAniConfig()
+    for item in fields(FakeAniConfig):
+        parser.add_argument(f'--{item.name.replace("_", "-")}', type=type(getattr(defaults, item.name)),
+                            default=getattr(defaults, item.name))
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS + list(MICRO_SCENARIOS)), help='逗号分隔的场景')
+    parser.add_argument('--crawl-concurrency', type=int, default=4)
+    parser.add_argument('--crawl-rate', type=float, default=1000)
+    parser.add_argument('--convert-traditional', action='store_true')
+    parser.add_argument('--scaling-levels', default='1,2,4,8,16', help='crawl_scaling 的并发数，逗号分隔')
+    parser.add_argument('--import-repeat', type=int, default=5, help='import_time 每种方式运行的进程数')
+    parser.add_argument('--normalize-repeat', type=int, default=5, help='normalize 每种方式运行的进程数')
+    parser.add_argument('--output', help='结果保存路径，默认输出到标准输出')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两次结果')
+    parser.add_argument('--run-scenario', help=argparse.SUPPRESS)
+    parser.add_argument('--fake-config', help=argparse.SUPPRESS)
+    parser.add_argument('--plugin-config', help=argparse.SUPPRESS)
+    parser.add_argument('--options', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = (json.loads(Path(path).read_text(encoding='utf-8')) for path in args.compare)
+        print('\n'.join(compare(old, new)))
+        return
+    if args.run_scenario:
+        sys.path.insert(0, str(PLUGINS_DIR))
+        result = run_scenario(args.run_scenario, FakeAniConfig(**json.loads(args.fake_config)),
+                              json.loads(args.plugin_config), json.loads(args.options or '{}'))
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    config = FakeAniConfig(**{item.name: getattr(args, item.name) for item in fields(FakeAniConfig)})
+    plugin_config = {
+        'crawl_concurrency': args.crawl_concurrency,
+        'crawl_rate': args.crawl_rate,
+        'convert_traditional': args.convert_traditional
+    }
+    options = {
+        'scaling_levels': [int(level) for level in args.scaling_levels.split(',') if level],
+        'import_repeat': args.import_repeat,
+        'normalize_repeat': args.normalize_repeat
+    }
+    report = run_all(config, plugin_config, [name for name in args.scenarios.split(',') if name], options)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
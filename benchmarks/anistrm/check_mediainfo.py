@@ -0,0 +1,138 @@
+"""
+媒体信息探测检查：启动本地模拟服务（支持Range请求的合成MP4），通过插件的探测流程读取moov在文件头、
+文件末尾的样本，检查解析结果与样本一致，统计读取次数及字节数；再端到端运行一次全量任务，检查每个strm都生成了NFO
+
+需要在MoviePilot后端环境中运行（可导入app包）：
+
+    cd /path/to/MoviePilot
+    PYTHONPATH=. python /path/to/MoviePilot-Plugins/benchmarks/anistrm/check_mediainfo.py
+
+上游不支持Range请求时，moov在文件末尾的样本应当探测失败而不是下载整个文件
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench import PLUGINS_DIR, _plugin_class  # noqa: E402
+from fake_ani import FakeAni, FakeAniConfig  # noqa: E402
+
+# 单个文件探测最多允许读取的字节数，远小于文件大小
+MAX_PROBE_BYTES = 1024 * 1024
+
+
+def _matches(info: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    video, audio = (info.get('video') or [{}])[0], (info.get('audio') or [{}])[0]
+    return abs((info.get('duration') or 0) - expected['duration']) < 1 \
+        and (video.get('width'), video.get('height')) == (expected['width'], expected['height']) \
+        and (audio.get('channels'), audio.get('sample_rate'), audio.get('language')) \
+        == (expected['channels'], expected['sample_rate'], expected['language'])
+
+
+def probe_case(range_support: bool, moov_at_end: bool, mdat_mb: int) -> Dict[str, Any]:
+    """通过插件探测一个样本，返回结果及读取统计"""
+    fake = FakeAni(FakeAniConfig(latency_ms=0, jitter_ms=0, mp4_mdat_mb=mdat_mb,
+                                 range_support=range_support)).start()
+    reads = []
+    with tempfile.TemporaryDirectory(prefix='anistrm-mediainfo-') as tmp:
+        plugin = _plugin_class(Path(tmp))()
+        plugin._index_scheme = 'http'
+        plugin.init_plugin({'enabled': False, 'storageplace': tmp, 'custom_domain': fake.host})
+        read_range = getattr(plugin, '_ANiStrm__read_range')
+
+        def _counted(url: str, start: int, end: int) -> bytes:
+            data = read_range(url, start, end)
+            reads.append(len(data))
+            return data
+
+        # 实例属性优先于类中的私有方法，统计插件实际读取的范围
+        setattr(plugin, '_ANiStrm__read_range', _counted)
+        name = fake.listing('/2024-10/番剧000 第1季/')[1 if moov_at_end else 0]['name']
+        sample = fake.sample(name)
+        start = time.perf_counter()
+        error = None
+        try:
+            info = getattr(plugin, '_ANiStrm__probe_mediainfo')(
+                f'http://{fake.host}/2024-10/{quote("番剧000 第1季")}/{quote(name)}?d=true')
+        except Exception as e:
+            info, error = None, f'{type(e).__name__}: {e}'
+        elapsed = time.perf_counter() - start
+        plugin.stop_service()
+    fake.stop()
+    return {
+        'range_support': range_support,
+        'moov_at_end': moov_at_end,
+        'ok': info is not None and _matches(info, sample.expected),
+        'error': error,
+        'reads': len(reads),
+        'bytes_read': sum(reads),
+        'file_size': sample.size,
+        'elapsed_ms': round(elapsed * 1000, 1)
+    }
+
+
+def end_to_end(folders: int, files: int, mdat_mb: int) -> Dict[str, int]:
+    """全量任务生成strm及NFO，moov在文件头、文件末尾的剧集各占一半"""
+    fake = FakeAni(FakeAniConfig(folders=folders, files=files, latency_ms=0, jitter_ms=0,
+                                 mp4_mdat_mb=mdat_mb)).start()
+    with tempfile.TemporaryDirectory(prefix='anistrm-mediainfo-') as tmp:
+        storage = Path(tmp) / 'strm'
+        storage.mkdir()
+        plugin = _plugin_class(Path(tmp))()
+        plugin._index_scheme = 'http'
+        plugin._feed_url = fake.feed_url
+        plugin.init_plugin({'enabled': False, 'storageplace': str(storage), 'custom_domain': fake.host,
+                            'mediainfo': True})
+        try:
+            getattr(plugin, '_ANiStrm__task')(True)
+        finally:
+            plugin.stop_service()
+            fake.stop()
+        nfo_files = list(storage.rglob('*.nfo'))
+        return {
+            'strm': sum(1 for _ in storage.rglob('*.strm')),
+            'nfo': len(nfo_files),
+            'nfo_with_streams': sum(1 for path in nfo_files
+                                    if '<width>1920</width>' in path.read_text(encoding='utf-8'))
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='媒体信息探测检查')
+    parser.add_argument('--mdat-mb', type=int, default=300, help='合成MP4的mdat大小（MB）')
+    parser.add_argument('--folders', type=int, default=3)
+    parser.add_argument('--files', type=int, default=4)
+    args = parser.parse_args()
+    sys.path.insert(0, str(PLUGINS_DIR))
+
+    failed = 0
+    rows: List[Dict[str, Any]] = []
+    for range_support in (True, False):
+        for moov_at_end in (False, True):
+            row = probe_case(range_support, moov_at_end, args.mdat_mb)
+            # 不支持Range时moov在末尾的文件无法只读取部分内容，应当失败
+            expect_ok = range_support or not moov_at_end
+            row['pass'] = row['ok'] == expect_ok and row['bytes_read'] <= MAX_PROBE_BYTES
+            failed += not row['pass']
+            rows.append(row)
+    print(f'{"Range":<6} {"moov":<6} {"结果":<6} {"读取次数":>8} {"读取字节":>10} {"文件大小":>12} {"耗时ms":>8}')
+    for row in rows:
+        print(f'{"支持" if row["range_support"] else "不支持":<6} {"末尾" if row["moov_at_end"] else "文件头":<6} '
+              f'{"成功" if row["ok"] else "失败":<6} {row["reads"]:>8} {row["bytes_read"]:>10} '
+              f'{row["file_size"]:>12} {row["elapsed_ms"]:>8}{"" if row["pass"] else "  不符合预期"}')
+        if row['error']:
+            print(f'    {row["error"]}')
+    counts = end_to_end(args.folders, args.files, args.mdat_mb)
+    print(f'全量任务：strm {counts["strm"]} 个，NFO {counts["nfo"]} 个，含流信息 {counts["nfo_with_streams"]} 个')
+    failed += not (counts['strm'] and counts['strm'] == counts['nfo'] == counts['nfo_with_streams'])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+标题整理回归检查：用固定的标题语料对比当前的标题整理、繁简转换结果与改造前的实现是否完全一致
+
+语料 normalize_golden.jsonl 每行为 [原始标题, 整理结果, 整理并繁转简结果]，由改造前的实现生成：
+
+    python check_normalize.py --generate     # 用改造前的实现重新生成语料（一般不需要）
+    PYTHONPATH=/path/to/MoviePilot python check_normalize.py
+
+检查三项：不转换、完整OpenCC繁转简、精简转换表（用前四分之一语料生成，其余语料覆盖回退到完整OpenCC的情况），
+有不一致时列出前几条并返回非0
+"""
+import argparse
+import json
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+PLUGINS_DIR = Path(__file__).resolve().parents[2] / 'plugins'
+GOLDEN = Path(__file__).resolve().parent / 'normalize_golden.jsonl'
+
+# 番剧名，覆盖全角符号、中英混排、数字、连字符、特殊括号等情况
+SERIES = [
+    '葬送的芙莉蓮', '間諜家家酒', 'Re：從零開始的異世界生活', '咒術迴戰', '我獨自升級', '藥師少女的獨語',
+    '【我推的孩子】', '擁有超常技能的異世界流浪美食家', '膽大黨', '迷宮飯', '轉生成為魔劍', '無職轉生～到了異世界就拿出真本事～',
+    '關於我轉生變成史萊姆這檔事', '為美好的世界獻上祝福！', '鬼滅之刃 柱訓練篇', '進擊的巨人 The Final Season',
+    'Fate／strange Fake', 'BanG Dream! It\'s MyGO!!!!!', '孤獨搖滾！', '輝夜姬想讓人告白？～天才們的戀愛頭腦戰～',
+    '86－不存在的戰區－', '刀劍神域 Alternative 槍械神域 II', '排球少年！！', '藍色監獄 VS. U-20 JAPAN',
+    '歡迎來到實力至上主義的教室 第3季', '青春豬頭少年不會夢到紅色書包女孩', '魔法少女小圓［新篇］叛逆的物語',
+    '月光下的異世界之旅 第二幕', '物語系列 第外季＆第怪季', '陰之實力者！ 2nd season', '間諜教室 2',
+    '死神 千年血戰篇－訣別譚－', '我的英雄學院 第7季', '妖精的尾巴 百年任務', '不時輕聲地以俄語遮羞的鄰座艾莉同學',
+    '亦叫做「鄰座的天使大人把我變成廢人這件事」', '在地下城尋求邂逅是否搞錯了什麼 Ⅴ', '香格里拉・開拓異境～糞作獵手挑戰神作～',
+    '敗北女角太多了！', '義妹生活', '戀愛中的機器人 Love Robot 2', '劇場版 咒術迴戰 0', 'SPY×FAMILY 代號：白',
+    '鏈鋸人', '蓮花 3 號', '夏日重現', '約會大作戰 DATE A LIVE V', '怪獸 8 號', '迷宮飯 － 料理篇', '干物妹！小埋',
+    '後宮之烏', '為什麼老師會在這裡！？', '憂國的莫里亞蒂', '鬥神機 G', '乾杯 ！ 發財 。 後來',
+]
+TEMPLATES = [
+    '[ANi] {name} - {ep:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4',
+    '[ANi] {name} - {ep:02d} [1080P][Bilibili][WEB-DL][AAC AVC][CHT CHS].mp4',
+    '[ANi] {name} - {ep:02d}.5 [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4',
+    '[ANi] {name}（僅限港澳台地區） - {ep:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4',
+    '[ANi] {name} 第二季 - {ep:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4',
+    '[ANi] {name} - {ep:02d} [720P][Baha][WEB-DL][AAC AVC][CHT].mp4',
+]
+# 随机标题使用的字符：繁体字、全角符号、空格、连字符、英文数字
+ALPHABET = list('葬送的芙莉蓮間諜家家酒從零開始異世界生活戰區劇場版乾後發著裡麵鍾獨－：，．！？（）［］　、。“”‘’ -abcXYZ0123456789[]')
+
+
+def baseline_clean(filename: str) -> str:
+    """改造前插件中的 _clean_filename，原样保留用于生成语料"""
+    cleaned_filename = filename
+    fullwidth_to_halfwidth = {
+        '\uFF0D': '-',  # 全角破折号（－）替换为半角连字符（-）
+        '\uFF1A': ':',  # 全角冒号（：）替换为半角冒号（:）
+        '\uFF0C': ',',  # 全角逗号（，）替换为半角逗号（,）
+        '\uFF0E': '.',  # 全角句号（。）替换为半角句号（.）
+        '\uFF01': '!',  # 全角感叹号（！）替换为半角感叹号（!）
+        '\uFF1F': '?',  # 全角问号（？）替换为半角问号（?）
+        '\uFF08': '(',  # 全角左括号（（）替换为半角左括号（(）
+        '\uFF09': ')',  # 全角右括号（））替换为半角右括号（)）
+        '\uFF3B': '[',  # 全角左方括号（［）替换为半角左方括号（[）
+        '\uFF3D': ']',  # 全角右方括号（］）替换为半角右方括号（]）
+        '\u3000': ' ',  # 全角空格替换为半角空格
+        # 其他全角符号可以直接移除（例如全角顿号、引号等）
+        '\u3001': '',  # 全角顿号（、）
+        '\u3002': '.',  # 全角句号（。）
+        '\u201C': '"',  # 全角左双引号
+        '\u201D': '"',  # 全角右双引号
+        '\u2018': '\'',  # 全角左单引号
+        '\u2019': '\'',  # 全角右单引号
+    }
+    for fullwidth, halfwidth in fullwidth_to_halfwidth.items():
+        cleaned_filename = cleaned_filename.replace(fullwidth, halfwidth)
+    cleaned_filename = re.sub(r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff])', r'\1\2', cleaned_filename)
+    cleaned_filename = re.sub(r'([\u4e00-\u9fff]+)\s+([a-zA-Z0-9]+)\s*([\u4e00-\u9fff]+)', r'\1\2\3',
+                              cleaned_filename)
+    cleaned_filename = re.sub(r'([\u4e00-\u9fff]+)\s+([a-zA-Z0-9]+)', r'\1\2', cleaned_filename)
+    cleaned_filename = re.sub(r'([0-9]+)\s+([\u4e00-\u9fff]+)', r'\1\2', cleaned_filename)
+    cleaned_filename = re.sub(r'([\u4e00-\u9fff])\s*-([\u4e00-\u9fff])', r'\1 \2', cleaned_filename)
+    cleaned_filename = re.sub(r'([\u4e00-\u9fff])(-)', r'\1', cleaned_filename)
+    return cleaned_filename
+
+
+def corpus_titles(fuzz: int = 600, seed: int = 20240101) -> List[str]:
+    """真实格式的标题及随机标题"""
+    titles = [template.format(name=name, ep=ep)
+              for name in SERIES for template in TEMPLATES for ep in (1, 12)]
+    rnd = random.Random(seed)
+    titles += [''.join(rnd.choice(ALPHABET) for _ in range(rnd.randint(1, 40))) for _ in range(fuzz)]
+    return titles
+
+
+def generate(path: Path):
+    from opencc import OpenCC
+    t2s = OpenCC('t2s')
+    with path.open('w', encoding='utf-8') as f:
+        for title in corpus_titles():
+            cleaned = baseline_clean(title)
+            f.write(json.dumps([title, cleaned, t2s.convert(cleaned)], ensure_ascii=False) + '\n')
+
+
+def load(path: Path) -> List[Tuple[str, str, str]]:
+    with path.open(encoding='utf-8') as f:
+        return [tuple(json.loads(line)) for line in f if line.strip()]
+
+
+def _check(name: str, corpus: List[Tuple[str, str, str]], func: Callable[[str], str], index: int,
+           show: int = 5) -> int:
+    mismatches = [(row[0], row[index], func(row[0])) for row in corpus if func(row[0]) != row[index]]
+    print(f'{name:<12} {len(corpus) - len(mismatches)}/{len(corpus)} 一致')
+    for title, expected, actual in mismatches[:show]:
+        print(f'  {title!r}\n    期望 {expected!r}\n    实际 {actual!r}')
+    return len(mismatches)
+
+
+def check(path: Path) -> int:
+    sys.path.insert(0, str(PLUGINS_DIR))
+    from anistrm.normalize import CompactConverter, clean_filename, normalize_title, set_converter
+
+    corpus = load(path)
+    failed = _check('不转换', corpus, lambda title: normalize_title(title, False), 1)
+    set_converter(None)
+    failed += _check('完整OpenCC', corpus, lambda title: normalize_title(title, True), 2)
+    compact = CompactConverter(CompactConverter.build(clean_filename(row[0]) for row in corpus[:len(corpus) // 4]))
+    set_converter(compact.convert)
+    try:
+        failed += _check('精简转换表', corpus, lambda title: normalize_title(title, True), 2)
+    finally:
+        set_converter(None)
+    print(f'精简转换表回退到完整OpenCC {compact.misses} 次')
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='标题整理回归检查')
+    parser.add_argument('--golden', default=str(GOLDEN), help='语料路径')
+    parser.add_argument('--generate', action='store_true', help='用改造前的实现重新生成语料')
+    args = parser.parse_args()
+    if args.generate:
+        generate(Path(args.golden))
+        print(f'已生成 {len(load(Path(args.golden)))} 条语料：{args.golden}')
+        return
+    sys.exit(1 if check(Path(args.golden)) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+同一集多个发布版本检查：同一集的Baha、Bilibili、720P等版本各自生成strm文件，
+剧集清单中各有一条记录，重复运行时都视为已处理，不会互相覆盖或反复重写；
+过期文件清理（删除方式）只删除同一版本的旧文件名，其他版本及剧集清单中的当前文件都保留
+
+需要在MoviePilot后端环境中运行（可导入app包）：
+
+    cd /path/to/MoviePilot
+    PYTHONPATH=. python /path/to/MoviePilot-Plugins/benchmarks/anistrm/check_releases.py
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench import PLUGINS_DIR, _plugin_class  # noqa: E402
+
+RELEASES = [
+    '[ANi] 葬送的芙莉蓮 - 02 [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4',
+    '[ANi] 葬送的芙莉蓮 - 02 [1080P][Bilibili][WEB-DL][AAC AVC][CHT CHS].mp4',
+    '[ANi] 葬送的芙莉蓮 - 02 [720P][Baha][WEB-DL][AAC AVC][CHT].mp4',
+]
+
+
+def _url(name: str) -> str:
+    return f'https://example.invalid/2023-10/{quote(name)}?d=true'
+
+
+def check_manifest(tmp: Path) -> List[str]:
+    """两次写入全部版本，返回不符合预期的项目"""
+    from anistrm.naming import parse_name
+    from anistrm.storage import CREATED, UNCHANGED
+
+    errors = []
+    storage = tmp / 'strm'
+    storage.mkdir()
+    plugin = _plugin_class(tmp)()
+    plugin.init_plugin({'enabled': False, 'storageplace': str(storage)})
+    touch = getattr(plugin, '_ANiStrm__touch_strm_file')
+    is_known = getattr(plugin, '_ANiStrm__is_known_item')
+    try:
+        for expected in (CREATED, UNCHANGED):
+            for name in RELEASES:
+                status = touch(name[:-len('.mp4')], file_url=_url(name), raw_name=name, season='2023-10')
+                if status != expected:
+                    errors.append(f'第{1 if expected == CREATED else 2}次写入 {name}：{status}，期望 {expected}')
+        keys = {parse_name(name).key for name in RELEASES}
+        if len(keys) != len(RELEASES):
+            errors.append(f'{len(RELEASES)} 个版本只有 {len(keys)} 个剧集标识')
+        for name in RELEASES:
+            record = plugin._manifest.get(parse_name(name).key)
+            if not record or record['file_name'] != name:
+                errors.append(f'剧集清单中没有 {name} 的记录')
+            if not is_known({'title': name, 'pub_date': None}):
+                errors.append(f'{name} 未视为已处理')
+        strm_files = sum(1 for _ in storage.rglob('*.strm'))
+        if strm_files != len(RELEASES):
+            errors.append(f'生成了 {strm_files} 个strm文件，期望 {len(RELEASES)} 个')
+    finally:
+        plugin.stop_service()
+    return errors
+
+
+def check_reconcile(tmp: Path) -> List[str]:
+    """开启繁转简写入全部版本，再放入一个繁体旧文件名，按删除方式清理后重新运行"""
+    from anistrm.reconcile import GC_DELETE, apply_report, reconcile
+    from anistrm.storage import UNCHANGED
+
+    errors = []
+    storage = tmp / 'strm'
+    storage.mkdir()
+    plugin = _plugin_class(tmp)()
+    plugin.init_plugin({'enabled': False, 'storageplace': str(storage), 'convert_traditional': True})
+    touch = getattr(plugin, '_ANiStrm__touch_strm_file')
+    try:
+        for name in RELEASES:
+            touch(plugin._convert_title(name)[:-len('.mp4')], file_url=_url(name), raw_name=name, season='2023-10')
+        current = {str(path) for path in storage.rglob('*.strm')}
+        # 关闭繁转简时生成的旧文件名，与Baha 1080P版本是同一版本
+        stale = storage / f'{RELEASES[0][:-len(".mp4")]}.strm'
+        stale.write_text(_url(RELEASES[0]), encoding='utf-8')
+        getattr(plugin, '_ANiStrm__reconcile')(GC_DELETE)
+        if stale.exists():
+            errors.append(f'旧文件名未清理：{stale.name}')
+        for path in current:
+            if not os.path.exists(path):
+                errors.append(f'当前文件被清理：{os.path.basename(path)}')
+        for name in RELEASES:
+            status = touch(plugin._convert_title(name)[:-len('.mp4')], file_url=_url(name), raw_name=name,
+                           season='2023-10')
+            if status != UNCHANGED:
+                errors.append(f'清理后重新运行 {name}：{status}，期望 {UNCHANGED}')
+        # 报告有误时也不删除剧集清单中的当前文件
+        report = reconcile(str(storage), plugin._manifest.strm_entries(), convert_traditional=True)
+        report['duplicates'] = [{'path': path, 'keep': path} for path in sorted(current)]
+        counts = apply_report(report, str(storage), GC_DELETE)
+        if counts['deleted'] or any(not os.path.exists(path) for path in current):
+            errors.append(f'删除了剧集清单中的当前文件：{counts}')
+    finally:
+        plugin.stop_service()
+    return errors
+
+
+def main():
+    sys.path.insert(0, str(PLUGINS_DIR))
+    failed = 0
+    for name, check in (('剧集清单', check_manifest), ('过期文件清理', check_reconcile)):
+        with tempfile.TemporaryDirectory(prefix='anistrm-releases-') as tmp:
+            errors = check(Path(tmp))
+        print(f'{name}：{"通过" if not errors else "失败"}')
+        for error in errors:
+            print(f'  {error}')
+        failed += len(errors)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+本地模拟的ANi索引及RSS服务，用于离线测量插件性能
+
+- POST /{季度}/{文件夹...}/  返回index接口格式的文件列表
+- GET  /ani-download.xml     返回RSS订阅
+- GET  /{季度}/.../*.mp4      返回合成的MP4文件，支持Range请求；偶数集moov在文件末尾，奇数集moov在文件头
+"""
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+VIDEO_MIME = 'video/mp4'
+
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+@dataclass
+class FakeAniConfig:
+    # 季度目录下的文件夹层数，1为 季度/番剧/文件
+    depth: int = 1
+    # 每层文件夹数
+    folders: int = 50
+    # 每个最内层文件夹的文件数
+    files: int = 12
+    # 每个请求的固定延迟及随机抖动（毫秒）
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    # 索引接口返回500的概率
+    error_rate: float = 0.0
+    # RSS条目数
+    rss_items: int = 200
+    # 合成MP4的mdat大小（MB），内容按需生成，不占用内存
+    mp4_mdat_mb: int = 300
+    # 是否支持Range请求，不支持时总是返回200及完整文件
+    range_support: bool = True
+    # 随机种子，相同配置生成相同的目录树及延迟序列
+    seed: int = 0
+
+    @property
+    def total_files(self) -> int:
+        return self.folders ** self.depth * self.files
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+
+    def add(self, size: int, error: bool = False):
+        with self.lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.bytes += size
+
+
+def _box(box_type: str, *parts: bytes) -> bytes:
+    body = b''.join(parts)
+    return struct.pack('>I4s', 8 + len(body), box_type.encode('latin-1')) + body
+
+
+def _full_box(box_type: str, *parts: bytes) -> bytes:
+    # version 0、flags 0
+    return _box(box_type, b'\0\0\0\0', *parts)
+
+
+def _language(code: str) -> int:
+    return (ord(code[0]) - 0x60) << 10 | (ord(code[1]) - 0x60) << 5 | (ord(code[2]) - 0x60)
+
+
+def _trak(handler: str, entry: bytes, timescale: int, duration: int, language: str) -> bytes:
+    mdhd = _full_box('mdhd', struct.pack('>IIIIHH', 0, 0, timescale, timescale * duration, _language(language), 0))
+    hdlr = _full_box('hdlr', struct.pack('>I4s', 0, handler.encode('latin-1')), b'\0' * 12, b'\0')
+    stsd = _full_box('stsd', struct.pack('>I', 1), entry)
+    return _box('trak', _box('mdia', mdhd, hdlr, _box('minf', _box('stbl', stsd))))
+
+
+class Mp4Sample:
+    """
+    合成的MP4文件：ftyp、moov（一路H.264视频、一路AAC音频）及mdat，mdat内容为0且按需生成，
+    moov_at_end为True时moov在mdat之后，即未做faststart的文件
+    """
+
+    def __init__(self, moov_at_end: bool = False, mdat_size: int = 300 * 1024 * 1024,
+                 width: int = 1920, height: int = 1080, duration: int = 1440,
+                 channels: int = 2, sample_rate: int = 48000, language: str = 'jpn'):
+        self.expected = {'duration': duration, 'width': width, 'height': height,
+                         'channels': channels, 'sample_rate': sample_rate, 'language': language}
+        ftyp = _box('ftyp', b'isom', struct.pack('>I', 512), b'isomiso2avc1mp41')
+        mvhd = _full_box('mvhd', struct.pack('>IIII', 0, 0, 1000, duration * 1000), b'\0' * 80)
+        video = _box('avc1', b'\0' * 6, struct.pack('>H', 1), b'\0' * 16, struct.pack('>HH', width, height),
+                     b'\0' * 50)
+        audio = _box('mp4a', b'\0' * 6, struct.pack('>H', 1), b'\0' * 8,
+                     struct.pack('>HHHHI', channels, 16, 0, 0, sample_rate << 16))
+        moov = _box('moov', mvhd, _trak('vide', video, 24000, duration, 'und'),
+                    _trak('soun', audio, sample_rate, duration, language))
+        # mdat超过4GB时使用64位大小
+        if mdat_size + 8 > 0xFFFFFFFF:
+            mdat_header = struct.pack('>I4sQ', 1, b'mdat', mdat_size + 16)
+        else:
+            mdat_header = struct.pack('>I4s', mdat_size + 8, b'mdat')
+        # (起始位置, 内容)，内容为None时是mdat数据
+        if moov_at_end:
+            parts = [ftyp + mdat_header, None, moov]
+        else:
+            parts = [ftyp + moov + mdat_header, None]
+        self._parts = []
+        offset = 0
+        for part in parts:
+            size = mdat_size if part is None else len(part)
+            self._parts.append((offset, size, part))
+            offset += size
+        self.size = offset
+
+    def read(self, start: int, end: int) -> bytes:
+        """读取指定字节范围（含首尾）"""
+        end = min(end, self.size - 1)
+        chunks = []
+        for offset, size, part in self._parts:
+            lo, hi = max(start, offset), min(end + 1, offset + size)
+            if lo >= hi:
+                continue
+            chunks.append(b'\0' * (hi - lo) if part is None else part[lo - offset:hi - offset])
+        return b''.join(chunks)
+
+
+class FakeAni:
+    """
+    模拟服务，start()后通过 base_url / feed_url 访问
+    """
+
+    def __init__(self, config: FakeAniConfig):
+        self.config = config
+        self.stats = _Stats()
+        self._random = random.Random(config.seed)
+        self._random_lock = threading.Lock()
+        self._samples = {
+            moov_at_end: Mp4Sample(moov_at_end=moov_at_end, mdat_size=config.mp4_mdat_mb * 1024 * 1024)
+            for moov_at_end in (False, True)
+        }
+        self._feed: Optional[bytes] = None
+        self._server = None
+
+    def _series(self, index: int) -> str:
+        return f'番剧{index:03d} 第{index % 3 + 1}季'
+
+    def _episode_name(self, series: str, episode: int) -> str:
+        return f'[ANi] {series} - {episode:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4'
+
+    def listing(self, path: str) -> List[dict]:
+        """按路径层级生成文件列表，同一路径每次结果相同"""
+        parts = [part for part in unquote(path).split('/') if part]
+        # 第一段为季度目录
+        level = len(parts) - 1
+        if level < 0:
+            return [{'name': '2024-10', 'mimeType': FOLDER_MIME, 'modifiedTime': '2024-10-01T00:00:00.000Z'}]
+        if level < self.config.depth:
+            return [{
+                'name': self._series(index) if level == self.config.depth - 1 else f'分类{index:03d}',
+                'mimeType': FOLDER_MIME,
+                'modifiedTime': '2024-10-01T00:00:00.000Z',
+                'size': '0'
+            } for index in range(self.config.folders)]
+        digest = int(hashlib.md5(path.encode()).hexdigest()[:8], 16)
+        series = parts[-1] if level else self._series(digest % 1000)
+        return [{
+            'name': self._episode_name(series, episode),
+            'mimeType': VIDEO_MIME,
+            'modifiedTime': '2024-10-02T00:00:00.000Z',
+            'size': str(300 * 1024 * 1024 + episode)
+        } for episode in range(1, self.config.files + 1)]
+
+    def sample(self, path: str) -> Mp4Sample:
+        """文件对应的合成MP4，偶数集moov在文件末尾"""
+        match = re.search(r' - (\d+) ', unquote(path))
+        return self._samples[bool(match) and int(match.group(1)) % 2 == 0]
+
+    def rss(self, season: str) -> str:
+        items = []
+        now = time.time()
+        for index in range(self.config.rss_items):
+            name = self._episode_name(self._series(index % max(self.config.folders, 1)),
+                                      index // max(self.config.folders, 1) + 1)
+            items.append(f'<item><title>{escape(name)}</title>'
+                         f'<link>https://resources.ani.rip/{season}/{quote(name)}?d=true</link>'
+                         f'<pubDate>{formatdate(now - index * 600, usegmt=True)}</pubDate></item>')
+        return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>ANi</title>'
+                + ''.join(items) + '</channel></rss>')
+
+    def feed(self) -> bytes:
+        """RSS订阅内容，首次请求时生成，之后每次返回相同内容"""
+        with self._random_lock:
+            if self._feed is None:
+                self._feed = self.rss('2024-10').encode('utf-8')
+            return self._feed
+
+    def _delay(self) -> Tuple[float, bool]:
+        with self._random_lock:
+            jitter = self._random.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+            failed = self._random.random() < self.config.error_rate
+        return max(self.config.latency_ms + jitter, 0) / 1000, failed
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes, content_type: str, error: bool = False,
+                       headers: dict = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                fake.stats.add(len(body), error)
+
+            def _send_mp4(self, sample: Mp4Sample):
+                match = _RANGE.match(self.headers.get('Range') or '') if fake.config.range_support else None
+                if not match or not (match.group(1) or match.group(2)):
+                    # 不支持或没有Range时返回完整文件，分块发送，客户端可随时断开
+                    self.send_response(200)
+                    self.send_header('Content-Type', VIDEO_MIME)
+                    self.send_header('Content-Length', str(sample.size))
+                    self.end_headers()
+                    sent = 0
+                    try:
+                        for start in range(0, sample.size, 1024 * 1024):
+                            chunk = sample.read(start, start + 1024 * 1024 - 1)
+                            self.wfile.write(chunk)
+                            sent += len(chunk)
+                    except (BrokenPipeError, ConnectionResetError):
+                        self.close_connection = True
+                    fake.stats.add(sent)
+                    return
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), sample.size - 1) if match.group(2) else sample.size - 1
+                else:
+                    # bytes=-N 为最后N个字节
+                    start, end = max(sample.size - int(match.group(2)), 0), sample.size - 1
+                if start >= sample.size or start > end:
+                    self._reply(416, b'', 'text/plain', error=True,
+                                headers={'Content-Range': f'bytes */{sample.size}'})
+                    return
+                self._reply(206, sample.read(start, end), VIDEO_MIME,
+                            headers={'Content-Range': f'bytes {start}-{end}/{sample.size}',
+                                     'Accept-Ranges': 'bytes'})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                delay, failed = fake._delay()
+                time.sleep(delay)
+                if failed:
+                    self._reply(500, b'{}', 'application/json', error=True)
+                    return
+                body = json.dumps({'files': fake.listing(urlsplit(self.path).path)}, ensure_ascii=False)
+                self._reply(200, body.encode('utf-8'), 'application/json')
+
+            def do_GET(self):
+                delay, _ = fake._delay()
+                time.sleep(delay)
+                path = urlsplit(self.path).path
+                if path.endswith('.mp4'):
+                    self._send_mp4(fake.sample(path))
+                    return
+                if not path.endswith('.xml'):
+                    self._reply(404, b'', 'text/plain', error=True)
+                    return
+                self._reply(200, fake.feed(), 'application/xml')
+
+        return Handler
+
+    def start(self, port: int = 0) -> 'FakeAni':
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def host(self) -> str:
+        return f'127.0.0.1:{self._server.server_address[1]}'
+
+    @property
+    def feed_url(self) -> str:
+        return f'http://{self.host}/ani-download.xml'
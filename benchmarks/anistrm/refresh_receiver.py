@@ -0,0 +1,84 @@
+"""
+本地模拟的媒体库刷新Webhook接收端，打印收到的每批刷新目标，用于测试媒体库刷新通知
+
+    python refresh_receiver.py --port 8080
+    插件中Webhook地址填写 http://MoviePilot可访问的地址:8080/refresh
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class RefreshReceiver:
+    """
+    接收端，start()后通过 url 访问，收到的请求保存在 batches 中
+    """
+
+    def __init__(self, status: int = 200, verbose: bool = False):
+        """
+        :param status: 返回的状态码，用于模拟接收端失败
+        :param verbose: 打印收到的内容
+        """
+        self.status = status
+        self.verbose = verbose
+        self.batches: List[dict] = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                if receiver.status < 400:
+                    with receiver._lock:
+                        receiver.batches.append(body)
+                    if receiver.verbose:
+                        print(f'{len(body.get("items", []))} 个文件，刷新目录：')
+                        for target in body.get('targets', []):
+                            print(f'  {target}')
+                self.send_response(receiver.status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        return Handler
+
+    def start(self, port: int = 0) -> 'RefreshReceiver':
+        self._server = ThreadingHTTPServer(('0.0.0.0', port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_address[1]}/refresh'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='媒体库刷新Webhook接收端')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--status', type=int, default=200, help='返回的状态码')
+    args = parser.parse_args()
+    receiver = RefreshReceiver(status=args.status, verbose=True).start(args.port)
+    print(f'监听 {receiver.url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        receiver.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,45 @@
+import hashlib
 import os
-import time
 import re
+import secrets
+import threading
+import time
 from datetime import datetime, timedelta
 
 import pytz
+from concurrent.futures import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from app.utils.http import RequestUtils
 from app.core.config import settings
+from app.core.event import eventmanager
 from app.plugins import _PluginBase
-from typing import Any, List, Dict, Tuple, Optional
+from typing import Any, Iterator, List, Dict, Tuple, Optional
 from app.log import logger
-import xml.dom.minidom
-from app.utils.dom import DomUtils
-from urllib.parse import quote
-from opencc import OpenCC
+from app.schemas.types import EventType
+from urllib.parse import quote, unquote, urlsplit
+
+from fastapi.responses import PlainTextResponse, RedirectResponse
+
+from .crawler import CrawlResult, SeasonCrawler, TokenBucket
+from .feed import FeedCache, iter_rss_items
+from .filters import SeriesFilter
+from .layout import FLAT, SERIES, migrate_flat, strm_path
+from .manifest import EpisodeManifest, FolderCache, MediaInfoCache
+from .mediainfo import SidecarWriter, probe_mp4
+from .metrics import MetricsHistory, RunMetrics
+from .mirrors import MirrorPool, ResponseError
+from .naming import parse_name, season_from_url
+from .reconcile import GC_OFF, GC_DRY_RUN, GC_QUARANTINE, GC_DELETE, apply_report, reconcile
+from .redirect import RedirectResolver, sign_path, verify_path
+from .refresh import REFRESH_OFF, REFRESH_EVENT, REFRESH_WEBHOOK, RefreshQueue, parse_path_map, refresh_payload
+from .normalize import CompactConverter, clean_filename, normalize_title, load_compact_table, save_compact_table
+from .schedule import SCHEDULE_CRON, SCHEDULE_ADAPTIVE, DROP_DAYS, WEEKDAYS, AdaptivePoller, ReleaseSchedule
+from .season import parse_seasons, season_of
+from .session import PooledSession
+from .storage import write_strm, CREATED, UPDATED, UNCHANGED, FAILED
+from .tracker import SeriesTracker, series_key
 
 
 def retry(ExceptionToCheck: Any,
@@ -61,7 +85,7 @@ class ANiStrm(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/CodeSmithDD/MoviePilot-Plugins/main/icons/anistrm.png"
     # 插件版本
-    plugin_version = "2.4.4"
+    plugin_version = "2.6.13"
     # 插件作者
     plugin_author = "CodeSmithDD"
     # 作者主页
@@ -81,17 +105,102 @@ class ANiStrm(_PluginBase):
     _fulladd = False
     _storageplace = None
     _custom_domain = None
+    _mirrors = None  # 备用镜像域名，逗号或换行分隔
+    _mirror_probe_minutes = 10  # 镜像延迟探测间隔（分钟）
+    _redirect = False  # strm文件指向插件跳转地址，播放时再解析上游地址
+    _redirect_base = None  # MoviePilot访问地址
+    _redirect_ttl = 30  # 跳转地址缓存有效期（分钟）
+    _play_secret = None  # 跳转地址签名密钥，插件内生成，strm中不包含MoviePilot的API密钥
+    _mediainfo = False  # 生成媒体信息NFO，媒体服务器无需远程探测
+    _mediainfo_concurrency = 2  # 同时获取媒体信息的文件数
+    _layout = FLAT  # strm存储目录结构
+    _gc_mode = GC_OFF  # 过期strm清理方式
+    _gc_timeout = 60  # 清理扫描最长时间（秒）
+    _include_series = None  # 只处理的番剧，每行一条
+    _exclude_series = None  # 不处理的番剧，每行一条
+    _refresh_mode = REFRESH_OFF  # 媒体库刷新通知方式
+    _refresh_webhook = None  # 刷新通知Webhook地址
+    _refresh_path_map = None  # 本地路径到媒体库路径的映射
+    _refresh_debounce = 60  # 刷新通知静默时间（秒）
+    _schedule_mode = SCHEDULE_CRON  # 增量更新方式
+    _poll_min_minutes = 5  # 自适应轮询最短间隔（分钟）
+    _poll_max_minutes = 120  # 自适应轮询最长间隔（分钟）
+    _continuing_days = 14  # 往季连载番剧跟踪天数，0为不跟踪
+    _continuing_interval_hours = 6.0  # 增量更新中往季连载爬取的最短间隔（小时），0为每次运行
     _convert_traditional = False
     _custom_season = None
     _get_custom_season = False  # 是否获取指定季度番剧（一次性操作）
-    _opencc = OpenCC('t2s')
+    _backfill = False  # 是否补全多个季度番剧，全部完成后自动关闭
+    _backfill_seasons = None  # 补全季度范围或列表
+    _season_concurrency = 2  # 同时补全的季度数
+    _crawl_concurrency = 4  # 季度目录爬取并发数
+    _crawl_rate = 2.0  # 季度目录爬取每秒请求数
+    _pool_size = 8  # HTTP连接池大小
+    _http_timeout = 20  # HTTP请求超时时间（秒）
+    _folder_cache_hours = 24.0  # 文件夹列表缓存有效期（小时），0为不缓存
+
+    # 索引协议及RSS订阅地址
+    _index_scheme = 'https'
+    _feed_url = 'https://api.ani.rip/ani-download.xml'
 
     # 定时器
     _scheduler: Optional[BackgroundScheduler] = None
+    # 共享HTTP会话
+    _http: Optional[PooledSession] = None
+    # 镜像池
+    _mirror_pool: Optional[MirrorPool] = None
+    # 播放跳转地址解析
+    _resolver: Optional[RedirectResolver] = None
+    # 媒体信息NFO生成
+    _sidecar: Optional[SidecarWriter] = None
+    # 番剧订阅过滤
+    _series_filter: Optional[SeriesFilter] = None
+    # 媒体库刷新队列
+    _refresh_queue: Optional[RefreshQueue] = None
+    # 番剧更新时间学习结果
+    _release_schedule: Optional[ReleaseSchedule] = None
+    # 自适应轮询
+    _poller: Optional[AdaptivePoller] = None
+    # 往季连载番剧跟踪
+    _tracker: Optional[SeriesTracker] = None
+    # 下次轮询时间及原因
+    _poll_plan: Optional[Dict[str, Any]] = None
+    # 剧集清单
+    _manifest: Optional[EpisodeManifest] = None
+    # 精简繁简转换表
+    _t2s_table: Optional[CompactConverter] = None
+    # RSS条件请求缓存
+    _feed_cache: Optional[FeedCache] = None
+    # RSS轮询统计：轮询次数、304次数、内容摘要命中次数、实际解析次数
+    _feed_stats: Optional[Dict[str, int]] = None
+    # RSS连续遇到多少个已处理条目后停止解析
+    _known_streak_stop = 3
+    # 上次写入失败的RSS条目标题，全部重新处理前不提前停止解析
+    _feed_retry: Optional[set] = None
+    # 目录结构迁移锁
+    _layout_lock = threading.Lock()
+    # 运行状态锁：同一时间只运行一个任务
+    _run_lock = threading.Lock()
+    # 运行中的任务类型，None为空闲，True为全量爬取（含多季度补全），False为增量更新
+    _running: Optional[bool] = None
+    # 运行期间合并的补跑任务类型，None为没有补跑
+    _pending: Optional[bool] = None
+    _pending_since = 0.0
+    # 运行统计：运行次数、合并次数、跳过次数、等待时间（秒）
+    _run_stats: Optional[Dict[str, Any]] = None
+    # 当前运行的分阶段指标
+    _metrics: Optional[RunMetrics] = None
+    # 最近运行的指标
+    _metrics_history: Optional[MetricsHistory] = None
+    # 退出事件
+    _event: Optional[threading.Event] = None
 
     def init_plugin(self, config: dict = None):
         # 停止现有任务
         self.stop_service()
+        # 可变状态按实例创建，重新加载插件或多个实例之间不共享
+        self._event = threading.Event()
+        self._metrics = RunMetrics('idle')
 
         if config:
             self._enabled = config.get("enabled")
@@ -100,31 +209,143 @@ class ANiStrm(_PluginBase):
             self._fulladd = config.get("fulladd")
             self._storageplace = config.get("storageplace")
             self._custom_domain = config.get("custom_domain") or "openani.an-i.workers.dev"
+            self._mirrors = config.get("mirrors")
+            self._mirror_probe_minutes = self.__to_number(config.get("mirror_probe_minutes"), 10, float)
+            self._redirect = config.get("redirect", False)
+            self._redirect_base = config.get("redirect_base")
+            self._redirect_ttl = self.__to_number(config.get("redirect_ttl"), 30, float)
+            self._mediainfo = config.get("mediainfo", False)
+            self._mediainfo_concurrency = self.__to_number(config.get("mediainfo_concurrency"), 2, int)
+            self._layout = SERIES if config.get("layout") == SERIES else FLAT
+            self._gc_mode = config.get("gc_mode") or GC_OFF
+            self._include_series = config.get("include_series")
+            self._exclude_series = config.get("exclude_series")
+            self._refresh_mode = config.get("refresh_mode") or REFRESH_OFF
+            self._refresh_webhook = config.get("refresh_webhook")
+            self._refresh_path_map = config.get("refresh_path_map")
+            self._refresh_debounce = self.__to_number(config.get("refresh_debounce"), 60, float, allow_zero=True)
+            self._schedule_mode = config.get("schedule_mode") or SCHEDULE_CRON
+            self._poll_min_minutes = self.__to_number(config.get("poll_min_minutes"), 5, float)
+            self._poll_max_minutes = self.__to_number(config.get("poll_max_minutes"), 120, float)
+            self._continuing_days = self.__to_number(config.get("continuing_days"), 14, float, allow_zero=True)
+            self._continuing_interval_hours = self.__to_number(config.get("continuing_interval_hours"), 6.0, float,
+                                                               allow_zero=True)
             self._convert_traditional = config.get("convert_traditional", False)
             self._custom_season = config.get("custom_season")
             self._get_custom_season = config.get("get_custom_season", False)
+            self._backfill = config.get("backfill", False)
+            self._backfill_seasons = config.get("backfill_seasons")
+            self._season_concurrency = self.__to_number(config.get("season_concurrency"), 2, int)
+            self._crawl_concurrency = self.__to_number(config.get("crawl_concurrency"), 4, int)
+            self._crawl_rate = self.__to_number(config.get("crawl_rate"), 2.0, float)
+            self._pool_size = self.__to_number(config.get("pool_size"), 8, int)
+            self._http_timeout = self.__to_number(config.get("http_timeout"), 20, float)
+            self._folder_cache_hours = self.__to_number(config.get("folder_cache_hours"), 24.0, float,
+                                                        allow_zero=True)
             # 加载模块
-        if self._enabled or self._onlyonce:
+        self._http = PooledSession(pool_size=max(self._pool_size, self._crawl_concurrency))
+        self._mirror_pool = MirrorPool(self.__mirror_domains(), probe=self.__probe_mirror)
+        self._resolver = RedirectResolver(fetch=self.__fetch_location, ttl=self._redirect_ttl * 60)
+        if self._redirect and not self._redirect_base:
+            logger.warn('未配置MoviePilot访问地址，strm文件仍使用上游地址')
+        self._play_secret = self.get_data('play_secret')
+        if not self._play_secret:
+            self._play_secret = secrets.token_hex(16)
+            self.save_data('play_secret', self._play_secret)
+        # 先加载精简转换表，订阅过滤整理别名时不加载完整OpenCC
+        if self._convert_traditional and not self._t2s_table:
+            self._t2s_table = load_compact_table(self.get_data_path() / 't2s_table.json')
+        self._series_filter = SeriesFilter(self._include_series, self._exclude_series, normalize=self._convert_title)
+        if self._refresh_mode == REFRESH_WEBHOOK and not self._refresh_webhook:
+            logger.warn('未配置Webhook地址，不发送媒体库刷新通知')
+        elif self._refresh_mode != REFRESH_OFF:
+            self._refresh_queue = RefreshQueue(send=self.__send_refresh,
+                                               debounce=self._refresh_debounce,
+                                               busy=lambda: self._running is not None,
+                                               pending=self.get_data('refresh_pending'),
+                                               persist=lambda pending: self.save_data('refresh_pending', pending))
+            # 上次未发送的变化
+            self._refresh_queue.schedule()
+        # 剧集清单先于更新时间、连载跟踪加载，首次使用时从清单中学习
+        try:
+            self._manifest = EpisodeManifest(self.get_data_path() / 'manifest.db')
+        except Exception as e:
+            logger.error(f'剧集清单加载失败，将不记录剧集状态：{str(e)}')
+            self._manifest = None
+        self._release_schedule = ReleaseSchedule(self.get_data('release_schedule'))
+        self._poll_plan = self.get_data('poll_state') or {}
+        if self._schedule_mode == SCHEDULE_ADAPTIVE:
+            if not self._release_schedule and self._manifest:
+                # 首次使用时从剧集清单中各集的首次出现时间学习
+                learned = self._release_schedule.observe_many(
+                    ((series, first_seen) for series, _, first_seen
+                     in self._manifest.first_seen_since(time.time() - DROP_DAYS * 86400)),
+                    pytz.timezone(settings.TZ))
+                self.save_data('release_schedule', self._release_schedule.state)
+                logger.info(f'从剧集清单学习了 {learned} 个更新时间样本')
+            self._poller = AdaptivePoller(self._release_schedule,
+                                          min_interval=self._poll_min_minutes * 60,
+                                          max_interval=self._poll_max_minutes * 60,
+                                          idle_polls=self._poll_plan.get('idle_polls', 0))
+        self._tracker = None
+        if self._continuing_days:
+            self._tracker = SeriesTracker(self.get_data('series_tracker'))
+            if not self._tracker and self._manifest:
+                # 首次使用时从剧集清单中最近出现新剧集的番剧开始跟踪
+                tracked = self._tracker.touch_many(
+                    self._manifest.first_seen_since(time.time() - self._continuing_days * 86400))
+                self.save_data('series_tracker', self._tracker.state)
+                logger.info(f'从剧集清单中 {tracked} 个最近的剧集开始跟踪连载番剧')
+        self._feed_cache = FeedCache(self.get_data('feed_cache'))
+        self._feed_retry = set(self.get_data('feed_retry') or [])
+        self._feed_stats = {'polls': 0, 'not_modified': 0, 'hash_hit': 0, 'fetched': 0}
+        self._feed_stats.update(self.get_data('feed_stats') or {})
+        self._run_stats = {'runs': 0, 'coalesced': 0, 'skipped': 0, 'lock_wait': 0.0}
+        self._run_stats.update(self.get_data('run_stats') or {})
+        self._metrics_history = MetricsHistory(self.get_data('run_metrics'))
+        if self._mediainfo:
+            self._sidecar = SidecarWriter(probe=self.__probe_mediainfo,
+                                          cache=MediaInfoCache(self._manifest) if self._manifest else None,
+                                          concurrency=self._mediainfo_concurrency)
+        if self._enabled or self._onlyonce or self._backfill:
             # 定时服务
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
 
-            if self._enabled and self._cron:
+            if self._enabled and self._poller:
+                self.__schedule_poll()
+            elif self._enabled and self._cron:
                 try:
                     self._scheduler.add_job(func=self.__task,
                                             trigger=CronTrigger.from_crontab(self._cron),
+                                            max_instances=1, coalesce=True, misfire_grace_time=60,
                                             name="ANiStrm文件创建")
                     logger.info(f'ANi-Strm定时任务创建成功：{self._cron}')
                 except Exception as err:
                     logger.error(f"定时任务配置错误：{str(err)}")
 
+            if self._enabled and len(self._mirror_pool.domains) > 1:
+                self._scheduler.add_job(func=self._mirror_pool.probe_all, trigger='interval',
+                                        minutes=self._mirror_probe_minutes,
+                                        max_instances=1, coalesce=True,
+                                        next_run_time=datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=1),
+                                        name="ANiStrm镜像探测")
+
             if self._onlyonce:
                 logger.info(f"ANi-Strm服务启动，立即运行一次")
                 self._scheduler.add_job(func=self.__task, args=[self._fulladd], trigger='date',
                                         run_date=datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=3),
+                                        misfire_grace_time=300,
                                         name="ANiStrm文件创建")
                 # 关闭一次性开关 全量转移
                 self._onlyonce = False
                 self._fulladd = False
+
+            if self._backfill and self._backfill_seasons:
+                logger.info(f"ANi-Strm多季度补全启动：{self._backfill_seasons}")
+                self._scheduler.add_job(func=self.__backfill, trigger='date',
+                                        run_date=datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=5),
+                                        misfire_grace_time=300,
+                                        name="ANiStrm多季度补全")
             self.__update_config()
 
             # 启动任务
@@ -132,59 +353,23 @@ class ANiStrm(_PluginBase):
                 self._scheduler.print_jobs()
                 self._scheduler.start()
 
-    def _clean_filename(self, filename: str):
-        # 定义常见全角符号到半角符号的映射，或直接移除
-        cleaned_filename = filename
-        fullwidth_to_halfwidth = {
-            '\uFF0D': '-',  # 全角破折号（－）替换为半角连字符（-）
-            '\uFF1A': ':',  # 全角冒号（：）替换为半角冒号（:）
-            '\uFF0C': ',',  # 全角逗号（，）替换为半角逗号（,）
-            '\uFF0E': '.',  # 全角句号（。）替换为半角句号（.）
-            '\uFF01': '!',  # 全角感叹号（！）替换为半角感叹号（!）
-            '\uFF1F': '?',  # 全角问号（？）替换为半角问号（?）
-            '\uFF08': '(',  # 全角左括号（（）替换为半角左括号（(）
-            '\uFF09': ')',  # 全角右括号（））替换为半角右括号（)）
-            '\uFF3B': '[',  # 全角左方括号（［）替换为半角左方括号（[）
-            '\uFF3D': ']',  # 全角右方括号（］）替换为半角右方括号（]）
-            '\u3000': ' ',  # 全角空格替换为半角空格
-            # 其他全角符号可以直接移除（例如全角顿号、引号等）
-            '\u3001': '',  # 全角顿号（、）
-            '\u3002': '.',  # 全角句号（。）
-            '\u201C': '"',  # 全角左双引号
-            '\u201D': '"',  # 全角右双引号
-            '\u2018': '\'',  # 全角左单引号
-            '\u2019': '\'',  # 全角右单引号
-        }
-
-        # 替换全角符号
-        for fullwidth, halfwidth in fullwidth_to_halfwidth.items():
-            cleaned_filename = cleaned_filename.replace(fullwidth, halfwidth)
-
-        # 去掉中文和中文之间的空格
-        cleaned_filename = re.sub(r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff])', r'\1\2', cleaned_filename)
-
-        # 去掉中文和英文之间的空格
-        cleaned_filename = re.sub(r'([\u4e00-\u9fff]+)\s+([a-zA-Z0-9]+)\s*([\u4e00-\u9fff]+)', r'\1\2\3',
-                                  cleaned_filename)
-        cleaned_filename = re.sub(r'([\u4e00-\u9fff]+)\s+([a-zA-Z0-9]+)', r'\1\2',
-                                  cleaned_filename)
-        #英文在前面不处理
-        #cleaned_filename = re.sub(r'([a-zA-Z0-9]+)\s+([\u4e00-\u9fff]+)', r'\1\2',cleaned_filename)
-        #数字在前面处理
-        cleaned_filename = re.sub(r'([0-9]+)\s+([\u4e00-\u9fff]+)', r'\1\2',
-                                  cleaned_filename)
-
-        # 将中文和中文之间的“-”替换为空格
-        cleaned_filename = re.sub(r'([\u4e00-\u9fff])\s*-([\u4e00-\u9fff])', r'\1 \2', cleaned_filename)
-        # 将中文和“-”替换为中文
-        cleaned_filename = re.sub(r'([\u4e00-\u9fff])(-)', r'\1', cleaned_filename)
+    @staticmethod
+    def __to_number(value: Any, default: Any, num_type: type = int, allow_zero: bool = False) -> Any:
+        """将配置项转换为正数，格式错误时使用默认值"""
+        try:
+            number = num_type(value)
+            return number if number > 0 or (allow_zero and number == 0) else default
+        except (TypeError, ValueError):
+            return default
 
-        return cleaned_filename
+    @staticmethod
+    def _clean_filename(filename: str) -> str:
+        return clean_filename(filename)
 
     def _convert_title(self, title: str) -> str:
-        new_title = self._clean_filename(title)
-        if self._convert_traditional:
-            return self._opencc.convert(new_title)
+        start = time.perf_counter()
+        new_title = normalize_title(title, bool(self._convert_traditional))
+        self._metrics.add_time('normalize', time.perf_counter() - start)
         return new_title
 
     def __validate_custom_season(self, season: str) -> bool:
@@ -220,62 +405,420 @@ class ANiStrm(_PluginBase):
                 self._date = f'{current_year}-{month}'
                 return f'{current_year}-{month}'
 
-    @retry(Exception, tries=3, logger=logger, ret=[])
+    def _request_utils(self, headers: Dict[str, str] = None) -> RequestUtils:
+        """使用插件共享连接池的请求工具"""
+        if self._http is None:
+            self._http = PooledSession(pool_size=self._pool_size)
+        if headers is not None:
+            return RequestUtils(headers=headers,
+                                proxies=settings.PROXY if settings.PROXY else None,
+                                session=self._http.session,
+                                timeout=self._http_timeout)
+        return RequestUtils(ua=settings.USER_AGENT if settings.USER_AGENT else None,
+                            proxies=settings.PROXY if settings.PROXY else None,
+                            session=self._http.session,
+                            timeout=self._http_timeout)
+
+    def __mirror_domains(self) -> List[str]:
+        """自定义域名及备用镜像，自定义域名排在第一位"""
+        mirrors = re.split(r'[,，;；\s]+', self._mirrors or '')
+        return [self._custom_domain or "openani.an-i.workers.dev"] + [mirror.strip().strip('/') for mirror in mirrors
+                                                                    if mirror.strip()]
+
+    def __probe_mirror(self, domain: str):
+        """请求镜像根目录，失败时抛出异常"""
+        rep = self._request_utils().post(url=f'{self._index_scheme}://{domain}/', json={})
+        if rep is None or rep.status_code != 200:
+            raise IOError(f'请求失败：{rep.status_code if rep is not None else "无响应"}')
+
+    def _list_folder(self, url: str) -> List[dict]:
+        """获取季度目录下某个文件夹的文件列表，按延迟依次尝试各镜像"""
+        start = time.perf_counter()
+        self._metrics.count('folder_requests')
+        try:
+            if self._mirror_pool:
+                return self._mirror_pool.call_url(url, self.__post_listing)
+            return self.__post_listing(url)
+        except Exception:
+            self._metrics.count('folder_errors')
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._metrics.add_time('folder_list', elapsed)
+            self._metrics.observe('folder_list', elapsed)
+
+    def __fetch_location(self, url: str) -> Tuple[int, Optional[str]]:
+        """请求上游地址但不跟随跳转，返回状态码及跳转地址"""
+        rep = self._request_utils().get_res(url, allow_redirects=False, stream=True)
+        if rep is None:
+            raise IOError('请求失败：无响应')
+        try:
+            return rep.status_code, rep.headers.get('Location')
+        finally:
+            rep.close()
+
+    def __post_listing(self, url: str) -> List[dict]:
+        rep = self._request_utils().post(url=url, json={})
+        if rep is None:
+            raise IOError('请求失败：无响应')
+        if rep.status_code != 200:
+            raise ResponseError(rep.status_code)
+        logger.debug(rep.text)
+        return rep.json()['files']
+
     def get_current_season_list(self) -> List:
-        def _get_files(url: str) -> List:
-            rep = RequestUtils(ua=settings.USER_AGENT if settings.USER_AGENT else None,
-                               proxies=settings.PROXY if settings.PROXY else None).post(url=url, json={})
-            logger.debug(rep.text)
-            files_json = rep.json()['files']
-
-            files = []
-            for file in files_json:
-                # 如果是文件夹，递归获取其中的文件
-                if file.get('mimeType') == 'application/vnd.google-apps.folder':
-                    folder_name = file['name']
-                    # 对文件夹名进行编码以处理特殊字符
-                    encoded_folder_name = quote(folder_name, safe='')
-                    folder_url = f'{url}{encoded_folder_name}/'
-                    logger.info(f'发现文件夹: {folder_name}, 递归获取其中文件: {folder_url}')
-                    time.sleep(1)
-                    files.extend(_get_files(folder_url))
-                # 如果是视频文件，添加到结果列表
-                elif file.get('mimeType') == 'video/mp4':
-                    file_name = file['name']
-                    convert_name = self._convert_title(file_name)
-                    files.append({
-                        'file_name': file_name,
-                        'convert_name': convert_name,
-                        'base_url': url
-                    })
-            return files
-
-        base_url = f'https://{self._custom_domain}/{self.__get_ani_season()}/'
-        return _get_files(base_url)
+        return list(self.iter_current_season())
+
+    def iter_current_season(self) -> Iterator[Dict[str, Any]]:
+        """
+        遍历当前季度目录，每获取到一个文件夹就立即产出其中的文件，无需等待整个目录树爬取完成
+        """
+        season = self.__get_ani_season()
+        # 上次未完成的文件夹（相对季度目录的路径），存在则从断点继续
+        checkpoint = self.get_data('crawl_checkpoint') or {}
+        folders = None
+        if checkpoint.get('season') == season and checkpoint.get('folders'):
+            folders = checkpoint['folders']
+            logger.info(f'{season} 上次爬取未完成，从断点继续获取 {len(folders)} 个文件夹')
+        result = CrawlResult()
+        try:
+            yield from self.__iter_season(season, folders=folders, result=result)
+        finally:
+            logger.info(f'{season} 请求 {result.folders} 个文件夹，{result.cached} 个文件夹未变化，使用缓存，'
+                        f'{result.filtered} 个文件夹被订阅过滤跳过')
+            self.__count_crawl(result)
+            if result.unfinished:
+                self.save_data('crawl_checkpoint', {
+                    'season': season,
+                    'folders': self.__relative_folders(season, result.unfinished)
+                })
+                logger.warn(f'{len(result.failed)} 个文件夹获取失败，{len(result.cancelled)} 个文件夹未获取，'
+                            f'已保存断点，下次全量创建时继续。请确保当前季度番剧文件夹存在或检查网络问题')
+            else:
+                self.del_data('crawl_checkpoint')
+
+    def __count_crawl(self, result: CrawlResult):
+        self._metrics.count('folders', result.folders)
+        self._metrics.count('folders_cached', result.cached)
+        self._metrics.count('folders_failed', len(result.failed))
+        self._metrics.count('filtered_folders', result.filtered)
+
+    def __season_url(self, season: str) -> str:
+        return f'{self._index_scheme}://{self._custom_domain}/{season}/'
+
+    def __relative_folders(self, season: str, urls: List[str]) -> List[str]:
+        """文件夹URL转为相对季度目录的路径，更换域名后断点仍然有效"""
+        base_url = self.__season_url(season)
+        return [url[len(base_url):] for url in urls]
+
+    def __iter_season(self, season: str, folders: List[str] = None, result: CrawlResult = None,
+                      bucket: TokenBucket = None, slots: threading.Semaphore = None) -> Iterator[Dict[str, Any]]:
+        """
+        遍历指定季度目录
+        :param folders: 起始文件夹（相对季度目录的路径），为空时从季度根目录开始
+        :param result: 记录失败、未完成的文件夹
+        :param bucket: 共享的令牌桶
+        :param slots: 共享的并发信号量
+        """
+        base_url = self.__season_url(season)
+        if folders:
+            # 断点中的文件夹同样按当前的订阅过滤
+            folders = [folder for folder in folders if self.__series_allowed(unquote(folder.split('/')[0]))]
+            if not folders:
+                return
+        root_urls = [f'{base_url}{folder}' for folder in folders] if folders else [base_url]
+        # 只过滤季度目录下的番剧文件夹，番剧文件夹内的子文件夹不过滤
+        folder_filter = (lambda parent, name: parent != base_url or self.__series_allowed(name)) \
+            if self._series_filter and self._series_filter.enabled else None
+        crawler = SeasonCrawler(list_folder=self._list_folder,
+                                concurrency=self._crawl_concurrency,
+                                rate=self._crawl_rate,
+                                stop_event=self._event,
+                                bucket=bucket,
+                                slots=slots,
+                                cache=self.__folder_cache(),
+                                folder_filter=folder_filter)
+        for item in crawler.iter_files(root_urls, result):
+            # 季度目录下直接存放的文件（如剧场版）按文件名过滤
+            if item['base_url'] == base_url and not self.__series_allowed(item['file']['name']):
+                self._metrics.count('filtered_items')
+                continue
+            yield {
+                'file_name': item['file']['name'],
+                'convert_name': self._convert_title(item['file']['name']),
+                'base_url': item['base_url'],
+                'season': season
+            }
+
+    def __series_allowed(self, name: str) -> bool:
+        """番剧是否通过订阅过滤，未配置过滤时全部通过"""
+        return self._series_filter is None or self._series_filter.allows(name)
+
+    def __track(self, season: str, file_name: str, status: str):
+        """
+        新创建的剧集说明番剧仍在更新，记录到连载跟踪
+        只用于RSS增量更新及往季连载爬取，全量创建、多季度补全一次性生成大量旧剧集，不代表番剧仍在更新
+        """
+        if self._tracker is not None and status == CREATED:
+            self._tracker.touch(season, file_name)
+
+    def __continuing_due(self) -> bool:
+        """增量更新中距上次往季连载爬取已超过间隔"""
+        if not self._continuing_interval_hours:
+            return True
+        last = self.get_data('continuing_last') or 0
+        return time.time() - last >= self._continuing_interval_hours * 3600
+
+    def __is_written(self, file_info: Dict[str, Any], written: set) -> bool:
+        """
+        剧集本次已由RSS写入，或剧集清单中已有记录且文件存在时不再写入，
+        RSS链接不含番剧文件夹，与爬取的链接不同，重复写入会把同一集更新两次
+        """
+        key = parse_name(file_info['file_name']).key
+        if key in written:
+            return True
+        record = self._manifest.get(key) if self._manifest else None
+        return bool(record) and record['strm_path'] == strm_path(self._storageplace, file_info['convert_name'],
+                                                                 self._layout) \
+            and os.path.exists(record['strm_path'])
+
+    def __iter_continuing(self) -> Iterator[Dict[str, Any]]:
+        """
+        只获取往季中仍在更新的番剧文件夹，多个季度共用一个爬取器并发获取，
+        每个季度只请求一次季度目录，番剧文件夹未变化时使用缓存
+        """
+        if self._tracker is None:
+            return
+        expired = self._tracker.expire(self._continuing_days)
+        if expired:
+            logger.info(f'{len(expired)} 部番剧超过 {self._continuing_days:g} 天没有新剧集，停止跟踪：'
+                        f'{"、".join(expired[:10])}{"等" if len(expired) > 10 else ""}')
+        seasons = self._tracker.continuing(season_of(datetime.now()))
+        if not seasons:
+            return
+        roots = {self.__season_url(season): season for season in seasons}
+
+        def _folder_filter(parent: str, name: str) -> bool:
+            # 只过滤季度目录下的番剧文件夹，番剧文件夹内的子文件夹不过滤
+            season = roots.get(parent)
+            return season is None or (series_key(name) in seasons[season] and self.__series_allowed(name))
+
+        crawler = SeasonCrawler(list_folder=self._list_folder,
+                                concurrency=self._crawl_concurrency,
+                                rate=self._crawl_rate,
+                                stop_event=self._event,
+                                cache=self.__folder_cache(),
+                                folder_filter=_folder_filter)
+        result = CrawlResult()
+        try:
+            for item in crawler.iter_files(list(roots), result):
+                # 季度目录下直接存放的文件不属于连载番剧
+                if item['base_url'] in roots:
+                    continue
+                yield {
+                    'file_name': item['file']['name'],
+                    'convert_name': self._convert_title(item['file']['name']),
+                    'base_url': item['base_url'],
+                    'season': next(season for url, season in roots.items() if item['base_url'].startswith(url))
+                }
+            # 全部文件夹获取成功才记录，失败时下次增量更新重试
+            if not result.failed and not self._event.is_set():
+                self.save_data('continuing_last', time.time())
+        finally:
+            self._metrics.count('continuing_folders', result.folders)
+            self._metrics.count('folders_cached', result.cached)
+            self._metrics.count('folders_failed', len(result.failed))
+            logger.info(f'往季连载番剧 {sum(len(keys) for keys in seasons.values())} 部（{"、".join(seasons)}），'
+                        f'请求 {result.folders} 个文件夹（含季度目录），{result.cached} 个文件夹未变化，使用缓存')
+
+    def __folder_cache(self) -> Optional[FolderCache]:
+        """文件夹列表缓存，未启用剧集清单或有效期为0时不缓存"""
+        if not self._manifest or not self._folder_cache_hours:
+            return None
+        return FolderCache(self._manifest, max_age=self._folder_cache_hours * 3600)
+
+    def __backfill(self):
+        """多季度补全入口：等待正在运行的任务结束后再开始"""
+        start_time = time.time()
+        while not self._event.is_set():
+            with self._run_lock:
+                if self._running is None:
+                    self._running = True
+                    self._run_stats['lock_wait'] += time.time() - start_time
+                    break
+            self._event.wait(1)
+        else:
+            return
+        self.__run_exclusive(self.__run_backfill)
+
+    def __run_backfill(self):
+        """
+        多季度补全：多个季度并发爬取，共用同一请求速率和并发上限，按季度记录进度，重启后从未完成的季度继续
+        """
+        try:
+            seasons = parse_seasons(self._backfill_seasons)
+        except ValueError as e:
+            logger.error(f'补全季度配置错误：{str(e)}')
+            return
+        self.__ensure_layout()
+        progress = self.get_data('backfill_progress') or {}
+        todo = [season for season in seasons if progress.get(season, {}).get('status') != 'done']
+        logger.info(f'多季度补全：共 {len(seasons)} 个季度，已完成 {len(seasons) - len(todo)} 个，'
+                    f'本次补全 {len(todo)} 个')
+        # 全局请求预算
+        bucket = TokenBucket(rate=self._crawl_rate, capacity=self._crawl_concurrency)
+        slots = threading.BoundedSemaphore(self._crawl_concurrency)
+        lock = threading.Lock()
+        totals = {'seasons': 0, 'folders': 0, 'files': 0}
+        start_time = time.time()
+
+        def _run(season: str):
+            state = progress.get(season) or {}
+            result = CrawlResult()
+            counts = {CREATED: 0, UPDATED: 0, UNCHANGED: 0, FAILED: 0}
+            try:
+                for file_info in self.__iter_season(season, folders=state.get('folders'), result=result,
+                                                    bucket=bucket, slots=slots):
+                    file_url = file_info['base_url'] + quote(file_info['file_name'], safe='')
+                    counts[self.__touch_strm_file(file_name=file_info['convert_name'], file_url=file_url,
+                                                  raw_name=file_info['file_name'], season=season)] += 1
+            except Exception as err:
+                logger.error(f'补全 {season} 出错：{str(err)}')
+                if not result.unfinished:
+                    result.failed.append(self.__season_url(season))
+            self.__count_crawl(result)
+            with lock:
+                progress[season] = {
+                    'status': 'partial' if result.unfinished else 'done',
+                    'folders': self.__relative_folders(season, result.unfinished),
+                    'files': state.get('files', 0) + sum(counts.values())
+                }
+                self.save_data('backfill_progress', progress)
+                totals['seasons'] += 0 if result.unfinished else 1
+                totals['folders'] += result.folders
+                totals['files'] += sum(counts.values())
+            logger.info(f'{season} 补全{"未完成" if result.unfinished else "完成"}：'
+                        f'请求 {result.folders} 个文件夹，缓存 {result.cached} 个文件夹，新创建 {counts[CREATED]} 个，更新 {counts[UPDATED]} 个，'
+                        f'未变化 {counts[UNCHANGED]} 个，失败 {counts[FAILED]} 个')
+
+        with ThreadPoolExecutor(max_workers=self._season_concurrency,
+                                thread_name_prefix='anistrm-backfill') as executor:
+            list(executor.map(_run, todo))
+        self.__wait_sidecar()
+
+        minutes = max(time.time() - start_time, 1) / 60
+        logger.info(f'多季度补全结束，用时 {minutes:.1f} 分钟：完成 {totals["seasons"]} 个季度、'
+                    f'{totals["folders"]} 个文件夹、{totals["files"]} 个文件，'
+                    f'每分钟 {totals["seasons"] / minutes:.2f} 个季度、{totals["folders"] / minutes:.1f} 个文件夹、'
+                    f'{totals["files"] / minutes:.1f} 个文件')
+        if all(progress.get(season, {}).get('status') == 'done' for season in seasons):
+            logger.info('全部季度补全完成，关闭多季度补全')
+            self._backfill = False
+            self.del_data('backfill_progress')
+            self.__update_config()
 
     @retry(Exception, tries=3, logger=logger, ret=[])
     def get_latest_list(self) -> List:
-        addr = 'https://api.ani.rip/ani-download.xml'
-        ret = RequestUtils(ua=settings.USER_AGENT if settings.USER_AGENT else None,
-                           proxies=settings.PROXY if settings.PROXY else None).get_res(addr)
-        ret_xml = ret.text
-        ret_array = []
-        # 解析XML
-        dom_tree = xml.dom.minidom.parseString(ret_xml)
-        rootNode = dom_tree.documentElement
-        items = rootNode.getElementsByTagName("item")
-        for item in items:
-            rss_info = {}
-            # 标题
-            title = DomUtils.tag_value(item, "title", default="")
-            # 链接
-            link = DomUtils.tag_value(item, "link", default="")
-            rss_info['title'] = self._convert_title(title)
-            rss_info['link'] = link.replace("resources.ani.rip", self._custom_domain)
-            ret_array.append(rss_info)
-        return ret_array
-
-    def __touch_strm_file(self, file_name, content_name: str = None, file_url: str = None) -> bool:
+        addr = self._feed_url
+        if self._feed_cache is None:
+            self._feed_cache = FeedCache()
+        headers = {'User-Agent': settings.USER_AGENT} if settings.USER_AGENT else {}
+        headers.update(self._feed_cache.request_headers())
+        with self._metrics.phase('feed_fetch'):
+            ret = self._request_utils(headers=headers).get_res(addr, stream=True)
+        self._feed_stats['polls'] = self._feed_stats.get('polls', 0) + 1
+        if self._feed_cache.not_modified(ret):
+            self._feed_stats['not_modified'] = self._feed_stats.get('not_modified', 0) + 1
+            logger.info('RSS订阅未更新（304），跳过处理')
+            return []
+        if ret.status_code != 200:
+            raise IOError(f'获取RSS订阅失败：{ret.status_code}')
+
+        # 边接收边计算摘要、解析条目，不缓存整个响应内容
+        digest = hashlib.sha256()
+
+        def _chunks():
+            for data in ret.iter_content(chunk_size=16 * 1024):
+                digest.update(data)
+                yield data
+
+        new_items = []
+        last_pub = None
+        known_streak = 0
+        retry = set(self._feed_retry)
+        chunks = _chunks()
+        try:
+            with self._metrics.phase('feed_parse'):
+                # 增量解析，连续遇到已处理的条目后停止解析
+                for item in iter_rss_items(chunks):
+                    if item['pub_date'] and (not last_pub or item['pub_date'] > last_pub):
+                        last_pub = item['pub_date']
+                    # 被订阅过滤排除的条目不写入，也不影响已处理条目的计数
+                    if not self.__series_allowed(item['title']):
+                        self._metrics.count('filtered_items')
+                        continue
+                    if item['title'] in retry:
+                        # 上次写入失败的条目，重新处理
+                        retry.discard(item['title'])
+                    elif self.__is_known_item(item):
+                        known_streak += 1
+                        # 上次写入失败的条目都重新处理后才提前停止
+                        if known_streak >= self._known_streak_stop and not retry:
+                            break
+                        continue
+                    known_streak = 0
+                    new_items.append(item)
+                # 提前停止后剩余内容只计算摘要，不再解析
+                for _ in chunks:
+                    pass
+        finally:
+            ret.close()
+        if self._feed_cache.update(ret, digest.hexdigest()):
+            # 订阅内容未变化，丢弃解析结果，不写文件
+            self._feed_stats['hash_hit'] = self._feed_stats.get('hash_hit', 0) + 1
+            logger.info('RSS订阅未更新（内容未变化），跳过处理')
+            return []
+        self._feed_stats['fetched'] = self._feed_stats.get('fetched', 0) + 1
+        # 剩余的失败条目已不在订阅中，不再等待
+        self._feed_retry -= retry
+        self._metrics.count('feed_items', len(new_items))
+        # 更新本次订阅中最新的发布时间，处理完成后提交
+        self._feed_cache.update(ret, digest.hexdigest(), last_pub=last_pub)
+        return [{
+            'file_name': item['title'],
+            'title': self._convert_title(item['title']),
+            'link': item['link'].replace("resources.ani.rip", self._custom_domain),
+            'season': season_from_url(item['link']),
+            'pub_date': item['pub_date']
+        } for item in new_items]
+
+    def __is_known_item(self, item: Dict[str, Any]) -> bool:
+        """RSS条目已在剧集清单中；未启用清单时，早于上次处理的最新条目视为已处理"""
+        if self._manifest and item['title']:
+            record = self._manifest.get(parse_name(item['title']).key)
+            return bool(record) and record['file_name'] == item['title']
+        last_pub = self._feed_cache.last_pub if self._feed_cache else None
+        return bool(item['pub_date'] and last_pub and item['pub_date'] < last_pub)
+
+    def __touch_strm_file(self, file_name, content_name: str = None, file_url: str = None,
+                          raw_name: str = None, season: str = None) -> str:
+        """
+        创建strm文件并记录耗时及结果
+        """
+        with self._metrics.phase('strm_write'):
+            status = self.__write_strm_file(file_name, content_name=content_name, file_url=file_url,
+                                            raw_name=raw_name, season=season)
+        self._metrics.count(f'strm_{status}')
+        return status
+
+    def __write_strm_file(self, file_name, content_name: str = None, file_url: str = None,
+                          raw_name: str = None, season: str = None) -> str:
+        """
+        创建strm文件，剧集清单中链接和路径均未变化且文件存在时直接跳过，内容未变化时不重写
+        :param raw_name: ANi原始文件名，用于生成剧集唯一标识
+        :param season: 所属季度
+        :return: CREATED / UPDATED / UNCHANGED / FAILED
+        """
         if not content_name:
             content_name = file_name
 
@@ -284,7 +827,7 @@ class ANiStrm(_PluginBase):
             # 季度API生成的URL，使用新格式
             encoded_content_name = quote(content_name, safe='')
             #
-            src_url = f'https://{self._custom_domain}/{self._date}/{encoded_content_name}'
+            src_url = f'{self._index_scheme}://{self._custom_domain}/{self._date}/{encoded_content_name}'
             logger.debug(f'季度API生成的SRL_URL: {src_url}')
         else:
             src_url = file_url
@@ -294,22 +837,67 @@ class ANiStrm(_PluginBase):
             # 格式不符合要求，进行转换
             src_url = self._convert_url_format(src_url)
 
-        logger.debug(f'创建 {file_name}.strm 文件，URL：{src_url}')
-        file_path = f'{self._storageplace}/{file_name}.strm'
-        # if os.path.exists(file_path):
-        #     logger.debug(f'{file_name}.strm 文件已存在')
-        #     return False
-        try:
-            with open(file_path, 'w') as file:
-                if os.path.exists(file_path):
-                    logger.debug(f'更新 {file_name}.strm 文件')
-                else:
-                    logger.debug(f'创建 {file_name}.strm 文件')
-                file.write(src_url)
-                return True
-        except Exception as e:
-            logger.error('创建strm源文件失败：' + str(e))
-            return False
+        file_path = strm_path(self._storageplace, file_name, self._layout)
+        strm_url = self.__strm_url(src_url)
+        episode = parse_name(raw_name or content_name)
+        if self._manifest and self._manifest.is_current(episode.key, src_url, file_path, strm_url) \
+                and os.path.exists(file_path):
+            return UNCHANGED
+        if self._layout != FLAT:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        status = write_strm(file_path, strm_url)
+        if status == CREATED:
+            logger.debug(f'创建 {file_name}.strm 文件，URL：{strm_url}')
+        elif status == UPDATED:
+            logger.debug(f'更新 {file_name}.strm 文件，URL：{strm_url}')
+        if status in (CREATED, UPDATED) and self._sidecar:
+            self._sidecar.submit(src_url, file_path)
+        if status in (CREATED, UPDATED) and self._refresh_queue:
+            self._refresh_queue.add(file_path, status)
+        if status != FAILED and self._manifest:
+            try:
+                self._manifest.upsert_many([{
+                    'key': episode.key,
+                    'series': episode.series,
+                    'episode': episode.episode,
+                    'season': season or season_from_url(src_url),
+                    'file_name': raw_name or content_name,
+                    'convert_name': file_name,
+                    'source_url': src_url,
+                    'strm_path': file_path,
+                    'strm_url': strm_url
+                }], written=status != UNCHANGED)
+            except Exception as e:
+                logger.error(f'更新剧集清单失败：{str(e)}')
+        return status
+
+    def __send_refresh(self, changes: Dict[str, str]):
+        """发送一批媒体库刷新通知，失败时抛出异常"""
+        payload = refresh_payload(changes, parse_path_map(self._refresh_path_map))
+        if self._refresh_mode == REFRESH_WEBHOOK:
+            ret = RequestUtils(content_type='application/json', timeout=self._http_timeout) \
+                .post(self._refresh_webhook, json={'source': self.__class__.__name__, **payload})
+            if ret is None or not ret.ok:
+                raise IOError(f'Webhook请求失败：{ret.status_code if ret is not None else "无响应"}')
+        else:
+            eventmanager.send_event(EventType.PluginTriggered, {
+                'plugin_id': self.__class__.__name__,
+                'event_name': 'library_refresh',
+                **payload
+            })
+        logger.info(f'已通知媒体库刷新 {len(payload["items"])} 个strm文件，涉及 {len(payload["targets"])} 个目录')
+
+    def __strm_url(self, src_url: str) -> str:
+        """
+        strm文件内容：启用跳转时为插件跳转地址，只包含上游路径，更换域名或镜像无需重写文件
+        跳转地址使用插件密钥对路径签名，只能用于该路径的播放跳转
+        """
+        if not self._redirect or not self._redirect_base:
+            return src_url
+        parts = urlsplit(src_url)
+        path = f'{parts.path}?{parts.query}' if parts.query else parts.path
+        return f'{self._redirect_base.rstrip("/")}/api/v1/plugin/{self.__class__.__name__}/play' \
+               f'?path={quote(path, safe="")}&sign={sign_path(self._play_secret, path)}'
 
     def _is_url_format_valid(self, url: str) -> bool:
         """检查URL格式是否符合要求（.mp4?d=true）"""
@@ -327,25 +915,242 @@ class ANiStrm(_PluginBase):
             # 其他情况，添加.mp4?d=true
             return f'{url}.mp4?d=true'
 
+    def __ensure_layout(self):
+        """切换为分目录结构后，首次运行时把平铺的strm文件一次性移动到番剧目录"""
+        with self._layout_lock:
+            applied = self.get_data('layout') or FLAT
+            if applied == self._layout:
+                return
+            if self._layout == FLAT:
+                logger.warn('已切换为平铺目录结构，已有番剧目录中的strm文件不会移回')
+            else:
+                start_time = time.time()
+                moved = migrate_flat(self._storageplace, self._layout)
+                if self._manifest:
+                    try:
+                        self._manifest.move_paths({source: target for source, target in moved.items()
+                                                   if source.endswith('.strm')})
+                    except Exception as e:
+                        logger.error(f'更新剧集清单路径失败：{str(e)}')
+                logger.info(f'strm目录结构迁移完成，移动 {len(moved)} 个文件，用时 {time.time() - start_time:.1f} 秒')
+            self.save_data('layout', self._layout)
+
     def __task(self, fulladd: bool = False):
-        cnt = 0
+        """
+        定时任务入口：同一时间只运行一个任务，运行期间的触发合并为结束后补跑一次，全量爬取期间跳过增量更新
+        """
+        with self._run_lock:
+            if self._running is not None:
+                if self._running and not fulladd:
+                    self._run_stats['skipped'] += 1
+                    logger.info('全量爬取进行中，跳过本次增量更新')
+                    return
+                if self._pending is None:
+                    self._pending_since = time.time()
+                self._pending = bool(self._pending) or fulladd
+                self._run_stats['coalesced'] += 1
+                logger.info(f'已有任务运行中，运行结束后补跑一次{"全量创建" if self._pending else "增量更新"}')
+                return
+            self._running = fulladd
+        self.__run_exclusive(self.__run_task, fulladd)
+
+    def __run_exclusive(self, func, *args):
+        """在已占用运行状态的情况下执行任务，结束后执行合并的补跑任务，最后释放运行状态"""
+        released = False
+        try:
+            while True:
+                self._metrics = RunMetrics('backfill' if func == self.__run_backfill
+                                           else 'full' if args and args[0] else 'incremental')
+                try:
+                    func(*args)
+                except Exception as e:
+                    logger.error(f'ANi-Strm任务运行出错：{str(e)}')
+                self.__save_metrics()
+                with self._run_lock:
+                    self._run_stats['runs'] += 1
+                    if self._pending is None or self._event.is_set():
+                        # 在决定退出的同一临界区内释放运行状态，之后到达的触发可以立即运行
+                        self._running = None
+                        self._pending = None
+                        released = True
+                        break
+                    fulladd, self._pending = self._pending, None
+                    self._running = fulladd
+                    self._run_stats['lock_wait'] += time.time() - self._pending_since
+                func, args = self.__run_task, (fulladd,)
+        finally:
+            if not released:
+                with self._run_lock:
+                    self._running = None
+                    self._pending = None
+            self.save_data('run_stats', self._run_stats)
+            # 运行结束（含NFO生成）后开始计时，静默期内没有新的运行再通知媒体库刷新
+            if self._refresh_queue:
+                self._refresh_queue.schedule()
+            logger.info(f'任务累计运行 {self._run_stats["runs"]} 次，合并触发 {self._run_stats["coalesced"]} 次，'
+                        f'跳过 {self._run_stats["skipped"]} 次，等待 {self._run_stats["lock_wait"]:.1f} 秒')
+
+    def __adaptive_task(self):
+        """自适应轮询入口：增量更新后按学习到的更新时间安排下一次"""
+        try:
+            self.__task(False)
+        finally:
+            self.__schedule_poll()
+
+    def __schedule_poll(self):
+        """安排下次自适应增量更新"""
+        if not self._scheduler or not self._poller or self._event.is_set():
+            return
+        run_date, reason = self._poller.next_poll(datetime.now(tz=pytz.timezone(settings.TZ)))
+        self._poll_plan = {
+            'next_poll': run_date.timestamp(),
+            'reason': reason,
+            'idle_polls': self._poller.idle_polls
+        }
+        self.save_data('poll_state', self._poll_plan)
+        self._scheduler.add_job(func=self.__adaptive_task, trigger='date', run_date=run_date,
+                                id='anistrm_adaptive', replace_existing=True, misfire_grace_time=300,
+                                name="ANiStrm文件创建")
+        logger.info(f'下次增量更新：{run_date:%m-%d %H:%M}，{reason}')
+
+    def __save_metrics(self):
+        """保存本次运行的指标到最近运行记录"""
+        self._metrics_history.append(self._metrics.to_dict())
+        self.save_data('run_metrics', self._metrics_history.records())
+
+    def __run_task(self, fulladd: bool = False):
+        self.__ensure_layout()
+        counts = {CREATED: 0, UPDATED: 0, UNCHANGED: 0, FAILED: 0}
+        http_stats = self._http.stats() if self._http else {}
+        # 本次已写入的剧集标识，往季连载爬取不再重复写入
+        written = set()
         # 增量添加更新
         if not fulladd:
             rss_info_list = self.get_latest_list()
             logger.info(f'本次处理 {len(rss_info_list)} 个文件')
+            now = time.time()
+            failed = set()
             for rss_info in rss_info_list:
-                if self.__touch_strm_file(file_name=rss_info['title'], file_url=rss_info['link']):
-                    cnt += 1
-        # 全量添加当季
+                status = self.__touch_strm_file(file_name=rss_info['title'], file_url=rss_info['link'],
+                                                raw_name=rss_info['file_name'], season=rss_info['season'])
+                counts[status] += 1
+                if status == FAILED:
+                    failed.add(rss_info['file_name'])
+                else:
+                    written.add(parse_name(rss_info['file_name']).key)
+                self.__track(rss_info['season'], rss_info['file_name'], status)
+                if status == CREATED:
+                    # 发布时间即首次出现时间，没有发布时间时以本次发现的时间代替
+                    self._release_schedule.observe(parse_name(rss_info['file_name']).series,
+                                                   min(rss_info['pub_date'] or now, now), pytz.timezone(settings.TZ))
+            self.save_data('release_schedule', self._release_schedule.state)
+            # 写入失败的条目下次即使遇到已处理条目也会继续解析到
+            self._feed_retry = (self._feed_retry - {rss_info['file_name'] for rss_info in rss_info_list}) | failed
+            self.save_data('feed_retry', sorted(self._feed_retry))
+            if self._poller:
+                self._poller.record(counts[CREATED])
+            # 全部处理成功后才记录订阅校验信息，失败的条目下次仍会重新获取
+            if not counts[FAILED] and self._feed_cache:
+                self._feed_cache.commit()
+                self.save_data('feed_cache', self._feed_cache.state)
+            self.save_data('feed_stats', self._feed_stats)
+            logger.info(f'RSS累计轮询 {self._feed_stats.get("polls", 0)} 次，'
+                        f'304 {self._feed_stats.get("not_modified", 0)} 次，'
+                        f'内容未变化 {self._feed_stats.get("hash_hit", 0)} 次')
+        # 全量添加当季，边爬取边写入
         else:
-            name_list = self.get_current_season_list()
-            logger.info(f'本次处理 {len(name_list)} 个文件')
-            for file_info in name_list:
+            for file_info in self.iter_current_season():
                 file_url = file_info['base_url'] + quote(file_info['file_name'], safe='')
-                if self.__touch_strm_file(file_name=file_info['convert_name'], file_url=file_url):
-                    logger.debug(f'创建 {file_info["convert_name"]}.strm 文件成功')
-                    cnt += 1
-        logger.info(f'新创建了 {cnt} 个strm文件')
+                status = self.__touch_strm_file(file_name=file_info['convert_name'], file_url=file_url,
+                                                raw_name=file_info['file_name'], season=file_info['season'])
+                counts[status] += 1
+            logger.info(f'本次处理 {sum(counts.values())} 个文件')
+        # 往季仍在更新的番剧，只获取其文件夹；增量更新时按间隔获取，不在每次轮询时都爬取
+        for file_info in self.__iter_continuing() if fulladd or self.__continuing_due() else ():
+            if self.__is_written(file_info, written):
+                counts[UNCHANGED] += 1
+                continue
+            file_url = file_info['base_url'] + quote(file_info['file_name'], safe='')
+            status = self.__touch_strm_file(file_name=file_info['convert_name'], file_url=file_url,
+                                            raw_name=file_info['file_name'], season=file_info['season'])
+            counts[status] += 1
+            self.__track(file_info['season'], file_info['file_name'], status)
+        if self._tracker is not None:
+            self.save_data('series_tracker', self._tracker.state)
+        logger.info(f'新创建了 {counts[CREATED]} 个strm文件，更新 {counts[UPDATED]} 个，'
+                    f'未变化 {counts[UNCHANGED]} 个，失败 {counts[FAILED]} 个')
+        filtered_folders = self._metrics.counter('filtered_folders')
+        filtered_items = self._metrics.counter('filtered_items')
+        if filtered_folders or filtered_items:
+            logger.info(f'订阅过滤跳过 {filtered_folders} 个番剧文件夹、{filtered_items} 个文件，'
+                        f'节省至少 {filtered_folders} 次文件夹请求、{filtered_items} 次strm写入')
+        if self._http:
+            run_stats = {k: v - http_stats.get(k, 0) for k, v in self._http.stats().items()}
+            logger.info(f'HTTP请求 {run_stats["requests"]} 次，新建连接 {run_stats["connections"]} 个，'
+                        f'复用连接 {run_stats["reused"]} 次')
+        self.__wait_sidecar()
+        # 本次全部成功且没有未完成的爬取时才清理，避免把暂时获取失败的剧集当作过期文件
+        if self._gc_mode != GC_OFF and not counts[FAILED] and not self.get_data('crawl_checkpoint'):
+            self.__reconcile(self._gc_mode)
+        self.__refresh_t2s_table()
+
+    def __reconcile(self, mode: str, limit: int = 200) -> Dict[str, Any]:
+        """
+        比对存储目录与剧集清单，按清理方式处理同一剧集的旧文件名及清单外的文件
+        :param limit: 报告中最多列出的文件数
+        """
+        if not self._manifest or not self._storageplace:
+            return {}
+        entries = self._manifest.strm_entries()
+        if not entries:
+            logger.warn('剧集清单为空，跳过过期strm清理')
+            return {}
+        try:
+            with self._metrics.phase('reconcile'):
+                report = reconcile(self._storageplace, entries, deadline=time.time() + self._gc_timeout,
+                                   convert_traditional=self._convert_traditional)
+        except TimeoutError as e:
+            logger.warn(f'过期strm清理已跳过：{str(e)}')
+            return {}
+        quarantine_dir = self.get_data_path() / 'quarantine' / datetime.now().strftime('%Y%m%d%H%M%S')
+        counts = apply_report(report, self._storageplace, mode, str(quarantine_dir))
+        summary = {
+            'time': time.time(),
+            'mode': mode,
+            'scanned': report['scanned'],
+            'expected': report['expected'],
+            'missing': report['missing'],
+            'elapsed': report['elapsed'],
+            **counts,
+            'duplicate_count': len(report['duplicates']),
+            'orphan_count': len(report['orphans']),
+            'duplicates': report['duplicates'][:limit],
+            'orphans': report['orphans'][:limit]
+        }
+        logger.info(f'过期strm检查：扫描 {report["scanned"]} 个文件，用时 {report["elapsed"]} 秒，'
+                    f'重复 {len(report["duplicates"])} 个，清单外 {len(report["orphans"])} 个，'
+                    f'缺失 {report["missing"]} 个，删除 {counts["deleted"]} 个，隔离 {counts["quarantined"]} 个')
+        self.save_data('gc_report', summary)
+        return summary
+
+    def __wait_sidecar(self):
+        """等待本次新建、更新的strm生成媒体信息NFO"""
+        if not self._sidecar:
+            return
+        with self._metrics.phase('mediainfo'):
+            counts = self._sidecar.wait()
+        if any(counts.values()):
+            logger.info(f'媒体信息NFO：获取 {counts["probed"]} 个，使用缓存 {counts["cached"]} 个，'
+                        f'已存在 {counts["skipped"]} 个，失败 {counts["failed"]} 个')
+
+    def __refresh_t2s_table(self):
+        """繁简转换表不存在或出现表外字符时，根据剧集清单重新生成"""
+        if not self._convert_traditional or not self._manifest:
+            return
+        if self._t2s_table and not self._t2s_table.misses:
+            return
+        self._t2s_table = save_compact_table(self.get_data_path() / 't2s_table.json',
+                                             self._manifest.file_names())
 
     def get_state(self) -> bool:
         return self._enabled
@@ -355,7 +1160,163 @@ class ANiStrm(_PluginBase):
         pass
 
     def get_api(self) -> List[Dict[str, Any]]:
-        pass
+        return [
+            {
+                "path": "/new_episodes",
+                "endpoint": self.api_new_episodes,
+                "methods": ["GET"],
+                "summary": "查询新增剧集",
+                "description": "查询指定时间（Unix时间戳，默认24小时内）之后首次出现的剧集",
+            },
+            {
+                "path": "/mirrors",
+                "endpoint": self.api_mirrors,
+                "methods": ["GET"],
+                "summary": "查询镜像状态",
+                "description": "查询各镜像当前延迟及熔断状态，按延迟排序",
+            },
+            {
+                "path": "/metrics",
+                "endpoint": self.api_metrics,
+                "methods": ["GET"],
+                "summary": "运行指标",
+                "description": "最近运行的分阶段耗时、文件夹请求延迟分位数及strm写入结果",
+            },
+            {
+                "path": "/reconcile",
+                "endpoint": self.api_reconcile,
+                "methods": ["GET"],
+                "summary": "过期strm检查",
+                "description": "比对存储目录与剧集清单，只生成报告，不处理文件",
+            },
+            {
+                "path": "/schedule",
+                "endpoint": self.api_schedule,
+                "methods": ["GET"],
+                "summary": "自适应轮询计划",
+                "description": "学习到的各番剧每周更新时间、下次增量更新时间及原因",
+            },
+            {
+                "path": "/play",
+                "endpoint": self.api_play,
+                "methods": ["GET"],
+                "summary": "播放跳转",
+                "description": "解析上游路径在当前最快镜像上的最终地址并跳转，结果缓存一段时间，按插件签名校验，不需要API密钥",
+                "allow_anonymous": True,
+            }
+        ]
+
+    def api_new_episodes(self, since: float = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        API：查询某个时间之后首次出现的剧集
+        """
+        if not self._manifest:
+            return []
+        if since is None:
+            since = time.time() - 24 * 3600
+        return self._manifest.new_since(since, limit=limit)
+
+    def api_mirrors(self) -> List[Dict[str, Any]]:
+        """
+        API：查询各镜像当前延迟及熔断状态
+        """
+        if not self._mirror_pool:
+            return []
+        return self._mirror_pool.status()
+
+    def api_metrics(self, limit: int = 50) -> Dict[str, Any]:
+        """
+        API：最近运行的指标
+        """
+        return {
+            'runs': self._metrics_history.records(limit) if self._metrics_history else [],
+            'current': self._metrics.to_dict() if self._running is not None else None,
+            'run_stats': self._run_stats,
+            'feed_stats': self._feed_stats
+        }
+
+    def api_reconcile(self, limit: int = 200) -> Dict[str, Any]:
+        """
+        API：过期strm检查报告（不处理文件）
+        """
+        return self.__reconcile(GC_DRY_RUN, limit=limit)
+
+    def api_schedule(self) -> Dict[str, Any]:
+        """
+        API：自适应轮询计划
+        """
+        now = datetime.now(tz=pytz.timezone(settings.TZ))
+        next_poll = self._poll_plan.get('next_poll')
+        return {
+            'mode': self._schedule_mode,
+            'next_poll': datetime.fromtimestamp(next_poll, now.tzinfo).isoformat() if next_poll else None,
+            'reason': self._poll_plan.get('reason'),
+            'idle_polls': self._poll_plan.get('idle_polls', 0),
+            'slots': [{
+                'series': slot['series'],
+                'weekday': f'周{WEEKDAYS[slot["weekday"]]}',
+                'time': slot['time'],
+                'samples': slot['samples']
+            } for slot in self._release_schedule.slots(now)] if self._release_schedule else []
+        }
+
+    def __resolve_upstream(self, path: str) -> str:
+        """上游路径在当前最快镜像上的最终地址，结果缓存一段时间"""
+
+        def _resolve() -> str:
+            if self._mirror_pool:
+                return self._mirror_pool.call(
+                    lambda domain: self._resolver.follow(f'{self._index_scheme}://{domain}{path}'))
+            return self._resolver.follow(f'{self._index_scheme}://{self._custom_domain}{path}')
+
+        if self._resolver is None:
+            self._resolver = RedirectResolver(fetch=self.__fetch_location, ttl=self._redirect_ttl * 60)
+        return self._resolver.resolve(path, _resolve)
+
+    def __probe_mediainfo(self, src_url: str) -> Dict[str, Any]:
+        """通过范围请求只读取MP4头部获取媒体信息"""
+        parts = urlsplit(src_url)
+        url = self.__resolve_upstream(f'{parts.path}?{parts.query}' if parts.query else parts.path)
+        return probe_mp4(lambda start, end: self.__read_range(url, start, end))
+
+    def __read_range(self, url: str, start: int, end: int) -> bytes:
+        """读取文件指定字节范围，上游不支持范围请求时只允许读取文件头"""
+        headers = {'User-Agent': settings.USER_AGENT} if settings.USER_AGENT else {}
+        headers['Range'] = f'bytes={start}-{end}'
+        rep = self._request_utils(headers=headers).get_res(url, stream=True)
+        if rep is None:
+            raise IOError('请求失败：无响应')
+        try:
+            if rep.status_code == 200 and start > 0:
+                raise ResponseError(rep.status_code, '上游不支持范围请求')
+            if rep.status_code not in (200, 206):
+                raise ResponseError(rep.status_code)
+            length = end - start + 1
+            data = bytearray()
+            for chunk in rep.iter_content(chunk_size=64 * 1024):
+                data += chunk
+                if len(data) >= length:
+                    break
+            return bytes(data[:length])
+        finally:
+            rep.close()
+
+    def api_play(self, path: str, sign: str = None):
+        """
+        API：跳转到上游最终播放地址，只接受插件密钥的路径签名
+        :param path: 上游路径，如 /2025-1/番剧/文件.mp4?d=true
+        :param sign: 路径签名
+        """
+        if not verify_path(self._play_secret, path or '', sign):
+            return PlainTextResponse('签名无效', status_code=403)
+        if not path or not path.startswith('/'):
+            return RedirectResponse(url=f'{self._index_scheme}://{self._custom_domain}/', status_code=302)
+        try:
+            url = self.__resolve_upstream(path)
+        except Exception as e:
+            logger.warn(f'解析播放地址失败，直接跳转到上游地址：{str(e)}')
+            url = f'{self._index_scheme}://{self._custom_domain}{path}'
+        return RedirectResponse(url=url, status_code=302)
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         """
@@ -474,6 +1435,66 @@ class ANiStrm(_PluginBase):
                             }
                         ]
                     },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSelect',
+                                        'props': {
+                                            'model': 'schedule_mode',
+                                            'label': '增量更新方式',
+                                            'items': [
+                                                {'title': '按执行周期', 'value': SCHEDULE_CRON},
+                                                {'title': '按更新时间自适应', 'value': SCHEDULE_ADAPTIVE}
+                                            ],
+                                            'hint': '自适应时学习各番剧每周的更新时间，更新前后密集轮询，其他时间逐渐放慢'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'poll_min_minutes',
+                                            'label': '自适应最短间隔（分钟）',
+                                            'placeholder': '5'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'poll_max_minutes',
+                                            'label': '自适应最长间隔（分钟）',
+                                            'placeholder': '120'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
                     {
                         'component': 'VRow',
                         'content': [
@@ -536,74 +1557,743 @@ class ANiStrm(_PluginBase):
                                 'component': 'VCol',
                                 'props': {
                                     'cols': 12,
+                                    'md': 4
                                 },
                                 'content': [
                                     {
-                                        'component': 'VAlert',
+                                        'component': 'VSwitch',
                                         'props': {
-                                            'type': 'info',
-                                            'variant': 'tonal',
-                                            'text': '自动从open ANi抓取下载直链生成strm文件，免去人工订阅下载' + '\n' +
-                                                    '配合目录监控使用，strm文件创建在/downloads/strm' + '\n' +
-                                                    '通过目录监控转移到link媒体库文件夹 如/downloads/link/strm  mp会完成刮削',
-                                            'style': 'white-space: pre-line;'
+                                            'model': 'backfill',
+                                            'label': '多季度补全',
+                                            'hint': '全部季度补全完成后自动关闭'
                                         }
-                                    },
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
                                     {
-                                        'component': 'VAlert',
+                                        'component': 'VTextField',
                                         'props': {
-                                            'type': 'info',
-                                            'variant': 'tonal',
-                                            'text': 'emby容器需要设置代理，docker的环境变量必须要有http_proxy代理变量，大小写敏感，具体见readme.' + '\n' +
-                                                    'https://github.com/honue/MoviePilot-Plugins',
-                                            'style': 'white-space: pre-line;'
+                                            'model': 'backfill_seasons',
+                                            'label': '补全季度',
+                                            'placeholder': '2019-1~2024-10 或 2023-1,2023-4',
+                                            'hint': '季度范围或列表，范围省略结束季度时补全到当前季度'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'season_concurrency',
+                                            'label': '同时补全季度数',
+                                            'placeholder': '2',
+                                            'hint': '所有季度共用并发数和每秒请求数限制'
                                         }
                                     }
                                 ]
                             }
                         ]
-                    }
-                ]
-            }
-        ], {
-            "enabled": False,
-            "onlyonce": False,
-            "fulladd": False,
-            "storageplace": '/downloads/strm',
-            "cron": "*/20 22,23,0,1 * * *",
-            "custom_domain": "openani.an-i.workers.dev",
-            "convert_traditional": False,
-        }
-
-    def __update_config(self):
-        self.update_config({
-            "onlyonce": self._onlyonce,
-            "cron": self._cron,
-            "enabled": self._enabled,
-            "fulladd": self._fulladd,
-            "storageplace": self._storageplace,
-            "custom_domain": self._custom_domain,
-            "convert_traditional": self._convert_traditional,
-        })
-
-    def get_page(self) -> List[dict]:
-        pass
-
-    def stop_service(self):
-        """
-        退出插件
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'crawl_concurrency',
+                                            'label': '季度爬取并发数',
+                                            'placeholder': '4',
+                                            'hint': '全量创建时同时获取的文件夹数'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'crawl_rate',
+                                            'label': '每秒请求数',
+                                            'placeholder': '2',
+                                            'hint': '全量创建时每秒最多请求的文件夹数'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'pool_size',
+                                            'label': '连接池大小',
+                                            'placeholder': '8',
+                                            'hint': '同一域名保持的最大连接数'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'http_timeout',
+                                            'label': '请求超时(秒)',
+                                            'placeholder': '20'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'folder_cache_hours',
+                                            'label': '文件夹缓存有效期(小时)',
+                                            'placeholder': '24',
+                                            'hint': '文件夹修改时间未变化时直接使用缓存的列表，0为不缓存'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'mirrors',
+                                            'label': '备用镜像域名',
+                                            'placeholder': 'mirror1.example.com,mirror2.example.com',
+                                            'hint': '爬取时优先使用延迟最低的可用镜像，请求失败时自动切换'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'mirror_probe_minutes',
+                                            'label': '镜像探测间隔(分钟)',
+                                            'placeholder': '10'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'redirect',
+                                            'label': 'strm使用插件跳转地址',
+                                            'hint': '播放时解析最快镜像的最终地址，更换域名无需重写strm'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'redirect_base',
+                                            'label': 'MoviePilot访问地址',
+                                            'placeholder': 'http://192.168.1.2:3000',
+                                            'hint': '媒体服务器能访问到的MoviePilot地址'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'redirect_ttl',
+                                            'label': '跳转地址缓存(分钟)',
+                                            'placeholder': '30'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'mediainfo',
+                                            'label': '生成媒体信息NFO',
+                                            'hint': '只读取MP4文件头获取时长、编码、分辨率，媒体服务器无需远程探测'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'mediainfo_concurrency',
+                                            'label': '媒体信息获取并发数',
+                                            'placeholder': '2'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSelect',
+                                        'props': {
+                                            'model': 'layout',
+                                            'label': 'strm目录结构',
+                                            'items': [
+                                                {'title': '平铺', 'value': FLAT},
+                                                {'title': '番剧名/Season N', 'value': SERIES}
+                                            ],
+                                            'hint': '切换为番剧目录后，下次运行时自动移动已有strm文件'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSelect',
+                                        'props': {
+                                            'model': 'gc_mode',
+                                            'label': '过期strm清理',
+                                            'items': [
+                                                {'title': '关闭', 'value': GC_OFF},
+                                                {'title': '只生成报告', 'value': GC_DRY_RUN},
+                                                {'title': '移动到隔离目录', 'value': GC_QUARANTINE},
+                                                {'title': '删除重复文件', 'value': GC_DELETE}
+                                            ],
+                                            'hint': '每次运行成功后清理同一剧集的旧文件名，清单外的文件只隔离不删除'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'continuing_days',
+                                            'label': '往季连载跟踪天数',
+                                            'placeholder': '14',
+                                            'hint': '每次运行只获取往季中仍在更新的番剧文件夹，超过该天数没有新剧集后停止，0为关闭'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'continuing_interval_hours',
+                                            'label': '往季连载爬取间隔（小时）',
+                                            'placeholder': '6',
+                                            'hint': '增量更新每隔该时间才获取往季连载番剧，全量更新时总是获取，0为每次运行都获取'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 6
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextarea',
+                                        'props': {
+                                            'model': 'include_series',
+                                            'label': '只处理的番剧',
+                                            'rows': 3,
+                                            'placeholder': '每行一部，别名用|分隔，re:开头为正则，如\n葬送的芙莉莲|Frieren\nre:^间谍过家家',
+                                            'hint': '为空时处理全部番剧，不在列表中的番剧文件夹不再请求'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 6
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextarea',
+                                        'props': {
+                                            'model': 'exclude_series',
+                                            'label': '不处理的番剧',
+                                            'rows': 3,
+                                            'placeholder': '格式同上',
+                                            'hint': '优先于只处理的番剧，季数不影响匹配'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSelect',
+                                        'props': {
+                                            'model': 'refresh_mode',
+                                            'label': '媒体库刷新通知',
+                                            'items': [
+                                                {'title': '关闭', 'value': REFRESH_OFF},
+                                                {'title': '插件事件', 'value': REFRESH_EVENT},
+                                                {'title': 'Webhook', 'value': REFRESH_WEBHOOK}
+                                            ],
+                                            'hint': '只通知新建、更新的strm文件及所在目录，无需扫描整个媒体库'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'refresh_debounce',
+                                            'label': '通知静默时间（秒）',
+                                            'placeholder': '60',
+                                            'hint': '最后一次运行结束后等待的时间，期间的多次运行合并通知'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 6
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'refresh_webhook',
+                                            'label': 'Webhook地址',
+                                            'placeholder': 'http://127.0.0.1:8080/refresh'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextarea',
+                                        'props': {
+                                            'model': 'refresh_path_map',
+                                            'label': '媒体库路径映射',
+                                            'rows': 2,
+                                            'placeholder': '每行 本地路径:媒体库路径，如\n/downloads/strm:/media/anime',
+                                            'hint': '媒体服务器看到的路径与strm存储路径不同时填写'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VAlert',
+                                        'props': {
+                                            'type': 'info',
+                                            'variant': 'tonal',
+                                            'text': '自动从open ANi抓取下载直链生成strm文件，免去人工订阅下载' + '\n' +
+                                                    '配合目录监控使用，strm文件创建在/downloads/strm' + '\n' +
+                                                    '通过目录监控转移到link媒体库文件夹 如/downloads/link/strm  mp会完成刮削',
+                                            'style': 'white-space: pre-line;'
+                                        }
+                                    },
+                                    {
+                                        'component': 'VAlert',
+                                        'props': {
+                                            'type': 'info',
+                                            'variant': 'tonal',
+                                            'text': 'emby容器需要设置代理，docker的环境变量必须要有http_proxy代理变量，大小写敏感，具体见readme.' + '\n' +
+                                                    'https://github.com/honue/MoviePilot-Plugins',
+                                            'style': 'white-space: pre-line;'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    }
+                ]
+            }
+        ], {
+            "enabled": False,
+            "onlyonce": False,
+            "fulladd": False,
+            "storageplace": '/downloads/strm',
+            "cron": "*/20 22,23,0,1 * * *",
+            "custom_domain": "openani.an-i.workers.dev",
+            "convert_traditional": False,
+            "backfill": False,
+            "backfill_seasons": "",
+            "season_concurrency": 2,
+            "crawl_concurrency": 4,
+            "crawl_rate": 2,
+            "pool_size": 8,
+            "http_timeout": 20,
+            "folder_cache_hours": 24,
+            "mirrors": "",
+            "mirror_probe_minutes": 10,
+            "redirect": False,
+            "redirect_base": "",
+            "redirect_ttl": 30,
+            "mediainfo": False,
+            "mediainfo_concurrency": 2,
+            "layout": FLAT,
+            "gc_mode": GC_OFF,
+            "include_series": "",
+            "exclude_series": "",
+            "refresh_mode": REFRESH_OFF,
+            "refresh_webhook": "",
+            "refresh_path_map": "",
+            "refresh_debounce": 60,
+            "schedule_mode": SCHEDULE_CRON,
+            "poll_min_minutes": 5,
+            "poll_max_minutes": 120,
+            "continuing_days": 14,
+            "continuing_interval_hours": 6,
+        }
+
+    def __update_config(self):
+        self.update_config({
+            "onlyonce": self._onlyonce,
+            "cron": self._cron,
+            "enabled": self._enabled,
+            "fulladd": self._fulladd,
+            "storageplace": self._storageplace,
+            "custom_domain": self._custom_domain,
+            "convert_traditional": self._convert_traditional,
+            "custom_season": self._custom_season,
+            "get_custom_season": self._get_custom_season,
+            "backfill": self._backfill,
+            "backfill_seasons": self._backfill_seasons,
+            "season_concurrency": self._season_concurrency,
+            "crawl_concurrency": self._crawl_concurrency,
+            "crawl_rate": self._crawl_rate,
+            "pool_size": self._pool_size,
+            "http_timeout": self._http_timeout,
+            "folder_cache_hours": self._folder_cache_hours,
+            "mirrors": self._mirrors,
+            "mirror_probe_minutes": self._mirror_probe_minutes,
+            "redirect": self._redirect,
+            "redirect_base": self._redirect_base,
+            "redirect_ttl": self._redirect_ttl,
+            "mediainfo": self._mediainfo,
+            "mediainfo_concurrency": self._mediainfo_concurrency,
+            "layout": self._layout,
+            "gc_mode": self._gc_mode,
+            "include_series": self._include_series,
+            "exclude_series": self._exclude_series,
+            "refresh_mode": self._refresh_mode,
+            "refresh_webhook": self._refresh_webhook,
+            "refresh_path_map": self._refresh_path_map,
+            "refresh_debounce": self._refresh_debounce,
+            "schedule_mode": self._schedule_mode,
+            "poll_min_minutes": self._poll_min_minutes,
+            "poll_max_minutes": self._poll_max_minutes,
+            "continuing_days": self._continuing_days,
+            "continuing_interval_hours": self._continuing_interval_hours,
+        })
+
+    @staticmethod
+    def __chart(title: str, chart_type: str, labels: List[str], series: List[dict], unit: str = '',
+                stacked: bool = False) -> dict:
+        return {
+            'component': 'VCol',
+            'props': {
+                'cols': 12,
+                'md': 6
+            },
+            'content': [
+                {
+                    'component': 'VApexChart',
+                    'props': {
+                        'height': 300,
+                        'options': {
+                            'chart': {
+                                'type': chart_type,
+                                'stacked': stacked,
+                                'toolbar': {'show': False}
+                            },
+                            'title': {'text': title},
+                            'xaxis': {'categories': labels},
+                            'yaxis': {'title': {'text': unit}},
+                            'dataLabels': {'enabled': False},
+                            'legend': {'position': 'bottom'}
+                        },
+                        'series': series
+                    }
+                }
+            ]
+        }
+
+    def get_page(self) -> List[dict]:
+        """
+        拼装插件详情页面：最近运行的分阶段耗时、文件夹请求延迟及strm写入趋势
+        """
+        records = self._metrics_history.records() if self._metrics_history else []
+        plan = []
+        if self._poller and self._poll_plan.get('next_poll'):
+            next_poll = datetime.fromtimestamp(self._poll_plan['next_poll'], pytz.timezone(settings.TZ))
+            plan.append({
+                'component': 'VAlert',
+                'props': {
+                    'type': 'info',
+                    'variant': 'tonal',
+                    'text': f'下次增量更新：{next_poll:%m-%d %H:%M}，{self._poll_plan.get("reason")}'
+                }
+            })
+        if not records:
+            return plan + [
+                {
+                    'component': 'div',
+                    'text': '暂无运行数据',
+                    'props': {
+                        'class': 'text-center',
+                    }
+                }
+            ]
+        kinds = {'full': '全量', 'incremental': '增量', 'backfill': '补全'}
+        labels = [f'{datetime.fromtimestamp(record["started"]).strftime("%m-%d %H:%M")} '
+                  f'{kinds.get(record["kind"], record["kind"])}' for record in records]
+        phases = {
+            'feed_fetch': 'RSS请求',
+            'feed_parse': 'RSS解析',
+            'folder_list': '文件夹请求（累计）',
+            'normalize': '标题整理',
+            'strm_write': 'strm写入',
+            'mediainfo': '媒体信息',
+            'reconcile': '过期清理'
+        }
+        writes = {
+            'strm_created': '新创建',
+            'strm_updated': '更新',
+            'strm_unchanged': '未变化',
+            'strm_failed': '失败'
+        }
+        counters = {
+            'folder_requests': '文件夹请求',
+            'folder_errors': '请求失败',
+            'folders_cached': '使用缓存',
+            'continuing_folders': '往季连载文件夹',
+            'filtered_folders': '过滤跳过文件夹',
+            'filtered_items': '过滤跳过文件',
+            'feed_items': 'RSS新条目'
+        }
+        latency = [record['latency_ms'].get('folder_list', {}) for record in records]
+        return plan + [
+            {
+                'component': 'VRow',
+                'content': [
+                    self.__chart('运行耗时', 'line', labels,
+                                 [{'name': '总耗时', 'data': [record['duration'] for record in records]}], '秒'),
+                    self.__chart('分阶段耗时', 'bar', labels,
+                                 [{'name': name, 'data': [record['phases'].get(key, 0) for record in records]}
+                                  for key, name in phases.items()], '秒', stacked=True),
+                    self.__chart('文件夹请求延迟', 'line', labels,
+                                 [{'name': pct, 'data': [item.get(pct) for item in latency]}
+                                  for pct in ('p50', 'p90', 'p99')], '毫秒'),
+                    self.__chart('请求计数', 'line', labels,
+                                 [{'name': name, 'data': [record['counters'].get(key, 0) for record in records]}
+                                  for key, name in counters.items()], '次'),
+                    self.__chart('strm写入', 'bar', labels,
+                                 [{'name': name, 'data': [record['counters'].get(key, 0) for record in records]}
+                                  for key, name in writes.items()], '个', stacked=True)
+                ]
+            }
+        ]
+
+    def stop_service(self):
+        """
+        退出插件
         """
         try:
+            if self._event:
+                self._event.set()
             if self._scheduler:
                 self._scheduler.remove_all_jobs()
                 if self._scheduler.running:
                     self._scheduler.shutdown()
                 self._scheduler = None
+            if self._sidecar:
+                self._sidecar.shutdown()
+                self._sidecar = None
+            if self._refresh_queue:
+                self._refresh_queue.stop()
+                self._refresh_queue = None
+            self._poller = None
+            if self._manifest:
+                self._manifest.close()
+                self._manifest = None
+            if self._http:
+                self._http.close()
+                self._http = None
         except Exception as e:
             logger.error("退出插件失败：%s" % str(e))
 
-
-if __name__ == "__main__":
-    anistrm = ANiStrm()
-    name_list = anistrm.get_latest_list()
-    print(name_list)
@@ -0,0 +1,212 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from app.log import logger
+
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+VIDEO_MIME = 'video/mp4'
+
+
+class TokenBucket:
+    """
+    令牌桶限速器，rate为每秒发放的令牌数，capacity为桶容量（允许的突发请求数）
+    """
+
+    def __init__(self, rate: float, capacity: int = None):
+        self._rate = max(float(rate), 0.01)
+        self._capacity = max(int(capacity or 1), 1)
+        self._tokens = float(self._capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一个令牌，令牌不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self._rate
+            time.sleep(wait_time)
+
+
+@dataclass
+class CrawlResult:
+    """
+    一次目录爬取的结果
+    """
+    # 视频文件 [{'file': index接口返回的文件信息, 'base_url': 所在文件夹URL}]
+    files: List[Dict[str, Any]] = field(default_factory=list)
+    # 重试后仍失败的文件夹URL
+    failed: List[str] = field(default_factory=list)
+    # 因任务停止未获取的文件夹URL
+    cancelled: List[str] = field(default_factory=list)
+    # 成功获取的文件夹数
+    folders: int = 0
+    # 元数据未变化、直接使用缓存的文件夹数
+    cached: int = 0
+    # 请求次数（含重试）
+    requests: int = 0
+    # 被订阅过滤跳过的文件夹数
+    filtered: int = 0
+
+    @property
+    def unfinished(self) -> List[str]:
+        """未完成的文件夹，用于断点续爬"""
+        return self.failed + self.cancelled
+
+
+def folder_signature(file: dict) -> Optional[str]:
+    """文件夹元数据签名（修改时间+大小），index接口未返回修改时间时为None"""
+    if not file.get('modifiedTime'):
+        return None
+    return f"{file.get('modifiedTime')}|{file.get('size') or ''}"
+
+
+class SeasonCrawler:
+    """
+    季度目录爬取器：使用线程池并发获取文件夹列表，令牌桶控制请求速率
+    """
+
+    def __init__(self, list_folder: Callable[[str], List[dict]],
+                 concurrency: int = 4, rate: float = 2.0,
+                 tries: int = 3, delay: float = 1.0, max_delay: float = 30.0,
+                 stop_event: threading.Event = None,
+                 bucket: TokenBucket = None, slots: threading.Semaphore = None,
+                 cache: Any = None, folder_filter: Callable[[str, str], bool] = None):
+        """
+        :param list_folder: 获取文件夹列表的方法，传入文件夹URL，返回index接口的files列表
+        :param concurrency: 最大并发请求数
+        :param rate: 每秒最多请求数
+        :param tries: 单个文件夹的最大尝试次数
+        :param delay: 首次重试的延迟时间，之后指数增长并加入随机抖动
+        :param max_delay: 最大延迟时间
+        :param stop_event: 停止信号，置位后不再发起新的请求
+        :param bucket: 共享的令牌桶，多个爬取器共用同一请求速率预算
+        :param slots: 共享的并发信号量，多个爬取器共用同一并发上限
+        :param cache: 文件夹列表缓存，提供 get(url, signature) 及 put(url, signature, files)，
+                      子文件夹元数据签名未变化时直接使用缓存的列表，不再请求
+        :param folder_filter: 文件夹过滤，传入上级文件夹URL及文件夹名，返回False时不获取该文件夹
+        """
+        self._list_folder = list_folder
+        self._concurrency = max(int(concurrency or 1), 1)
+        self._bucket = bucket or TokenBucket(rate=rate, capacity=self._concurrency)
+        self._slots = slots
+        self._cache = cache
+        self._folder_filter = folder_filter
+        self._tries = max(int(tries or 1), 1)
+        self._delay = delay
+        self._max_delay = max_delay
+        self._stop_event = stop_event or threading.Event()
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def _backoff(self, attempt: int) -> float:
+        """第attempt次失败后的等待时间：指数退避 + 随机抖动"""
+        return random.uniform(0, min(self._max_delay, self._delay * 2 ** attempt))
+
+    def _fetch(self, url: str) -> Optional[List[dict]]:
+        """获取单个文件夹列表，失败时按文件夹重试，最终失败返回None"""
+        for attempt in range(self._tries):
+            if self._stop_event.is_set():
+                return None
+            self._bucket.acquire()
+            with self._lock:
+                self._requests += 1
+            try:
+                if self._slots is None:
+                    return self._list_folder(url)
+                with self._slots:
+                    return self._list_folder(url)
+            except Exception as err:
+                if attempt + 1 >= self._tries:
+                    logger.warn(f'获取文件夹失败，已重试{self._tries}次：{url}，{str(err)}')
+                    break
+                wait_time = self._backoff(attempt)
+                logger.warn(f'获取文件夹失败：{url}，{str(err)}，{wait_time:.1f}秒后重试 ...')
+                self._stop_event.wait(wait_time)
+        return None
+
+    def iter_files(self, root_urls: List[str], result: CrawlResult = None) -> Iterator[Dict[str, Any]]:
+        """
+        从指定文件夹开始遍历目录树，每获取到一个文件夹就立即产出其中的视频文件，单个文件夹失败不影响其他文件夹
+        :param root_urls: 起始文件夹URL列表，断点续爬时为上次未完成的文件夹
+        :param result: 记录失败、未完成的文件夹及请求次数，遍历结束后填充
+        :return: {'file': index接口返回的文件信息, 'base_url': 所在文件夹URL}
+        """
+        if result is None:
+            result = CrawlResult()
+        executor = ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix='anistrm-crawl')
+        # 正在获取的文件夹 {future: (文件夹URL, 元数据签名)}
+        pending = {executor.submit(self._fetch, url): (url, None) for url in root_urls}
+        # 命中缓存、待处理的文件夹 (文件夹URL, 文件列表)
+        cached = deque()
+        try:
+            while pending or cached:
+                if cached:
+                    ready = [cached.popleft()]
+                else:
+                    ready = []
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url, signature = pending.pop(future)
+                        files = future.result()
+                        if files is None:
+                            if self._stop_event.is_set():
+                                result.cancelled.append(url)
+                            else:
+                                result.failed.append(url)
+                            continue
+                        result.folders += 1
+                        if self._cache is not None and signature:
+                            self._cache.put(url, signature, files)
+                        ready.append((url, files))
+                for url, files in ready:
+                    for file in files:
+                        # 如果是文件夹，元数据未变化时使用缓存，否则提交到线程池继续获取
+                        if file.get('mimeType') == FOLDER_MIME:
+                            folder_name = file['name']
+                            if self._folder_filter is not None and not self._folder_filter(url, folder_name):
+                                result.filtered += 1
+                                continue
+                            # 对文件夹名进行编码以处理特殊字符
+                            folder_url = f'{url}{quote(folder_name, safe="")}/'
+                            signature = folder_signature(file)
+                            listing = self._cache.get(folder_url, signature) \
+                                if self._cache is not None and signature else None
+                            if listing is not None:
+                                result.cached += 1
+                                cached.append((folder_url, listing))
+                                continue
+                            logger.info(f'发现文件夹: {folder_name}, 获取其中文件: {folder_url}')
+                            pending[executor.submit(self._fetch, folder_url)] = (folder_url, signature)
+                        # 如果是视频文件，直接产出
+                        elif file.get('mimeType') == VIDEO_MIME:
+                            yield {
+                                'file': file,
+                                'base_url': url
+                            }
+        finally:
+            # 调用方提前结束遍历时，未获取的文件夹记为未完成
+            result.cancelled.extend(url for url, _ in pending.values())
+            result.cancelled.extend(url for url, _ in cached)
+            executor.shutdown(wait=True, cancel_futures=True)
+            result.requests = self._requests
+
+    def crawl(self, root_urls: List[str]) -> CrawlResult:
+        """
+        遍历目录树并一次性返回全部视频文件
+        :param root_urls: 起始文件夹URL列表
+        """
+        result = CrawlResult()
+        result.files = list(self.iter_files(root_urls, result))
+        return result
@@ -0,0 +1,103 @@
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+from xml.etree.ElementTree import XMLPullParser
+
+
+def _pub_timestamp(value: Optional[str]) -> Optional[float]:
+    """RSS pubDate 转时间戳，格式错误时返回None"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value.strip()).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_rss_items(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    增量解析RSS，边接收边产出条目，已处理的item节点随即从树中移除，内存占用与订阅大小无关
+    :param chunks: 响应内容分块
+    :return: {'title': 标题, 'link': 链接, 'pub_date': 发布时间戳}
+    """
+    parser = XMLPullParser(events=('start', 'end'))
+    parents = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                parents.append(elem)
+                continue
+            parents.pop()
+            if elem.tag != 'item':
+                continue
+            yield {
+                'title': (elem.findtext('title') or '').strip(),
+                'link': (elem.findtext('link') or '').strip(),
+                'pub_date': _pub_timestamp(elem.findtext('pubDate'))
+            }
+            if parents:
+                parents[-1].remove(elem)
+    parser.close()
+
+
+class FeedCache:
+    """
+    RSS条件请求缓存：记录ETag/Last-Modified、内容摘要及已处理的最新发布时间
+    校验信息在本次订阅处理完成后才提交，避免处理失败时后续请求被跳过
+    """
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        self._state = dict(state or {})
+        self._pending: Optional[Dict[str, Any]] = None
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return dict(self._state)
+
+    @property
+    def last_pub(self) -> Optional[float]:
+        """上次处理完成的订阅中最新的发布时间"""
+        return self._state.get('last_pub')
+
+    def request_headers(self) -> Dict[str, str]:
+        """条件请求头"""
+        headers = {}
+        if self._state.get('etag'):
+            headers['If-None-Match'] = self._state['etag']
+        if self._state.get('last_modified'):
+            headers['If-Modified-Since'] = self._state['last_modified']
+        return headers
+
+    @staticmethod
+    def not_modified(response) -> bool:
+        """服务端返回304"""
+        return response.status_code == 304
+
+    def update(self, response, digest: str, last_pub: Optional[float] = None) -> bool:
+        """
+        记录本次订阅的校验信息
+        :param digest: 响应内容摘要
+        :param last_pub: 本次订阅中最新的发布时间
+        :return: 内容摘要与上次相同
+        """
+        if self.last_pub and (not last_pub or last_pub < self.last_pub):
+            last_pub = self.last_pub
+        self._pending = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'hash': digest,
+            'last_pub': last_pub
+        }
+        if digest == self._state.get('hash'):
+            # 内容未变化，直接提交校验信息
+            self.commit()
+            return True
+        return False
+
+    def commit(self) -> bool:
+        """订阅处理完成，提交校验信息"""
+        if not self._pending:
+            return False
+        self._state = self._pending
+        self._pending = None
+        return True
@@ -0,0 +1,90 @@
+import re
+from typing import Callable, Dict, Iterable, Optional, Pattern, Set, Tuple
+
+from app.log import logger
+
+from .layout import split_season
+from .naming import parse_name
+
+# 正则规则前缀
+REGEX_PREFIX = 're:'
+# 匹配结果缓存的最大番剧数
+MAX_CACHE = 4096
+
+_SPACES = re.compile(r'\s+')
+
+# 编译后的规则：番剧名集合及合并后的正则
+Rules = Tuple[Set[str], Optional[Pattern]]
+
+
+def _key(text: str) -> str:
+    return _SPACES.sub(' ', text).strip().casefold()
+
+
+class SeriesFilter:
+    """
+    番剧订阅过滤，包含、排除列表各编译为一个番剧名集合及一个合并的正则，每行一条规则：
+    - 番剧名，多个别名用 | 分隔，如 葬送的芙莉莲|葬送的芙莉蓮|Frieren
+    - re: 开头为正则表达式，在整理后的番剧名中搜索，不区分大小写
+    - # 开头为注释
+    番剧名与规则都经过标题整理（全半角、繁简转换）后比较，番剧名中的季数不影响匹配
+    """
+
+    def __init__(self, include: str = None, exclude: str = None, normalize: Callable[[str], str] = None):
+        """
+        :param include: 包含列表，为空时不限制
+        :param exclude: 排除列表，优先于包含列表
+        :param normalize: 标题整理方法，与生成strm文件名时一致
+        """
+        self._normalize = normalize or (lambda text: text)
+        self._include = self._compile(include)
+        self._exclude = self._compile(exclude)
+        self._cache: Dict[str, bool] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._include is not None or self._exclude is not None
+
+    def _compile(self, text: Optional[str]) -> Optional[Rules]:
+        names, patterns = set(), []
+        for line in (text or '').splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line[:len(REGEX_PREFIX)].lower() == REGEX_PREFIX:
+                pattern = line[len(REGEX_PREFIX):].strip()
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    logger.error(f'番剧过滤正则无效，已忽略：{pattern}，{str(e)}')
+                    continue
+                patterns.append(f'(?:{pattern})')
+            else:
+                names.update(_key(self._normalize(alias)) for alias in line.split('|') if alias.strip())
+        if not names and not patterns:
+            return None
+        return names, re.compile('|'.join(patterns), re.IGNORECASE) if patterns else None
+
+    @staticmethod
+    def _matches(rules: Rules, keys: Iterable[str]) -> bool:
+        names, pattern = rules
+        return any(key in names or (pattern is not None and pattern.search(key)) for key in keys)
+
+    def allows(self, name: str) -> bool:
+        """
+        文件或番剧文件夹是否需要处理
+        :param name: ANi文件名或番剧文件夹名（未整理）
+        """
+        if not self.enabled or not name:
+            return True
+        series = parse_name(name).series
+        allowed = self._cache.get(series)
+        if allowed is None:
+            normalized = self._normalize(series)
+            keys = {_key(normalized), _key(split_season(normalized)[0])}
+            allowed = (self._include is None or self._matches(self._include, keys)) \
+                and (self._exclude is None or not self._matches(self._exclude, keys))
+            if len(self._cache) >= MAX_CACHE:
+                self._cache.clear()
+            self._cache[series] = allowed
+        return allowed
@@ -0,0 +1,111 @@
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from app.log import logger
+
+from .mediainfo import nfo_path
+from .naming import parse_name
+
+# 存储目录结构
+FLAT = 'flat'  # 所有strm文件在同一目录
+SERIES = 'series'  # 番剧名/Season N/文件
+
+# 番剧名中的季数，如 第二季、第2季、Season 2、2nd Season
+_SEASON_SUFFIX = [
+    re.compile(r'\s*第\s*(?P<num>\d+|[零一二三四五六七八九十]+)\s*[季期]\s*'),
+    re.compile(r'\s*Season\s*(?P<num>\d+)\s*', re.IGNORECASE),
+    re.compile(r'\s*(?P<num>\d+)(?:st|nd|rd|th)\s+Season\s*', re.IGNORECASE),
+]
+_CN_DIGITS = {'零': 0, '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+# 去掉季数后残留的连字符，如 番剧 - 第二季
+_DANGLING_DASH = re.compile(r'^-\s+|\s+-$')
+# 目录名中不允许的字符
+_INVALID_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+def _season_number(text: str) -> Optional[int]:
+    if text.isdigit():
+        return int(text)
+    if text == '十':
+        return 10
+    tens, sep, ones = text.partition('十')
+    if sep:
+        return (_CN_DIGITS.get(tens, 1) if tens else 1) * 10 + (_CN_DIGITS.get(ones, 0) if ones else 0)
+    return _CN_DIGITS.get(text)
+
+
+def split_season(series: str) -> Tuple[str, int]:
+    """去掉番剧名中的季数，返回番剧名及季数，未标明季数时为第1季"""
+    for pattern in _SEASON_SUFFIX:
+        match = pattern.search(series)
+        if not match:
+            continue
+        number = _season_number(match.group('num'))
+        if not number:
+            continue
+        title = _DANGLING_DASH.sub('', ' '.join(f'{series[:match.start()]} {series[match.end():]}'.split()))
+        if title:
+            return title, number
+    return series, 1
+
+
+def _dir_name(name: str) -> str:
+    return _INVALID_CHARS.sub(' ', name).strip(' .') or '_'
+
+
+def relative_dir(file_name: str, layout: str = FLAT) -> str:
+    """strm文件相对存储目录的子目录，平铺结构时为空"""
+    if layout != SERIES:
+        return ''
+    episode = parse_name(file_name)
+    if episode.episode is None:
+        # 剧场版等没有集数的文件单独一个目录
+        return _dir_name(episode.series)
+    title, season = split_season(episode.series)
+    return os.path.join(_dir_name(title), f'Season {season}')
+
+
+def strm_path(storageplace: str, file_name: str, layout: str = FLAT) -> str:
+    """strm文件完整路径"""
+    sub_dir = relative_dir(file_name, layout)
+    if not sub_dir:
+        return f'{storageplace}/{file_name}.strm'
+    return f'{storageplace}/{sub_dir}/{file_name}.strm'
+
+
+def migrate_flat(storageplace: str, layout: str = SERIES) -> Dict[str, str]:
+    """
+    一次遍历存储目录，把平铺的strm文件及同名NFO移动到分目录结构中，已存在同名文件时跳过
+    :return: 原路径到新路径的映射
+    """
+    moved = {}
+    if layout != SERIES or not os.path.isdir(storageplace):
+        return moved
+    created_dirs = set()
+    with os.scandir(storageplace) as entries:
+        files = [entry.name for entry in entries if entry.is_file(follow_symlinks=False)]
+    names = set(files)
+    for name in files:
+        if not name.endswith('.strm') or name.startswith('.'):
+            continue
+        file_name = name[:-len('.strm')]
+        sub_dir = relative_dir(file_name, layout)
+        target_dir = os.path.join(storageplace, sub_dir)
+        if target_dir not in created_dirs:
+            os.makedirs(target_dir, exist_ok=True)
+            created_dirs.add(target_dir)
+        nfo = nfo_path(name)
+        for source_name in (name, nfo) if nfo in names else (name,):
+            source = f'{storageplace}/{source_name}'
+            target = f'{storageplace}/{sub_dir}/{source_name}'
+            if os.path.exists(target):
+                logger.warn(f'目标文件已存在，跳过移动：{target}')
+                continue
+            try:
+                os.replace(source, target)
+            except OSError as e:
+                logger.error(f'移动文件失败：{source}，{str(e)}')
+                continue
+            moved[source] = target
+    return moved
@@ -0,0 +1,236 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from app.log import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    key TEXT PRIMARY KEY,
+    series TEXT NOT NULL,
+    episode TEXT,
+    season TEXT,
+    file_name TEXT NOT NULL,
+    convert_name TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    strm_path TEXT,
+    strm_url TEXT,
+    first_seen REAL NOT NULL,
+    last_written REAL
+);
+CREATE INDEX IF NOT EXISTS idx_episodes_series_season ON episodes (series, season);
+CREATE INDEX IF NOT EXISTS idx_episodes_first_seen ON episodes (first_seen);
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    listing TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mediainfo (
+    path TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+class EpisodeManifest:
+    """
+    剧集清单：记录已生成strm的剧集，以剧集唯一标识为主键，跨运行保存
+    """
+
+    def __init__(self, db_path: Path):
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+            # 旧版清单没有strm_url列
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(episodes)')}
+            if 'strm_url' not in columns:
+                self._conn.execute('ALTER TABLE episodes ADD COLUMN strm_url TEXT')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error as e:
+                logger.error(f'关闭剧集清单失败：{str(e)}')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM episodes WHERE key = ?', (key,)).fetchone()
+        return dict(row) if row else None
+
+    def is_current(self, key: str, source_url: str, strm_path: str, strm_url: str = None) -> bool:
+        """清单中的记录与本次结果一致（链接、strm路径、strm内容均未变化）"""
+        with self._lock:
+            row = self._conn.execute('SELECT source_url, strm_path, strm_url FROM episodes WHERE key = ?',
+                                     (key,)).fetchone()
+        return bool(row) and row['source_url'] == source_url and row['strm_path'] == strm_path \
+            and (row['strm_url'] or row['source_url']) == (strm_url or source_url)
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]], written: bool = True):
+        """
+        批量写入记录，首次出现时间保持不变
+        :param records: 包含 key/series/episode/season/file_name/convert_name/source_url/strm_path 的字典，
+                        strm_url 为strm文件内容，与 source_url 不同时才需要
+        :param written: 是否更新最后写入时间
+        """
+        now = time.time()
+        rows = [(r['key'], r['series'], r.get('episode'), r.get('season'), r['file_name'],
+                 r['convert_name'], r['source_url'], r.get('strm_path'), r.get('strm_url'), now,
+                 now if written else None) for r in records]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO episodes (key, series, episode, season, file_name, convert_name,
+                                      source_url, strm_path, strm_url, first_seen, last_written)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    series = excluded.series,
+                    episode = excluded.episode,
+                    season = COALESCE(excluded.season, episodes.season),
+                    file_name = excluded.file_name,
+                    convert_name = excluded.convert_name,
+                    source_url = excluded.source_url,
+                    strm_path = excluded.strm_path,
+                    strm_url = excluded.strm_url,
+                    last_written = COALESCE(excluded.last_written, episodes.last_written)
+            """, rows)
+            self._conn.commit()
+
+    def get_folder(self, path: str, signature: str, max_age: float) -> Optional[List[dict]]:
+        """获取缓存的文件夹列表，签名不一致或超过有效期时返回None"""
+        with self._lock:
+            row = self._conn.execute('SELECT signature, listing, updated FROM folders WHERE path = ?',
+                                     (path,)).fetchone()
+        if not row or row['signature'] != signature or time.time() - row['updated'] > max_age:
+            return None
+        return json.loads(row['listing'])
+
+    def put_folder(self, path: str, signature: str, files: List[dict]):
+        """缓存文件夹列表，只保留遍历需要的字段"""
+        listing = [{key: file.get(key) for key in ('name', 'mimeType', 'modifiedTime', 'size')}
+                   for file in files]
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO folders (path, signature, listing, updated) '
+                               'VALUES (?, ?, ?, ?)',
+                               (path, signature, json.dumps(listing, ensure_ascii=False), time.time()))
+            self._conn.commit()
+
+    def move_paths(self, moved: Dict[str, str]):
+        """批量更新移动后的strm路径"""
+        if not moved:
+            return
+        with self._lock:
+            self._conn.executemany('UPDATE episodes SET strm_path = ? WHERE strm_path = ?',
+                                   [(target, source) for source, target in moved.items()])
+            self._conn.commit()
+
+    def get_mediainfo(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT info FROM mediainfo WHERE path = ?', (path,)).fetchone()
+        return json.loads(row['info']) if row else None
+
+    def put_mediainfo(self, path: str, info: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO mediainfo (path, info, updated) VALUES (?, ?, ?)',
+                               (path, json.dumps(info, ensure_ascii=False), time.time()))
+            self._conn.commit()
+
+    def strm_entries(self) -> List[tuple]:
+        """全部剧集的原始文件名及strm路径"""
+        with self._lock:
+            rows = self._conn.execute('SELECT file_name, strm_path FROM episodes').fetchall()
+        return [(row['file_name'], row['strm_path']) for row in rows]
+
+    def file_names(self) -> List[str]:
+        """全部剧集的原始文件名"""
+        with self._lock:
+            rows = self._conn.execute('SELECT file_name FROM episodes').fetchall()
+        return [row['file_name'] for row in rows]
+
+    def new_since(self, timestamp: float, limit: int = 500) -> List[Dict[str, Any]]:
+        """查询某个时间之后首次出现的剧集，走first_seen索引"""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM episodes WHERE first_seen > ? '
+                                      'ORDER BY first_seen DESC LIMIT ?', (timestamp, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def first_seen_since(self, timestamp: float) -> List[tuple]:
+        """某个时间之后首次出现的剧集 [(番剧名, 季度, 首次出现时间)]，走first_seen索引"""
+        with self._lock:
+            rows = self._conn.execute('SELECT series, season, first_seen FROM episodes WHERE first_seen > ?',
+                                      (timestamp,)).fetchall()
+        return [(row['series'], row['season'], row['first_seen']) for row in rows]
+
+    def series_episodes(self, series: str, season: str = None) -> List[Dict[str, Any]]:
+        """查询某部番剧的剧集，走series/season索引"""
+        with self._lock:
+            if season:
+                rows = self._conn.execute('SELECT * FROM episodes WHERE series = ? AND season = ?',
+                                          (series, season)).fetchall()
+            else:
+                rows = self._conn.execute('SELECT * FROM episodes WHERE series = ?', (series,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+class FolderCache:
+    """
+    季度目录文件夹列表缓存，以去掉域名的路径为键，更换域名后仍然有效
+    """
+
+    def __init__(self, manifest: EpisodeManifest, max_age: float):
+        """
+        :param max_age: 缓存有效期（秒），超过后即使元数据未变化也重新获取
+        """
+        self._manifest = manifest
+        self._max_age = max_age
+
+    @staticmethod
+    def _path(url: str) -> str:
+        return urlsplit(url).path
+
+    def get(self, url: str, signature: str) -> Optional[List[dict]]:
+        try:
+            return self._manifest.get_folder(self._path(url), signature, self._max_age)
+        except Exception as e:
+            logger.error(f'读取文件夹缓存失败：{str(e)}')
+            return None
+
+    def put(self, url: str, signature: str, files: List[dict]):
+        try:
+            self._manifest.put_folder(self._path(url), signature, files)
+        except Exception as e:
+            logger.error(f'写入文件夹缓存失败：{str(e)}')
+
+
+class MediaInfoCache:
+    """
+    媒体信息缓存，以去掉域名的路径为键，同一文件只获取一次
+    """
+
+    def __init__(self, manifest: EpisodeManifest):
+        self._manifest = manifest
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._manifest.get_mediainfo(urlsplit(url).path)
+        except Exception as e:
+            logger.error(f'读取媒体信息缓存失败：{str(e)}')
+            return None
+
+    def put(self, url: str, info: Dict[str, Any]):
+        try:
+            self._manifest.put_mediainfo(urlsplit(url).path, info)
+        except Exception as e:
+            logger.error(f'写入媒体信息缓存失败：{str(e)}')
@@ -0,0 +1,241 @@
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from app.log import logger
+
+from .storage import write_strm, FAILED
+
+# 首次读取的文件头大小，faststart的文件moov通常就在其中
+HEAD_SIZE = 64 * 1024
+# moov最大读取大小
+MAX_MOOV_SIZE = 16 * 1024 * 1024
+# 最多检查的顶层box数
+MAX_TOP_BOXES = 32
+
+_CODECS = {
+    'avc1': 'h264', 'avc3': 'h264', 'hev1': 'hevc', 'hvc1': 'hevc', 'av01': 'av1', 'vp09': 'vp9',
+    'mp4a': 'aac', 'ac-3': 'ac3', 'ec-3': 'eac3', 'Opus': 'opus', 'fLaC': 'flac'
+}
+
+# 读取文件指定字节范围（含首尾），返回实际读取到的内容
+ReadRange = Callable[[int, int], bytes]
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: int = None) -> Iterator[Tuple[str, int, int]]:
+    """遍历box，返回类型、内容起始位置、结束位置"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield box_type.decode('latin-1'), offset + header, offset + size
+        offset += size
+
+
+def _child(data: bytes, start: int, end: int, *names: str) -> Optional[Tuple[int, int]]:
+    """按路径查找子box，返回内容起始、结束位置"""
+    for name in names:
+        for box_type, box_start, box_end in _iter_boxes(data, start, end):
+            if box_type == name:
+                start, end = box_start, box_end
+                break
+        else:
+            return None
+    return start, end
+
+
+def _language(code: int) -> str:
+    """ISO-639-2/T语言代码，每个字母5位"""
+    if not code:
+        return 'und'
+    return ''.join(chr(((code >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0))
+
+
+def _duration(data: bytes, start: int) -> Tuple[Optional[float], Optional[int]]:
+    """解析mvhd/mdhd，返回时长（秒）及mdhd中的语言代码"""
+    version = data[start]
+    if version == 1:
+        timescale, duration = struct.unpack_from('>IQ', data, start + 20)
+        language_offset = start + 32
+    else:
+        timescale, duration = struct.unpack_from('>II', data, start + 12)
+        language_offset = start + 20
+    language = struct.unpack_from('>H', data, language_offset)[0] if language_offset + 2 <= len(data) else None
+    return (duration / timescale if timescale else None), language
+
+
+def _parse_trak(data: bytes, start: int, end: int) -> Optional[Dict[str, Any]]:
+    mdia = _child(data, start, end, 'mdia')
+    if not mdia:
+        return None
+    hdlr = _child(data, *mdia, 'hdlr')
+    mdhd = _child(data, *mdia, 'mdhd')
+    stsd = _child(data, *mdia, 'minf', 'stbl', 'stsd')
+    if not hdlr or not stsd:
+        return None
+    handler = data[hdlr[0] + 8:hdlr[0] + 12].decode('latin-1')
+    duration, language = _duration(data, mdhd[0]) if mdhd else (None, None)
+    # stsd: version/flags(4) + entry_count(4) + 第一个sample entry
+    entry = stsd[0] + 8
+    if entry + 8 > stsd[1]:
+        return None
+    entry_type = data[entry + 4:entry + 8].decode('latin-1')
+    track = {'codec': _CODECS.get(entry_type, entry_type.strip().lower()), 'duration': duration}
+    if handler == 'vide' and entry + 36 <= stsd[1]:
+        track['type'] = 'video'
+        track['width'], track['height'] = struct.unpack_from('>HH', data, entry + 32)
+    elif handler == 'soun' and entry + 36 <= stsd[1]:
+        track['type'] = 'audio'
+        track['channels'] = struct.unpack_from('>H', data, entry + 24)[0]
+        track['sample_rate'] = struct.unpack_from('>I', data, entry + 32)[0] >> 16
+        track['language'] = _language(language)
+    else:
+        return None
+    return track
+
+
+def parse_moov(moov: bytes) -> Dict[str, Any]:
+    """解析moov，返回时长及音视频轨道信息"""
+    info = {'duration': None, 'video': [], 'audio': []}
+    box = _child(moov, 0, len(moov), 'moov')
+    if not box:
+        raise ValueError('moov格式错误')
+    for box_type, start, end in _iter_boxes(moov, *box):
+        if box_type == 'mvhd':
+            info['duration'] = _duration(moov, start)[0]
+        elif box_type == 'trak':
+            track = _parse_trak(moov, start, end)
+            if track:
+                info[track.pop('type')].append(track)
+    return info
+
+
+def read_moov(read_range: ReadRange) -> bytes:
+    """
+    通过范围请求读取moov：先读取文件头，moov不在文件头中时按顶层box大小跳过mdat继续查找
+    """
+    head = read_range(0, HEAD_SIZE - 1)
+    if head[4:8] != b'ftyp':
+        raise ValueError('不是MP4文件')
+    offset = 0
+    for _ in range(MAX_TOP_BOXES):
+        header = head[offset:offset + 16] if offset + 16 <= len(head) else read_range(offset, offset + 15)
+        if len(header) < 8:
+            break
+        size, box_type = struct.unpack_from('>I4s', header)
+        if size == 1 and len(header) >= 16:
+            size = struct.unpack_from('>Q', header, 8)[0]
+        if box_type == b'moov':
+            if size < 8 or size > MAX_MOOV_SIZE:
+                raise ValueError(f'moov大小异常：{size}')
+            if offset + size <= len(head):
+                return head[offset:offset + size]
+            return read_range(offset, offset + size - 1)
+        if size < 8:
+            break
+        offset += size
+    raise ValueError('未找到moov')
+
+
+def probe_mp4(read_range: ReadRange) -> Dict[str, Any]:
+    """只读取文件头部box获取MP4媒体信息"""
+    return parse_moov(read_moov(read_range))
+
+
+def nfo_path(strm_path: str) -> str:
+    """strm文件对应的NFO路径，与媒体服务器的匹配规则一致：去掉.strm后缀再加.nfo"""
+    return os.path.splitext(strm_path)[0] + '.nfo'
+
+
+def render_nfo(info: Dict[str, Any]) -> str:
+    """生成只包含streamdetails的剧集NFO，媒体服务器可直接读取流信息"""
+    root = ElementTree.Element('episodedetails')
+    details = ElementTree.SubElement(ElementTree.SubElement(root, 'fileinfo'), 'streamdetails')
+    duration = info.get('duration')
+    for track in info.get('video', []):
+        video = ElementTree.SubElement(details, 'video')
+        ElementTree.SubElement(video, 'codec').text = track['codec']
+        ElementTree.SubElement(video, 'width').text = str(track['width'])
+        ElementTree.SubElement(video, 'height').text = str(track['height'])
+        if track['height']:
+            ElementTree.SubElement(video, 'aspect').text = f'{track["width"] / track["height"]:.3f}'
+        if track.get('duration') or duration:
+            ElementTree.SubElement(video, 'durationinseconds').text = str(round(track.get('duration') or duration))
+    for track in info.get('audio', []):
+        audio = ElementTree.SubElement(details, 'audio')
+        ElementTree.SubElement(audio, 'codec').text = track['codec']
+        ElementTree.SubElement(audio, 'language').text = track['language']
+        ElementTree.SubElement(audio, 'channels').text = str(track['channels'])
+        ElementTree.SubElement(audio, 'samplingrate').text = str(track['sample_rate'])
+    if duration:
+        ElementTree.SubElement(root, 'runtime').text = str(max(round(duration / 60), 1))
+    body = ElementTree.tostring(root, encoding='unicode')
+    return f'<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n{body}\n'
+
+
+class SidecarWriter:
+    """
+    在strm文件旁生成媒体信息NFO，固定数量的线程后台获取，媒体信息按链接缓存
+    """
+
+    def __init__(self, probe: Callable[[str], Dict[str, Any]], cache: Any = None, concurrency: int = 2):
+        """
+        :param probe: 获取链接的媒体信息
+        :param cache: 媒体信息缓存，需提供 get(url) / put(url, info)
+        :param concurrency: 同时获取的文件数
+        """
+        self._probe = probe
+        self._cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max(int(concurrency or 1), 1),
+                                            thread_name_prefix='anistrm-mediainfo')
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, strm_path: str):
+        with self._lock:
+            self._futures.append(self._executor.submit(self._run, url, strm_path))
+
+    def _run(self, url: str, strm_path: str) -> str:
+        nfo = nfo_path(strm_path)
+        # 已有NFO（刮削生成或上次生成）时不覆盖
+        if os.path.exists(nfo):
+            return 'skipped'
+        info = self._cache.get(url) if self._cache else None
+        status = 'cached'
+        if info is None:
+            info = self._probe(url)
+            status = 'probed'
+            if self._cache:
+                self._cache.put(url, info)
+        if write_strm(nfo, render_nfo(info)) == FAILED:
+            raise IOError(f'写入NFO失败：{nfo}')
+        return status
+
+    def wait(self) -> Dict[str, int]:
+        """等待已提交的任务完成，返回获取、缓存命中、跳过、失败数"""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        counts = {'probed': 0, 'cached': 0, 'skipped': 0, 'failed': 0}
+        for future in futures:
+            try:
+                counts[future.result()] += 1
+            except Exception as e:
+                counts['failed'] += 1
+                logger.warn(f'获取媒体信息失败：{str(e)}')
+        return counts
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
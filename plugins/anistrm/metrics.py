@@ -0,0 +1,109 @@
+import math
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+# 记录延迟分布的最大样本数，超过后随机抽样
+MAX_SAMPLES = 5000
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """已排序数据的百分位数（最近秩法）"""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(math.ceil(pct / 100 * len(values)) - 1, 0))
+    return values[index]
+
+
+class RunMetrics:
+    """
+    单次运行的分阶段耗时、计数及延迟分布，多线程共用
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._phases: Dict[str, float] = {}
+        self._counters: Dict[str, int] = {}
+        self._samples: Dict[str, List[float]] = {}
+        self._sample_seen: Dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """累计代码块耗时，同一阶段可多次进入"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self._phases[name] = self._phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def observe(self, name: str, value: float):
+        """记录延迟样本"""
+        with self._lock:
+            seen = self._sample_seen.get(name, 0) + 1
+            self._sample_seen[name] = seen
+            samples = self._samples.setdefault(name, [])
+            if len(samples) < MAX_SAMPLES:
+                samples.append(value)
+            else:
+                # 蓄水池抽样，样本数固定
+                index = random.randrange(seen)
+                if index < MAX_SAMPLES:
+                    samples[index] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            latency = {}
+            for name, samples in self._samples.items():
+                ordered = sorted(samples)
+                latency[name] = {
+                    'count': self._sample_seen[name],
+                    'p50': round(percentile(ordered, 50) * 1000, 1),
+                    'p90': round(percentile(ordered, 90) * 1000, 1),
+                    'p95': round(percentile(ordered, 95) * 1000, 1),
+                    'p99': round(percentile(ordered, 99) * 1000, 1),
+                    'max': round(ordered[-1] * 1000, 1)
+                }
+            return {
+                'kind': self.kind,
+                'started': self.started,
+                'duration': round(time.time() - self.started, 3),
+                'phases': {name: round(seconds, 3) for name, seconds in self._phases.items()},
+                'counters': dict(self._counters),
+                'latency_ms': latency
+            }
+
+
+class MetricsHistory:
+    """
+    最近若干次运行的指标，环形缓冲，最旧的记录自动丢弃
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = None, maxlen: int = 50):
+        self._records = deque(records or [], maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict[str, Any]):
+        with self._lock:
+            self._records.append(record)
+
+    def records(self, limit: int = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._records)
+        return records[-limit:] if limit else records
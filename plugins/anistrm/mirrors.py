@@ -0,0 +1,222 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+from requests.exceptions import InvalidJSONError
+
+from app.log import logger
+
+# 熔断器状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ResponseError(IOError):
+    """
+    镜像已响应但请求失败（如404、500），只与请求的地址有关，不计入镜像熔断
+    """
+
+    def __init__(self, status_code: int, message: str = None):
+        self.status_code = status_code
+        super().__init__(message or f'请求失败：{status_code}')
+
+
+def is_transport_error(error: Exception) -> bool:
+    """
+    连接失败、超时等网络错误，镜像可能不可用
+    requests的JSONDecodeError同时是IOError，镜像返回HTML错误页、不完整的JSON时属于解析失败，不是网络错误
+    """
+    return isinstance(error, OSError) and not isinstance(error, (ResponseError, ValueError, InvalidJSONError))
+
+
+class CircuitBreaker:
+    """
+    熔断器：不同地址连续失败达到阈值后熔断，冷却时间过后放行一次试探请求，成功则恢复
+    同一地址重试失败只计一次，避免单个地址的问题导致整个镜像熔断
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 300):
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        # 上次成功之后失败过的地址
+        self._failed_keys: Set[str] = set()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if time.time() - self.opened_at >= self._cooldown:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> bool:
+        """是否放行请求，半开状态只放行一次试探请求"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._failed_keys.clear()
+
+    def failure(self, key: str = None):
+        """
+        记录一次失败
+        :param key: 请求的地址，同一地址重复失败只计一次
+        """
+        self._trial = False
+        if key is not None:
+            if key in self._failed_keys:
+                if self.opened_at is not None:
+                    self.opened_at = time.time()
+                return
+            self._failed_keys.add(key)
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self._failure_threshold:
+            self.opened_at = time.time()
+
+
+class Mirror:
+    """
+    镜像域名及其延迟、熔断状态
+    """
+
+    def __init__(self, domain: str, failure_threshold: int, cooldown: float):
+        self.domain = domain
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, cooldown=cooldown)
+        # 延迟的指数移动平均（秒），未探测时为None
+        self.latency: Optional[float] = None
+        self.last_probe: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def observe(self, latency: float, alpha: float = 0.3):
+        self.latency = latency if self.latency is None else alpha * latency + (1 - alpha) * self.latency
+
+
+class MirrorPool:
+    """
+    镜像池：定期探测各镜像延迟，请求优先使用最快的可用镜像，失败时切换到下一个镜像
+    """
+
+    def __init__(self, domains: List[str], probe: Callable[[str], Any],
+                 failure_threshold: int = 3, cooldown: float = 300):
+        """
+        :param domains: 镜像域名列表，第一个为首选域名
+        :param probe: 探测方法，传入域名，请求失败时抛出异常
+        :param failure_threshold: 连续失败多少次后熔断
+        :param cooldown: 熔断后多少秒放行试探请求
+        """
+        self._mirrors = [Mirror(domain, failure_threshold, cooldown) for domain in dict.fromkeys(domains) if domain]
+        self._probe = probe
+        self._lock = threading.Lock()
+
+    @property
+    def domains(self) -> List[str]:
+        return [mirror.domain for mirror in self._mirrors]
+
+    def _ordered(self) -> List[Mirror]:
+        """按延迟排序，最近请求失败的镜像及未探测过的镜像排在后面，其余保持配置顺序"""
+        return sorted(self._mirrors, key=lambda m: (m.breaker.failures > 0, m.latency is None, m.latency or 0))
+
+    def best(self) -> Optional[str]:
+        """当前最快的可用镜像"""
+        with self._lock:
+            for mirror in self._ordered():
+                if mirror.breaker.state != OPEN:
+                    return mirror.domain
+        return self._mirrors[0].domain if self._mirrors else None
+
+    def _record(self, mirror: Mirror, started: float, error: Optional[Exception], key: str = None):
+        with self._lock:
+            if error is None:
+                mirror.observe(time.time() - started)
+                mirror.breaker.success()
+                mirror.last_error = None
+                return
+            mirror.last_error = str(error)
+            # 只有一个镜像时熔断也无处切换，不熔断
+            if len(self._mirrors) > 1:
+                mirror.breaker.failure(key)
+
+    def call(self, func: Callable[[str], Any], key: str = None) -> Any:
+        """
+        按延迟顺序依次尝试可用镜像，成功即返回，所有镜像均失败时抛出最后一个异常
+        只有网络错误计入熔断；镜像返回4xx时直接抛出，返回5xx时尝试下一个镜像
+        :param func: 传入域名执行请求，失败时抛出异常
+        :param key: 请求的地址（不含域名），同一地址重试失败只计一次
+        """
+        with self._lock:
+            ordered = self._ordered()
+        last_error = None
+        for mirror in ordered:
+            # 只对实际尝试的镜像判断，未使用的镜像不占用半开状态的试探请求
+            with self._lock:
+                if not mirror.breaker.allow():
+                    continue
+            started = time.time()
+            try:
+                ret = func(mirror.domain)
+            except ResponseError as err:
+                # 镜像正常响应，视为镜像可用
+                self._record(mirror, started, None)
+                if err.status_code < 500:
+                    raise
+                logger.warn(f'镜像 {mirror.domain} 请求失败：{str(err)}')
+                last_error = err
+                continue
+            except Exception as err:
+                # 解析失败等与镜像可用性无关的错误不计入熔断
+                self._record(mirror, started, err if is_transport_error(err) else None, key)
+                logger.warn(f'镜像 {mirror.domain} 请求失败：{str(err)}')
+                last_error = err
+                continue
+            self._record(mirror, started, None)
+            return ret
+        if last_error is None:
+            raise IOError('所有镜像均已熔断，请检查网络或镜像配置')
+        raise last_error
+
+    def call_url(self, url: str, func: Callable[[str], Any]) -> Any:
+        """将URL中的域名依次替换为可用镜像后执行请求"""
+        parts = urlsplit(url)
+        key = parts._replace(scheme='', netloc='').geturl()
+        return self.call(lambda domain: func(parts._replace(netloc=domain).geturl()), key=key)
+
+    def probe_all(self):
+        """探测所有镜像的延迟，熔断中的镜像也会探测，探测成功即恢复"""
+        for mirror in list(self._mirrors):
+            started = time.time()
+            error = None
+            try:
+                self._probe(mirror.domain)
+            except Exception as err:
+                error = err
+            self._record(mirror, started, error)
+            mirror.last_probe = time.time()
+            if error:
+                logger.warn(f'镜像 {mirror.domain} 探测失败：{str(error)}')
+            else:
+                logger.debug(f'镜像 {mirror.domain} 延迟 {mirror.latency * 1000:.0f}ms')
+
+    def status(self) -> List[Dict[str, Any]]:
+        """各镜像当前延迟及熔断状态"""
+        with self._lock:
+            return [{
+                'domain': mirror.domain,
+                'latency_ms': round(mirror.latency * 1000) if mirror.latency is not None else None,
+                'state': mirror.breaker.state,
+                'failures': mirror.breaker.failures,
+                'last_probe': mirror.last_probe,
+                'last_error': mirror.last_error
+            } for mirror in self._ordered()]
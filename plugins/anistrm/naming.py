@@ -0,0 +1,64 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# [ANi] 葬送的芙莉蓮 - 02 [1080P][Baha][WEB-DL][AAC AVC][CHT].mp4
+_ANI_NAME = re.compile(r'^(?:\[ANi\]\s*)?(?P<series>.+?)'
+                       r'(?:\s+[-\uFF0D]\s+(?P<episode>\d+(?:\.\d+)?)(?:[vV]\d+)?)?'
+                       r'\s*(?P<tags>(?:\[[^\[\]]*\]\s*)*)'
+                       r'(?:\.(?P<ext>mp4))?$', re.IGNORECASE)
+# 链接中的季度目录，如 /2024-10/
+_SEASON_PATH = re.compile(r'/(\d{4}-\d{1,2})/')
+_SPACES = re.compile(r'\s+')
+# 方括号标签之间的空白
+_TAG_GAP = re.compile(r'\]\s*\[')
+
+
+@dataclass(frozen=True)
+class EpisodeName:
+    """
+    ANi文件名解析结果
+    """
+    # 番剧名
+    series: str
+    # 集数，剧场版等没有集数时为None
+    episode: Optional[str]
+    # 方括号标签，如 [1080P][Baha][WEB-DL][AAC AVC][CHT]
+    tags: str
+    # 去掉扩展名的文件名
+    stem: str
+
+    @property
+    def release(self) -> str:
+        """发布版本标识：来源、分辨率、语言等方括号标签，如 [1080p][baha][web-dl][aac avc][cht]"""
+        return _TAG_GAP.sub('][', _normalize(self.tags))
+
+    @property
+    def key(self) -> str:
+        """剧集唯一标识，同一集的不同发布版本（Baha、Bilibili、720P等）各不相同，与空白、大小写变化无关"""
+        if self.episode is None:
+            return _normalize(self.stem)
+        return f'{_normalize(self.series)}#{float(self.episode):g}{self.release}'
+
+
+def _normalize(text: str) -> str:
+    return _SPACES.sub(' ', text).strip().casefold()
+
+
+def parse_name(file_name: str) -> EpisodeName:
+    """解析ANi文件名，无法识别时整个文件名作为番剧名"""
+    name = file_name.strip()
+    stem = name[:-4] if name.lower().endswith('.mp4') else name
+    match = _ANI_NAME.match(name)
+    if not match:
+        return EpisodeName(series=stem, episode=None, tags='', stem=stem)
+    return EpisodeName(series=match.group('series').strip(),
+                       episode=match.group('episode'),
+                       tags=match.group('tags').strip(),
+                       stem=stem)
+
+
+def season_from_url(url: str) -> Optional[str]:
+    """从资源链接中解析季度目录，如 2024-10"""
+    match = _SEASON_PATH.search(url or '')
+    return match.group(1) if match else None
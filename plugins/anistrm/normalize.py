@@ -0,0 +1,172 @@
+import json
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from app.log import logger
+
+# 常见全角符号到半角符号的映射，或直接移除
+_FULLWIDTH_TABLE = str.maketrans({
+    '\uFF0D': '-',  # 全角破折号（－）替换为半角连字符（-）
+    '\uFF1A': ':',  # 全角冒号（：）替换为半角冒号（:）
+    '\uFF0C': ',',  # 全角逗号（，）替换为半角逗号（,）
+    '\uFF0E': '.',  # 全角句号（。）替换为半角句号（.）
+    '\uFF01': '!',  # 全角感叹号（！）替换为半角感叹号（!）
+    '\uFF1F': '?',  # 全角问号（？）替换为半角问号（?）
+    '\uFF08': '(',  # 全角左括号（（）替换为半角左括号（(）
+    '\uFF09': ')',  # 全角右括号（））替换为半角右括号（)）
+    '\uFF3B': '[',  # 全角左方括号（［）替换为半角左方括号（[）
+    '\uFF3D': ']',  # 全角右方括号（］）替换为半角右方括号（]）
+    '\u3000': ' ',  # 全角空格替换为半角空格
+    # 其他全角符号可以直接移除（例如全角顿号、引号等）
+    '\u3001': '',  # 全角顿号（、）
+    '\u3002': '.',  # 全角句号（。）
+    '\u201C': '"',  # 全角左双引号
+    '\u201D': '"',  # 全角右双引号
+    '\u2018': '\'',  # 全角左单引号
+    '\u2019': '\'',  # 全角右单引号
+})
+
+# 按顺序执行的替换规则
+_RULES = [
+    # 去掉中文和中文之间的空格
+    (re.compile(r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff])'), r'\1\2'),
+    # 去掉中文和英文之间的空格
+    (re.compile(r'([\u4e00-\u9fff]+)\s+([a-zA-Z0-9]+)\s*([\u4e00-\u9fff]+)'), r'\1\2\3'),
+    (re.compile(r'([\u4e00-\u9fff]+)\s+([a-zA-Z0-9]+)'), r'\1\2'),
+    # 英文在前面不处理，数字在前面处理
+    (re.compile(r'([0-9]+)\s+([\u4e00-\u9fff]+)'), r'\1\2'),
+    # 将中文和中文之间的“-”替换为空格
+    (re.compile(r'([\u4e00-\u9fff])\s*-([\u4e00-\u9fff])'), r'\1 \2'),
+    # 将中文和“-”替换为中文
+    (re.compile(r'([\u4e00-\u9fff])(-)'), r'\1'),
+]
+
+# 精简转换表直接使用OpenCC的词典结构（非公开接口），与requirements.txt中固定的版本对应
+_OPENCC_DICT_ATTRS = ('_dict_chain_data', '_dict_init_done')
+# OpenCC繁转简词典中没有包含ASCII字符的词条，英文、数字不需要回退到完整OpenCC
+_ASCII = frozenset(map(chr, range(128)))
+
+# 繁简转换器，首次使用时才加载OpenCC词典
+_converter: Optional[Callable[[str], str]] = None
+_converter_lock = threading.Lock()
+
+
+def clean_filename(filename: str) -> str:
+    """全角符号转半角，并整理中英文之间的空格和连字符"""
+    cleaned_filename = filename.translate(_FULLWIDTH_TABLE)
+    for pattern, repl in _RULES:
+        cleaned_filename = pattern.sub(repl, cleaned_filename)
+    return cleaned_filename
+
+
+def _opencc_t2s():
+    """完整的OpenCC繁转简转换器，进程内共享"""
+    from opencc import OpenCC
+    return OpenCC('t2s')
+
+
+def traditional_to_simplified(text: str) -> str:
+    """繁体转简体，首次调用时加载转换器，多线程共享同一实例"""
+    global _converter
+    if _converter is None:
+        with _converter_lock:
+            if _converter is None:
+                _converter = _opencc_t2s().convert
+    return _converter(text)
+
+
+def set_converter(converter: Optional[Callable[[str], str]]):
+    """替换繁简转换器，传入None时恢复为按需加载的OpenCC"""
+    global _converter
+    with _converter_lock:
+        _converter = converter
+    normalize_title.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def normalize_title(title: str, convert_traditional: bool = False) -> str:
+    """
+    生成strm文件名，同一标题每次运行都会重复出现，结果按标题和繁简转换开关缓存
+    """
+    new_title = clean_filename(title)
+    if convert_traditional:
+        return traditional_to_simplified(new_title)
+    return new_title
+
+
+class CompactConverter:
+    """
+    精简繁简转换表：只包含番剧标题中出现过的字符，以及完全由这些字符组成的词组，
+    表内字符组成的文本转换结果与完整OpenCC一致，含表外字符时回退到完整OpenCC
+    """
+
+    def __init__(self, table: Dict[str, Dict[str, str]]):
+        from opencc import OpenCC
+        self._charset = frozenset(table.get('chars', '')) | _ASCII
+        # 不指定conversion时OpenCC不加载词典，直接使用精简表
+        self._opencc = OpenCC()
+        if not all(hasattr(self._opencc, attr) for attr in _OPENCC_DICT_ATTRS):
+            raise RuntimeError('OpenCC版本不兼容精简转换表')
+        self._opencc._dict_chain_data = [[self._dict_entry(table.get('phrases', {})),
+                                          self._dict_entry(table.get('characters', {}))]]
+        self._opencc._dict_init_done = True
+        self._fallback = None
+        self.misses = 0
+
+    @staticmethod
+    def _dict_entry(mapping: Dict[str, str]) -> tuple:
+        # OpenCC词典格式：(最长词长度, 最短词长度, 词典)
+        lengths = [len(key) for key in mapping] or [1]
+        return max(lengths), min(lengths) if mapping else 1000, mapping
+
+    def convert(self, text: str) -> str:
+        if self._charset.issuperset(text):
+            return self._opencc.convert(text)
+        self.misses += 1
+        if self._fallback is None:
+            self._fallback = _opencc_t2s()
+        return self._fallback.convert(text)
+
+    @staticmethod
+    def build(texts: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """根据标题生成精简转换表"""
+        chars = set()
+        for text in texts:
+            chars.update(text)
+        full = _opencc_t2s()
+        tables = []
+        for _, _, mapping in full._dict_chain_data[0]:
+            tables.append({key: value for key, value in mapping.items() if chars.issuperset(key)})
+        return {
+            'chars': ''.join(sorted(chars)),
+            'phrases': tables[0],
+            'characters': tables[1]
+        }
+
+
+def load_compact_table(path: Path) -> Optional[CompactConverter]:
+    """加载精简转换表并替换当前转换器，文件不存在或格式错误时返回None"""
+    if not path.exists():
+        return None
+    try:
+        converter = CompactConverter(json.loads(path.read_text(encoding='utf-8')))
+    except Exception as e:
+        logger.warn(f'加载繁简转换表失败，使用完整OpenCC：{str(e)}')
+        return None
+    set_converter(converter.convert)
+    return converter
+
+
+def save_compact_table(path: Path, titles: Iterable[str]) -> Optional[CompactConverter]:
+    """根据番剧原始标题重新生成精简转换表，保存后立即启用"""
+    try:
+        table = CompactConverter.build(clean_filename(title) for title in titles)
+        path.write_text(json.dumps(table, ensure_ascii=False), encoding='utf-8')
+    except Exception as e:
+        logger.warn(f'生成繁简转换表失败：{str(e)}')
+        return None
+    logger.info(f'已生成繁简转换表，包含 {len(table["chars"])} 个字符，{len(table["phrases"])} 个词组')
+    return load_compact_table(path)
@@ -0,0 +1,143 @@
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.log import logger
+
+from .mediainfo import nfo_path
+from .naming import parse_name
+from .normalize import clean_filename, traditional_to_simplified
+
+# 清理方式
+GC_OFF = 'off'
+GC_DRY_RUN = 'dry_run'  # 只生成报告
+GC_QUARANTINE = 'quarantine'  # 移动到隔离目录
+GC_DELETE = 'delete'  # 删除重复文件，未知文件仍只隔离
+
+# 未知文件超过该比例时认为剧集清单不完整，不处理未知文件
+MAX_UNKNOWN_RATIO = 0.5
+
+
+def _loose_key(file_name: str, convert_traditional: bool = False) -> str:
+    """
+    与文件名整理规则无关的剧集标识，不使用标题整理缓存，避免清理时大量文件名挤掉运行中的缓存
+    :param convert_traditional: 与生成strm文件名时一致，关闭时不加载OpenCC
+    """
+    file_name = clean_filename(file_name)
+    if convert_traditional:
+        file_name = traditional_to_simplified(file_name)
+    return parse_name(file_name).key
+
+
+def scan_storage(root: str, deadline: float = None) -> Tuple[List[str], set]:
+    """
+    一次遍历存储目录（含子目录），返回strm文件和nfo文件路径，跳过隐藏目录及临时文件
+    :param deadline: 超过该时间（time.time()）时抛出TimeoutError
+    """
+    strm_files, nfo_files = [], set()
+    stack = [root]
+    while stack:
+        if deadline and time.time() > deadline:
+            raise TimeoutError(f'扫描存储目录超时，已扫描 {len(strm_files)} 个strm文件')
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.strm'):
+                        strm_files.append(os.path.normpath(entry.path))
+                    elif entry.name.endswith('.nfo'):
+                        nfo_files.add(os.path.normpath(entry.path))
+        except OSError as e:
+            logger.warn(f'无法读取目录 {directory}：{str(e)}')
+    return strm_files, nfo_files
+
+
+def reconcile(root: str, expected: Iterable[Tuple[str, str]], deadline: float = None,
+              convert_traditional: bool = False) -> Dict[str, Any]:
+    """
+    比对存储目录与剧集清单
+    :param expected: 剧集清单中的（原始文件名，strm路径）
+    :param convert_traditional: 是否繁体转简体
+    :return: 报告，duplicates 为同一剧集同一发布版本的旧文件名，orphans 为清单中没有对应剧集的文件，
+             current 为清单中的strm路径
+    """
+    start_time = time.time()
+    strm_files, nfo_files = scan_storage(root, deadline)
+    expected_paths = {}
+    for file_name, path in expected:
+        if path:
+            expected_paths[os.path.normpath(path)] = _loose_key(file_name, convert_traditional)
+    present = set(strm_files)
+    # 文件存在的剧集，重复文件只在正确的文件存在时才清理
+    live_keys = {key: path for path, key in expected_paths.items() if path in present}
+    duplicates, orphans = [], []
+    for path in strm_files:
+        if path in expected_paths:
+            continue
+        # 剧集标识包含发布版本标签，同一集的其他版本（Baha、Bilibili、720P等）不是重复文件
+        key = _loose_key(os.path.basename(path)[:-len('.strm')], convert_traditional)
+        if key in live_keys:
+            duplicates.append({'path': path, 'keep': live_keys[key]})
+        else:
+            orphans.append(path)
+    return {
+        'scanned': len(strm_files),
+        'expected': len(expected_paths),
+        'missing': len(expected_paths) - len(live_keys),
+        'duplicates': duplicates,
+        'orphans': orphans,
+        'nfo_files': nfo_files,
+        'current': set(expected_paths),
+        'elapsed': round(time.time() - start_time, 3)
+    }
+
+
+def _sidecars(path: str, nfo_files: set) -> List[str]:
+    nfo = nfo_path(path)
+    return [path, nfo] if nfo in nfo_files else [path]
+
+
+def _quarantine(path: str, root: str, quarantine_dir: str):
+    target = os.path.join(quarantine_dir, os.path.relpath(path, root))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(path, target)
+
+
+def apply_report(report: Dict[str, Any], root: str, mode: str,
+                 quarantine_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    按清理方式处理报告中的文件
+    :return: 删除、隔离、失败的文件数
+    """
+    counts = {'deleted': 0, 'quarantined': 0, 'failed': 0}
+    if mode not in (GC_QUARANTINE, GC_DELETE):
+        return counts
+    orphans = report['orphans']
+    if report['scanned'] and len(orphans) / report['scanned'] > MAX_UNKNOWN_RATIO:
+        logger.warn(f'{len(orphans)} 个strm文件不在剧集清单中，超过总数的一半，剧集清单可能不完整，不处理这些文件')
+        orphans = []
+    actions = [(item['path'], mode) for item in report['duplicates']] + \
+              [(path, GC_QUARANTINE) for path in orphans]
+    # 剧集清单中任一剧集的当前strm文件都不处理
+    current = report.get('current') or set()
+    for strm_path, action in actions:
+        if strm_path in current:
+            logger.warn(f'{strm_path} 是剧集清单中的当前文件，不清理')
+            continue
+        for path in _sidecars(strm_path, report['nfo_files']):
+            try:
+                if action == GC_DELETE:
+                    os.remove(path)
+                    counts['deleted'] += 1
+                else:
+                    _quarantine(path, root, quarantine_dir)
+                    counts['quarantined'] += 1
+            except OSError as e:
+                counts['failed'] += 1
+                logger.error(f'清理文件失败：{path}，{str(e)}')
+    return counts
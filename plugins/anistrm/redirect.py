@@ -0,0 +1,112 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urljoin
+
+from app.log import logger
+
+from .mirrors import ResponseError
+
+# 最多跟随的跳转次数
+MAX_HOPS = 5
+
+
+def sign_path(secret: str, path: str) -> str:
+    """
+    上游路径签名，strm中的跳转地址只能用于该路径的播放跳转，不包含MoviePilot的API密钥
+    :param secret: 插件生成的签名密钥
+    :param path: 上游路径（未编码）
+    """
+    return hmac.new(secret.encode(), path.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def verify_path(secret: Optional[str], path: str, sign: Optional[str]) -> bool:
+    """校验上游路径签名"""
+    return bool(secret and sign) and hmac.compare_digest(sign_path(secret, path), sign)
+
+
+class RedirectResolver:
+    """
+    跟随上游跳转链得到最终播放地址，结果按路径缓存一段时间，同一路径并发请求只解析一次
+    """
+
+    def __init__(self, fetch: Callable[[str], Tuple[int, Optional[str]]], ttl: float = 1800,
+                 max_entries: int = 2048):
+        """
+        :param fetch: 请求URL（不跟随跳转），返回状态码及Location，请求失败时抛出异常
+        :param ttl: 缓存有效期（秒）
+        :param max_entries: 最多缓存的地址数
+        """
+        self._fetch = fetch
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if not entry:
+                return None
+            if entry[1] < time.time():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key: str, url: str):
+        with self._lock:
+            self._cache[key] = (url, time.time() + self._ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+
+    def follow(self, url: str) -> str:
+        """跟随跳转链，返回最终地址"""
+        for _ in range(MAX_HOPS):
+            status, location = self._fetch(url)
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            if status >= 400:
+                raise ResponseError(status)
+            return url
+        logger.warn(f'跳转次数超过 {MAX_HOPS} 次，使用最后一个地址：{url}')
+        return url
+
+    def resolve(self, key: str, resolver: Callable[[], str]) -> str:
+        """
+        获取缓存的最终地址，缓存不存在或已过期时重新解析
+        :param key: 缓存键，与域名无关，如上游路径
+        :param resolver: 解析最终地址，如依次对各镜像调用follow
+        """
+        url = self._cached(key)
+        if url:
+            self.hits += 1
+            return url
+        with self._lock:
+            inflight = self._inflight.setdefault(key, threading.Lock())
+        with inflight:
+            # 等待期间其他请求可能已解析完成
+            url = self._cached(key)
+            if url:
+                self.hits += 1
+                return url
+            self.misses += 1
+            try:
+                url = resolver()
+                self._store(key, url)
+                return url
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,162 @@
+import ntpath
+import posixpath
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.log import logger
+
+from .storage import CREATED
+
+# 媒体库刷新通知方式
+REFRESH_OFF = 'off'
+REFRESH_EVENT = 'event'  # MoviePilot插件事件
+REFRESH_WEBHOOK = 'webhook'  # POST JSON到指定地址
+
+# strm路径 -> 写入结果（created / updated）
+Changes = Dict[str, str]
+
+
+def parse_path_map(text: Optional[str]) -> List[Tuple[str, str]]:
+    """
+    解析路径映射，每行 本地路径:媒体库路径，按第一个冒号分隔，媒体库路径可以是Windows路径
+    :return: [(本地路径, 媒体库路径)]，本地路径较长的在前，优先匹配更具体的目录
+    """
+    mappings = []
+    for line in (text or '').splitlines():
+        source, sep, target = line.strip().partition(':')
+        if sep and source.strip() and target.strip():
+            mappings.append((source.strip().rstrip('/'), target.strip().rstrip('/\\')))
+    return sorted(mappings, key=lambda item: len(item[0]), reverse=True)
+
+
+def map_path(path: str, mappings: List[Tuple[str, str]]) -> str:
+    """本地strm路径转换为媒体库中的路径，没有匹配的映射时原样返回"""
+    for source, target in mappings:
+        if path == source or path.startswith(source + '/'):
+            rest = path[len(source):]
+            if '\\' in target:
+                rest = rest.replace('/', '\\')
+            return target + rest
+    return path
+
+
+def refresh_payload(changes: Changes, mappings: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    组装刷新通知：每个文件的媒体库路径及所在目录，以及去重后需要刷新的目录
+    """
+    items = []
+    for path, status in changes.items():
+        target = map_path(path, mappings)
+        dirname = ntpath.dirname if '\\' in target else posixpath.dirname
+        items.append({'path': path, 'status': status, 'target': target, 'target_dir': dirname(target)})
+    return {
+        'items': items,
+        'targets': sorted({item['target_dir'] for item in items})
+    }
+
+
+class RefreshQueue:
+    """
+    媒体库刷新队列：收集新建、更新的strm路径，最后一次运行结束后静默一段时间再分批发送，
+    短时间内多次运行的变化合并为一次通知，发送失败的路径留到下次一起发送
+    """
+
+    def __init__(self, send: Callable[[Changes], None], debounce: float = 60, max_wait: float = 600,
+                 batch_size: int = 100, busy: Callable[[], bool] = None, pending: Changes = None,
+                 persist: Callable[[Changes], None] = None):
+        """
+        :param send: 发送一批变化，失败时抛出异常
+        :param debounce: 静默时间（秒），期间再次运行则重新计时
+        :param max_wait: 第一个变化之后最长等待时间（秒），超过后不再推迟
+        :param batch_size: 每批最多路径数
+        :param busy: 任务是否运行中，运行中不发送，运行结束后重新计时
+        :param pending: 上次未发送的变化
+        :param persist: 保存未发送的变化，插件重启后继续发送
+        """
+        self._send = send
+        self._debounce = max(float(debounce or 0), 0)
+        self._max_wait = max(float(max_wait or 0), self._debounce)
+        self._batch_size = max(int(batch_size or 1), 1)
+        self._busy = busy
+        self._persist = persist
+        self._pending: Changes = dict(pending or {})
+        self._first = time.time() if self._pending else None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self.stats = {'batches': 0, 'paths': 0, 'failed': 0}
+
+    def add(self, path: str, status: str):
+        with self._lock:
+            # 发送前先创建后更新的文件仍按新建通知
+            if self._pending.get(path) != CREATED:
+                self._pending[path] = status
+            if self._first is None:
+                self._first = time.time()
+
+    def pending(self) -> Changes:
+        with self._lock:
+            return dict(self._pending)
+
+    def schedule(self):
+        """重新开始静默计时，自第一个变化起超过最长等待时间时尽快发送"""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            delay = min(self._debounce, max(self._first + self._max_wait - time.time(), 0))
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+        self.__save()
+
+    def flush(self) -> int:
+        """
+        发送全部未发送的变化
+        :return: 发送成功的路径数
+        """
+        if self._busy and self._busy():
+            # 运行结束后会重新计时
+            return 0
+        with self._send_lock:
+            with self._lock:
+                changes = list(self._pending.items())
+                self._pending = {}
+                self._first = None
+                self._timer = None
+            sent = 0
+            for start in range(0, len(changes), self._batch_size):
+                batch = dict(changes[start:start + self._batch_size])
+                try:
+                    self._send(batch)
+                except Exception as e:
+                    logger.error(f'媒体库刷新通知发送失败，下次运行后重试：{str(e)}')
+                    with self._lock:
+                        for path, status in changes[start:]:
+                            self._pending.setdefault(path, status)
+                        self._first = self._first or time.time()
+                        self.stats['failed'] += 1
+                    break
+                sent += len(batch)
+                with self._lock:
+                    self.stats['batches'] += 1
+                    self.stats['paths'] += len(batch)
+            self.__save()
+            return sent
+
+    def stop(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        self.__save()
+
+    def __save(self):
+        if self._persist:
+            try:
+                self._persist(self.pending())
+            except Exception as e:
+                logger.error(f'保存待刷新路径失败：{str(e)}')
@@ -0,0 +1,174 @@
+import statistics
+from collections import Counter
+from datetime import datetime, timedelta, tzinfo
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 轮询方式
+SCHEDULE_CRON = 'cron'  # 固定cron
+SCHEDULE_ADAPTIVE = 'adaptive'  # 按学习到的更新时间自适应
+
+# 预计更新时间前后的密集轮询窗口
+WINDOW_BEFORE = timedelta(minutes=15)
+WINDOW_AFTER = timedelta(minutes=90)
+# 每部番剧每个星期几保留的最近样本数
+MAX_SAMPLES = 6
+# 超过该天数没有新剧集的番剧不参与预测（已完结或停更）
+EXPIRE_DAYS = 15
+# 超过该天数没有新剧集的番剧从学习结果中删除
+DROP_DAYS = 60
+# 同一分钟内首次出现超过该数量的剧集视为批量生成（全量爬取、多季度补全），不作为更新时间样本
+BULK_THRESHOLD = 5
+WEEKDAYS = '一二三四五六日'
+
+
+def _localize(naive: datetime, tz: tzinfo) -> datetime:
+    """本地时间转为带时区的时间，pytz时区需要localize才能得到该日期正确的夏令时偏移"""
+    localize = getattr(tz, 'localize', None)
+    return localize(naive) if localize else naive.replace(tzinfo=tz)
+
+
+def _normalize(moment: datetime) -> datetime:
+    """时间运算跨越夏令时切换后修正pytz时区的偏移"""
+    normalize = getattr(moment.tzinfo, 'normalize', None)
+    return normalize(moment) if normalize else moment
+
+
+class ReleaseSchedule:
+    """
+    按番剧、星期几学习更新时间：记录每集首次出现的时间，同一星期几取中位数作为预计更新时间
+    """
+
+    def __init__(self, state: Dict[str, Any] = None):
+        # {番剧名: {'samples': {星期几: [当天分钟数, ...]}, 'last': 最近一集的时间戳}}
+        self._series: Dict[str, Dict[str, Any]] = dict(state or {})
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return self._series
+
+    def __bool__(self) -> bool:
+        return bool(self._series)
+
+    def observe(self, series: str, timestamp: float, tz: tzinfo):
+        """
+        记录一集的首次出现时间
+        :param series: 番剧名
+        :param timestamp: 首次出现（发布）时间戳
+        :param tz: 按该时区计算星期几及时间
+        """
+        moment = datetime.fromtimestamp(timestamp, tz)
+        entry = self._series.setdefault(series, {'samples': {}, 'last': 0})
+        samples = entry['samples'].setdefault(str(moment.weekday()), [])
+        samples.append(moment.hour * 60 + moment.minute)
+        del samples[:-MAX_SAMPLES]
+        entry['last'] = max(entry['last'], timestamp)
+        # 删除长期没有更新的番剧，学习结果大小不随时间增长
+        for name in [name for name, item in self._series.items()
+                     if timestamp - item['last'] > DROP_DAYS * 86400]:
+            del self._series[name]
+
+    def observe_many(self, observations: Iterable[Tuple[str, float]], tz: tzinfo) -> int:
+        """
+        批量学习，按时间先后记录，跳过批量生成的剧集
+        :param observations: [(番剧名, 首次出现时间戳)]
+        :return: 记录的样本数
+        """
+        observations = sorted(observations, key=lambda item: item[1])
+        bulk = Counter(int(timestamp // 60) for _, timestamp in observations)
+        count = 0
+        for series, timestamp in observations:
+            if bulk[int(timestamp // 60)] > BULK_THRESHOLD:
+                continue
+            self.observe(series, timestamp, tz)
+            count += 1
+        return count
+
+    def slots(self, now: datetime) -> List[Dict[str, Any]]:
+        """仍在更新的番剧的预计更新时间，按星期几、时间排序"""
+        slots = []
+        for series, entry in self._series.items():
+            if now.timestamp() - entry['last'] > EXPIRE_DAYS * 86400:
+                continue
+            for weekday, minutes in entry['samples'].items():
+                minute = statistics.median_low(minutes)
+                slots.append({
+                    'series': series,
+                    'weekday': int(weekday),
+                    'time': f'{minute // 60:02d}:{minute % 60:02d}',
+                    'minute': minute,
+                    'samples': len(minutes),
+                    'last': entry['last']
+                })
+        return sorted(slots, key=lambda slot: (slot['weekday'], slot['minute'], slot['series']))
+
+    def next_window(self, now: datetime) -> Optional[Tuple[datetime, datetime, List[str]]]:
+        """
+        当前或下一个密集轮询窗口，与之重叠的窗口合并
+        :return: (开始时间, 结束时间, 相关番剧)，没有学习结果时为None
+        """
+        windows = []
+        for slot in self.slots(now):
+            # 按本地日期、时间重新计算时区偏移，跨越夏令时切换时仍是当地的预计更新时间
+            day = now.date() + timedelta(days=(slot['weekday'] - now.weekday()) % 7)
+            hour, minute = divmod(slot['minute'], 60)
+            expected = _localize(datetime(day.year, day.month, day.day, hour, minute), now.tzinfo)
+            # 窗口已过，或本周这一集已经出现时，顺延到下周
+            if expected + WINDOW_AFTER < now or slot['last'] >= (expected - WINDOW_BEFORE).timestamp():
+                day += timedelta(days=7)
+                expected = _localize(datetime(day.year, day.month, day.day, hour, minute), now.tzinfo)
+            windows.append((_normalize(expected - WINDOW_BEFORE), _normalize(expected + WINDOW_AFTER),
+                            slot['series']))
+        if not windows:
+            return None
+        windows.sort(key=lambda window: window[0])
+        start, end, series = windows[0][0], windows[0][1], [windows[0][2]]
+        for window_start, window_end, name in windows[1:]:
+            if window_start > end:
+                break
+            end = max(end, window_end)
+            series.append(name)
+        return start, end, series
+
+
+class AdaptivePoller:
+    """
+    自适应轮询：预计更新时间附近按最短间隔轮询，其他时间每次没有新剧集间隔翻倍，
+    不超过最长间隔，也不会跳过下一个密集轮询窗口
+    """
+
+    def __init__(self, schedule: ReleaseSchedule, min_interval: float, max_interval: float, idle_polls: int = 0):
+        """
+        :param min_interval: 最短间隔（秒）
+        :param max_interval: 最长间隔（秒）
+        :param idle_polls: 连续没有新剧集的轮询次数
+        """
+        self.schedule = schedule
+        self.min_interval = max(float(min_interval), 60.0)
+        self.max_interval = max(float(max_interval), self.min_interval)
+        self.idle_polls = int(idle_polls or 0)
+
+    def record(self, new_items: int):
+        """记录一次轮询的新剧集数"""
+        self.idle_polls = 0 if new_items else self.idle_polls + 1
+
+    def next_poll(self, now: datetime) -> Tuple[datetime, str]:
+        """
+        下次轮询时间及原因
+        """
+        window = self.schedule.next_window(now)
+        if window and window[0] <= now:
+            return _normalize(now + timedelta(seconds=self.min_interval)), \
+                f'处于预计更新时间窗口（至 {window[1]:%H:%M}，{"、".join(window[2][:3])}' \
+                f'{"等" if len(window[2]) > 3 else ""}），按最短间隔 {self.min_interval / 60:g} 分钟轮询'
+        interval = min(self.max_interval, self.min_interval * 2 ** min(self.idle_polls, 16))
+        if window and now + timedelta(seconds=interval) > window[0]:
+            return window[0], \
+                f'下一个预计更新时间窗口 周{WEEKDAYS[window[0].weekday()]} {window[0]:%H:%M} 开始' \
+                f'（{"、".join(window[2][:3])}{"等" if len(window[2]) > 3 else ""}）'
+        if not self.idle_polls:
+            reason = f'上次发现新剧集，间隔 {interval / 60:g} 分钟'
+        else:
+            reason = f'连续 {self.idle_polls} 次没有新剧集，间隔增加到 {interval / 60:g} 分钟'
+        if not window:
+            reason += '（尚未学习到更新时间）'
+        return _normalize(now + timedelta(seconds=interval)), reason
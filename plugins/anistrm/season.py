@@ -0,0 +1,70 @@
+import re
+from datetime import datetime
+from typing import List, Optional
+
+# 季度起始月
+SEASON_MONTHS = (1, 4, 7, 10)
+_SEASON = re.compile(r'^\s*(\d{4})-(\d{1,2})\s*$')
+# 季度范围分隔符，如 2019-1~2024-10
+_RANGE_SEP = re.compile(r'\s*[~～至]\s*')
+# 季度列表分隔符
+_LIST_SEP = re.compile(r'[,，;；\s]+')
+
+
+def season_of(date: datetime) -> str:
+    """日期所在的季度，如 2024-10"""
+    month = max(m for m in SEASON_MONTHS if m <= date.month)
+    return f'{date.year}-{month}'
+
+
+def _parse_season(text: str) -> Optional[tuple]:
+    match = _SEASON.match(text or '')
+    if not match:
+        return None
+    year, month = int(match.group(1)), int(match.group(2))
+    if month not in SEASON_MONTHS or year <= 2000:
+        return None
+    return year, month
+
+
+def _next_season(year: int, month: int) -> tuple:
+    if month == 10:
+        return year + 1, 1
+    return year, month + 3
+
+
+def parse_seasons(text: str, now: datetime = None) -> List[str]:
+    """
+    解析季度范围或列表，按时间顺序去重返回
+    支持 2019-1~2024-10（范围，结束季度省略时到当前季度）、2023-1,2023-4（列表）及两者混合
+    :raises ValueError: 季度格式错误
+    """
+    current = _parse_season(season_of(now or datetime.now()))
+    seasons = set()
+    text = _RANGE_SEP.sub('~', (text or '').strip())
+    for part in _LIST_SEP.split(text):
+        if not part:
+            continue
+        bounds = part.split('~')
+        if len(bounds) == 1:
+            season = _parse_season(bounds[0])
+            if not season:
+                raise ValueError(f'季度格式错误：{part}，应为"年份-月份"，如"2025-1"')
+            seasons.add(season)
+            continue
+        if len(bounds) != 2:
+            raise ValueError(f'季度范围格式错误：{part}，应为"起始季度~结束季度"，如"2019-1~2024-10"')
+        start = _parse_season(bounds[0])
+        end = _parse_season(bounds[1]) if bounds[1] else current
+        if not start or not end:
+            raise ValueError(f'季度范围格式错误：{part}，应为"起始季度~结束季度"，如"2019-1~2024-10"')
+        season = start
+        while season <= end:
+            seasons.add(season)
+            season = _next_season(*season)
+    return [f'{year}-{month}' for year, month in sorted(seasons)]
+
+
+def season_key(season: str) -> Optional[tuple]:
+    """季度排序键 (年份, 月份)，格式错误时为None"""
+    return _parse_season(season)
@@ -0,0 +1,41 @@
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PooledSession:
+    """
+    插件共享的HTTP会话：连接池 + keep-alive，同一域名的请求复用TCP/TLS连接
+    """
+
+    def __init__(self, pool_size: int = 8):
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(int(pool_size or 1), 1))
+        self.session = requests.Session()
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+    def _pools(self):
+        managers = [self._adapter.poolmanager] + list(self._adapter.proxy_manager.values())
+        for manager in managers:
+            if not manager:
+                continue
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    yield pool
+
+    def stats(self) -> Dict[str, int]:
+        """累计新建连接数、请求数及复用连接的请求数"""
+        connections = requests_count = 0
+        for pool in self._pools():
+            connections += pool.num_connections
+            requests_count += pool.num_requests
+        return {
+            'connections': connections,
+            'requests': requests_count,
+            'reused': max(requests_count - connections, 0)
+        }
+
+    def close(self):
+        self.session.close()
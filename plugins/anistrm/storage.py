@@ -0,0 +1,48 @@
+import os
+import threading
+
+from app.log import logger
+
+# strm文件写入结果
+CREATED = 'created'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+
+
+def _read_text(file_path: str) -> str:
+    """读取已有文件内容，文件不存在时返回None"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+    except (OSError, UnicodeDecodeError):
+        # 无法读取的文件视为内容不同，直接覆盖
+        return ''
+
+
+def write_strm(file_path: str, content: str) -> str:
+    """
+    写入strm文件：内容未变化时跳过，否则写入临时文件后重命名，避免读到写了一半的文件
+    :return: CREATED / UPDATED / UNCHANGED / FAILED
+    """
+    existing = _read_text(file_path)
+    if existing == content:
+        return UNCHANGED
+    tmp_path = os.path.join(os.path.dirname(file_path) or '.',
+                            f'.{os.path.basename(file_path)}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        # 使用os.open按umask创建文件，保持与直接open写入相同的权限
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        logger.error(f'创建strm源文件失败：{str(e)}')
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return FAILED
+    return CREATED if existing is None else UPDATED
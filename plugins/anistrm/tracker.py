@@ -0,0 +1,85 @@
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from .naming import parse_name
+from .schedule import BULK_THRESHOLD
+from .season import season_key
+
+_SPACES = re.compile(r'\s+')
+
+
+def series_key(name: str) -> str:
+    """番剧文件夹名或文件名对应的番剧标识，与空格、大小写无关"""
+    return _SPACES.sub(' ', parse_name(name).series).strip().casefold()
+
+
+class SeriesTracker:
+    """
+    跨季度连载番剧跟踪：记录每部番剧最近一次出现新剧集的时间，
+    季度切换后仍在更新的往季番剧只获取其文件夹，超过空闲时间没有新剧集的番剧自动停止跟踪
+    """
+
+    def __init__(self, state: Dict[str, Any] = None):
+        # {季度|番剧标识: {'season': 季度, 'series': 番剧名, 'last': 最近一集的时间戳}}
+        self._series: Dict[str, Dict[str, Any]] = dict(state or {})
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return self._series
+
+    def __bool__(self) -> bool:
+        return bool(self._series)
+
+    def touch(self, season: str, name: str, timestamp: float = None):
+        """
+        记录番剧出现了新剧集
+        :param season: 剧集所在季度目录
+        :param name: ANi文件名或番剧名
+        :param timestamp: 出现时间，默认为当前时间
+        """
+        if not season or not name:
+            return
+        timestamp = timestamp or time.time()
+        key = f'{season}|{series_key(name)}'
+        entry = self._series.setdefault(key, {'season': season, 'series': parse_name(name).series, 'last': 0})
+        entry['last'] = max(entry['last'], timestamp)
+
+    def touch_many(self, observations: Iterable[Tuple[str, str, float]]) -> int:
+        """
+        批量记录，跳过批量生成的剧集
+        :param observations: [(番剧名, 季度, 首次出现时间戳)]
+        :return: 记录的剧集数
+        """
+        observations = list(observations)
+        bulk = Counter(int(timestamp // 60) for _, _, timestamp in observations)
+        count = 0
+        for series, season, timestamp in observations:
+            if bulk[int(timestamp // 60)] > BULK_THRESHOLD:
+                continue
+            self.touch(season, series, timestamp)
+            count += 1
+        return count
+
+    def expire(self, idle_days: float, now: float = None) -> List[str]:
+        """
+        停止跟踪超过空闲时间没有新剧集的番剧
+        :return: 停止跟踪的番剧名
+        """
+        deadline = (now or time.time()) - idle_days * 86400
+        expired = [key for key, entry in self._series.items() if entry['last'] < deadline]
+        return [self._series.pop(key)['series'] for key in expired]
+
+    def continuing(self, current_season: str) -> Dict[str, Set[str]]:
+        """
+        往季中仍在跟踪的番剧
+        :return: {季度: {番剧标识}}
+        """
+        current = season_key(current_season)
+        seasons: Dict[str, Set[str]] = {}
+        for key, entry in self._series.items():
+            season = season_key(entry['season'])
+            if season and current and season < current:
+                seasons.setdefault(entry['season'], set()).add(key.split('|', 1)[1])
+        return seasons